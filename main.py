@@ -1,6 +1,14 @@
 """
 Main entry point for Home Gateway Configuration Automation.
 Orchestrates: Login -> Switch to Advanced Mode.
+
+Usage:
+    python main.py                                  # single gateway at Config.BASE_URL
+    python main.py --inventory gateways.json -w 8   # fleet mode, 8 gateways in parallel
+    python main.py --apply-mode dm                  # apply desired_state.json over ubus-cli, UI only verifies
+    python main.py --apply-mode api                 # browserless: apply over the gateway's HTTP/JSON API
+    python main.py --api-steps radio24,ntp          # UI run, but these steps go over the HTTP API
+    python main.py --resume                         # continue a failed run at its first incomplete step
 """
 from utils.driver_factory import get_driver
 from pages.login_page import LoginPage
@@ -21,342 +29,608 @@ from pages.users_page import UsersPage
 from pages.base_page import RecoveryHandledException
 from utils.logger import Logger
 from utils.config import Config
-import time
+from utils.desired_state import DesiredState
+from utils.dm_client import DMClient
+from utils.api_client import ApiClient
+from utils.reachability import wait_until_reachable
+from utils.evidence import EvidenceWriter
+from utils.video_recorder import VideoRecorder
+from utils.checkpoint import Checkpoint, state_fingerprint
+from utils.step_graph import Step, StepGraph
+from utils.fleet import load_inventory, run_fleet
+from utils.metrics import Metrics
+import argparse
+import os
+import re
 import paramiko
 
-def main():
-    """Main orchestration function."""
+
+# Data-model paths of the LAN addressing in the desired state (overridable per gateway in the inventory)
+LAN_IP_PATH = "Device.IP.Interface.lan.IPv4Address.lan.IPAddress"
+DHCP_START_PATH = "Device.DHCPv4.Server.Pool.lan.MinAddress"
+DHCP_END_PATH = "Device.DHCPv4.Server.Pool.lan.MaxAddress"
+
+
+def run_pipeline(driver, gateway=None):
+    """
+    Runs the configuration pipeline against Config.BASE_URL with the given driver.
+    gateway: optional inventory entry (fleet mode) overriding the LAN addressing,
+    the desired-state file ('desired_state'), the apply mode ('apply_mode': 'ui' | 'dm' | 'api')
+    or the backend of single UI steps ('step_backends', e.g. {"radio24": "api"}).
+    'force_credentials' re-applies the sections holding passwords even when nothing else changed.
+    driver may be None in 'api' mode.
+    """
+    gateway = gateway or {}
+    state = DesiredState.load(gateway.get("desired_state"))
+    state.force_write_only = gateway.get("force_credentials", Config.FORCE_CREDENTIALS)
+    for key, path in (("lan_ip", LAN_IP_PATH), ("dhcp_start", DHCP_START_PATH), ("dhcp_end", DHCP_END_PATH)):
+        if key in gateway:
+            state.override(path, gateway[key])
+    apply_mode = gateway.get("apply_mode", Config.APPLY_MODE)
+    if apply_mode == "dm":
+        return run_dm_pipeline(driver, gateway, state)
+    if apply_mode == "api":
+        return run_api_pipeline(gateway, state)
+    return run_ui_pipeline(driver, gateway, state)
+
+
+def step_backends(gateway):
+    """
+    Per-step backend overrides: Config.STEP_BACKENDS ("radio24=api,ntp=api") updated with the
+    gateway's 'step_backends' (dict, or the same string form in a CSV inventory).
+    """
+    backends = {}
+    for source in (Config.STEP_BACKENDS, gateway.get("step_backends") or {}):
+        if isinstance(source, str):
+            source = dict(item.split("=", 1) for item in source.replace(" ", "").split(",") if item)
+        backends.update(source)
+    return backends
+
+
+def read_pending_sections(state):
+    """
+    Returns the desired-state sections the gateway does not match yet, read in one batched ubus-cli get.
+    If the data model cannot be reached, every section is considered pending (full run).
+    """
     logger = Logger().get_logger()
-    driver = None
-    
+    if not Config.DIFF_BEFORE_APPLY:
+        return set(state.section_names())
+    host = Config.BASE_URL.split("//", 1)[-1].split("/")[0]
+    logger.info(f"\n--- READ CURRENT STATE VIA UBUS-CLI ({host}) ---")
     try:
-        logger.info("=" * 60)
-        logger.info("Starting Home Gateway Configuration Automation")
-        logger.info("Target URL: " + Config.BASE_URL)
-        logger.info("=" * 60)
-        
-        # Initialize driver
-        logger.info("Initializing WebDriver...")
-        driver = get_driver()
-        
-        # 1. LOGIN PHASE
-        logger.info("\n--- STEP 1: LOGIN ---")
-        login_page = LoginPage(driver)
-        
-        # Perform login (internally navigates to Config.BASE_URL)
-        login_page.login()
-        
-        # 2. DASHBOARD MODE SWITCH
-        logger.info("\n--- STEP 2: SWITCH TO ADVANCED MODE ---")
-        dashboard_page = DashboardPage(driver)
-        
-        # Wait for dashboard to load after login
-        dashboard_page.wait_for_page_load()
-        
-        # Perform mode switch if necessary
-        if dashboard_page.ensure_advanced_mode():
-            logger.info("Successfully reached Advanced Mode.")
-        else:
-            logger.warning("Could not verify Advanced Mode switch.")
-            
-        # 3. LAN PAGE CONFIGURATION
-        logger.info("\n--- STEP 3: LAN PAGE CONFIGURATION ---")
-        lan_page = LanPage(driver)
-        
-        # Navigate to LAN pa
-        lan_page.navigate()
-        
-        # Configure IPs
-        lan_page.configure_ips("192.168.3.5", "192.168.3.6", "192.168.3.250")
-        
-        # Apply changes
-        if lan_page.apply_changes():
-            logger.info("LAN configuration applied and confirmed.")
-        else:
-            logger.error("LAN configuration failed.")
-            
-        # 4. RE-LOGIN AT NEW IP
-        logger.info("\n--- STEP 4: RE-LOGIN AT NEW IP ---")
-        new_ip = "192.168.3.5"
-        new_url = f"http://{new_ip}"
-        
-        # Update Config globally after LAN change
-        Config.BASE_URL = new_url
-        logger.info(f"Config.BASE_URL updated to: {Config.BASE_URL}")
+        with DMClient(host=host) as dm:
+            return set(dm.diff_desired_state(state))
+    except (paramiko.SSHException, OSError) as e:
+        logger.warning(f"Could not read current state over the data model ({e}). Applying every step.")
+        return set(state.section_names())
 
-        logger.info(f"Waiting 30 seconds for gateway to stabilize at {new_ip}...")
-        time.sleep(30)
-        
-        logger.info(f"Attempting re-login at {new_url}...")
-        login_page.login(url=new_url)
-        
-        # 4.1 VERIFY ADVANCED MODE
-        logger.info("\n--- STEP 4.1: VERIFY ADVANCED MODE AT NEW IP ---")
-        # Reuse dashboard_page instance (re-initialized with current driver state) may be safer to re-instantiate
-        dashboard_page_new_ip = DashboardPage(driver) # Create new instance to be safe
-        dashboard_page_new_ip.wait_for_page_load()
-
-        if dashboard_page_new_ip.ensure_advanced_mode():
-             logger.info("Successfully verified/switched to Advanced Mode at new IP.")
-        else:
-             logger.warning("Could not verify Advanced Mode at new IP.")
-        
-        # 5. NAVIGATE TO NEW IP WIFI PAGE
-        logger.info("\n--- STEP 5: NAVIGATE TO NEW IP WIFI PAGE ---")
-        new_ip_wifi_url = f"{new_url}/#wifi/"
-        logger.info(f"Navigating to new IP WiFi page: {new_ip_wifi_url}")
-        driver.get(new_ip_wifi_url)
-        
-        # Instantiate WifiPage
-        wifi_page = WifiPage(driver)
-        wifi_page.wait_for_page_load()
-        logger.info(f"Successfully reached WiFi page at new IP: {new_ip_wifi_url}")
-        
-        # 6. SPLIT WIFI VAPS
-        logger.info("\n--- STEP 6: SPLIT WIFI VAPS ---")
-        if wifi_page.split_vaps():
-            logger.info("WiFi VAPs split successfully.")
-        else:
-            logger.error("Failed to split WiFi VAPs.")
-        
-        # 7. WIFI 2.4GHz DETAILS PHASE
-        logger.info("\n--- WIFI 2.4GHz DETAILS PHASE ---")
-        wifi24_page = Wifi24Page(driver)
-        
-        try:
-            # 1. Navigate to WiFi 2.4GHz details URL
-            wifi24_page.navigate()
-            wifi24_page.take_screenshot("11_wifi24_details_loaded")
-            
-            # 2. Update SSID to amine_prpl_24 and 3. Password to amine123
-            if wifi24_page.update_ssid_and_password("amine_prpl_24", "amine123"):
-                wifi24_page.take_screenshot("12_ssid_password_updated")
-            
-            # 4 & 5 & 6 & 7. Select WPA3, Save, and Re-navigate
-            if wifi24_page.select_security_wpa3():
-                wifi24_page.take_screenshot("13_security_saved_and_re-navigated")
-            
-        except RecoveryHandledException:
-            logger.warning("Main WiFi 2.4GHz configuration interrupted by popup. Skipping to MAC filtering.")
 
-        # 8 & 9. MAC Filtering Radios
-        try:
-            logger.info("Setting MAC Filtering to 'Allow'...")
-            if wifi24_page.toggle_radio_and_apply(locator=wifi24_page.MAC_FILTER_ALLOW_RADIO):
-                wifi24_page.take_screenshot("14_mac_filter_allow_applied")
+# ------------------------------------------------------------------
+# UI pipeline steps. Each step takes the shared run context
+# {"driver", "state", ...} and is tied to the desired-state section it applies.
+# A step returning False failed softly: the pipeline goes on, but the step is
+# not checkpointed, so --resume runs it again.
+# ------------------------------------------------------------------
 
-            logger.info("Setting MAC Filtering to 'Disable'...")
-            if wifi24_page.toggle_radio_and_apply(locator=wifi24_page.MAC_FILTER_DISABLE_RADIO):
-                wifi24_page.take_screenshot("15_mac_filter_disable_applied")
-        except RecoveryHandledException:
-            logger.warning("MAC Filter toggle interrupted by popup. skipping to device selection.")
-            
-        # 10. Select first device from dynamic list and Apply
-        try:
-            logger.info("Selecting first device from dynamic list and applying...")
-            if wifi24_page.select_first_device_and_apply():
-                wifi24_page.take_screenshot("16_device_selected_and_applied")
-        except RecoveryHandledException:
-            logger.warning("Device selection interrupted by popup. Finishing automation.")
+def step_login(ctx):
+    """STEP 1: login at Config.BASE_URL."""
+    Logger().get_logger().info("\n--- STEP 1: LOGIN ---")
+    # Perform login (internally navigates to Config.BASE_URL)
+    LoginPage(ctx["driver"]).login()
 
-        # Intermediate stability step: Navigate to main WiFi page
-        logger.info("Stability step: Navigating to main WiFi page before next band...")
-        wifi_page.navigate()
-        time.sleep(5)
 
-        # 8. WIFI 5GHz DETAILS PHASE
-        logger.info("\n--- WIFI 5GHz DETAILS PHASE ---")
-        wifi5_page = Wifi5Page(driver)
-        
-        try:
-            # 1. Navigate to WiFi 5GHz details URL
-            wifi5_page.navigate()
-            wifi5_page.take_screenshot("17_wifi5_details_loaded")
-            
-            # 2. Update SSID to amine_prpl_5ghz and 3. Password to amine123
-            if wifi5_page.update_ssid_and_password("amine_prpl_5ghz", "amine123"):
-                wifi5_page.take_screenshot("18_wifi5_ssid_password_updated")
-            
-            # 4 & 5 & 6 & 7. Select WPA3, Save, and Re-navigate
-            if wifi5_page.select_security_wpa3():
-                wifi5_page.take_screenshot("19_wifi5_security_saved_and_re-navigated")
-            
-            # 8 & 9. MAC Filtering Radios (Allow -> Disable)
-            try:
-                logger.info("Setting WiFi 5GHz MAC Filtering to 'Allow'...")
-                if wifi5_page.toggle_radio_and_apply(locator=wifi5_page.MAC_FILTER_ALLOW_RADIO):
-                    wifi5_page.take_screenshot("20_wifi5_mac_filter_allow_applied")
+def step_advanced_mode(ctx):
+    """STEP 2: switch the dashboard to Advanced Mode."""
+    logger = Logger().get_logger()
+    logger.info("\n--- STEP 2: SWITCH TO ADVANCED MODE ---")
+    dashboard_page = DashboardPage(ctx["driver"])
 
-                logger.info("Setting WiFi 5GHz MAC Filtering to 'Disable'...")
-                if wifi5_page.toggle_radio_and_apply(locator=wifi5_page.MAC_FILTER_DISABLE_RADIO):
-                    wifi5_page.take_screenshot("21_wifi5_mac_filter_disable_applied")
-            except RecoveryHandledException:
-                logger.warning("WiFi 5GHz MAC Filter toggle interrupted by popup. Skipping to device selection.")
+    # Wait for dashboard to load after login
+    dashboard_page.wait_for_page_load()
 
-            # 10. Select first device from dynamic list and Apply
-            try:
-                logger.info("Selecting first device from WiFi 5GHz dynamic list and applying...")
-                if wifi5_page.select_first_device_and_apply():
-                    wifi5_page.take_screenshot("22_wifi5_device_selected_and_applied")
-            except RecoveryHandledException:
-                logger.warning("WiFi 5GHz device selection interrupted by popup.")
+    # Perform mode switch if necessary
+    if dashboard_page.ensure_advanced_mode():
+        logger.info("Successfully reached Advanced Mode.")
+    else:
+        logger.warning("Could not verify Advanced Mode switch.")
 
-        except RecoveryHandledException:
-            logger.warning("WiFi 5GHz configuration interrupted by popup. Skipping to final steps.")
 
-        # Intermediate stability step: Navigate to main WiFi page
-        logger.info("Stability step: Navigating to main WiFi page and wait 5s...")
-        wifi_page.navigate(base_url=new_url)
-        time.sleep(5)
+def step_lan(ctx):
+    """STEP 3: LAN IP and DHCP range."""
+    logger = Logger().get_logger()
+    state = ctx["state"]
+    logger.info("\n--- STEP 3: LAN PAGE CONFIGURATION ---")
+    lan_page = LanPage(ctx["driver"])
+    lan_page.navigate()
+
+    # Configure IPs (never apply a half-filled LAN form)
+    if not lan_page.configure_ips(state.value(LAN_IP_PATH), state.value(DHCP_START_PATH), state.value(DHCP_END_PATH)):
+        logger.error("LAN fields could not be filled.")
+        return False
+
+    # Apply changes
+    if not lan_page.apply_changes():
+        logger.error("LAN configuration failed.")
+        return False
+    logger.info("LAN configuration applied and confirmed.")
+
+    # Update Config globally after LAN change (checkpointed, so a resume targets the new address)
+    ctx["previous_base_url"] = Config.BASE_URL
+    Config.BASE_URL = f"http://{state.value(LAN_IP_PATH)}"
+    logger.info(f"Config.BASE_URL updated to: {Config.BASE_URL}")
+    return True
+
+
+def step_relogin(ctx):
+    """STEP 4: re-login at the new LAN address and verify Advanced Mode."""
+    logger = Logger().get_logger()
+    driver = ctx["driver"]
+    logger.info("\n--- STEP 4: RE-LOGIN AT NEW IP ---")
+    new_url = Config.BASE_URL
+
+    # Poll the new address until the web UI answers instead of a fixed 30s sleep
+    login_page = LoginPage(driver)
+    login_page.wait_for_login_form(new_url)
+
+    logger.info(f"Attempting re-login at {new_url}...")
+    # The session opened at the old address may still be valid on the new one
+    login_page.login(url=new_url, session_from=ctx.get("previous_base_url"))
+
+    # 4.1 VERIFY ADVANCED MODE
+    logger.info("\n--- STEP 4.1: VERIFY ADVANCED MODE AT NEW IP ---")
+    dashboard_page_new_ip = DashboardPage(driver)
+    dashboard_page_new_ip.wait_for_page_load()
+
+    if dashboard_page_new_ip.ensure_advanced_mode():
+        logger.info("Successfully verified/switched to Advanced Mode at new IP.")
+    else:
+        logger.warning("Could not verify Advanced Mode at new IP.")
+
+
+def step_split_vaps(ctx):
+    """STEPS 5-6: open the WiFi page and split the VAPs (skipped when already split)."""
+    logger = Logger().get_logger()
+    driver = ctx["driver"]
+    logger.info("\n--- STEP 5: NAVIGATE TO NEW IP WIFI PAGE ---")
+    wifi_page = WifiPage(driver)
+    wifi_page.navigate()
+    logger.info(f"Successfully reached WiFi page at new IP: {Config.BASE_URL}/{WifiPage.URL_PATH}")
+
+    logger.info("\n--- STEP 6: SPLIT WIFI VAPS ---")
+    if wifi_page.is_already_split():
+        logger.info("WiFi VAPs already split. Skipping.")
+    elif wifi_page.split_vaps():
+        logger.info("WiFi VAPs split successfully.")
+    else:
+        logger.error("Failed to split WiFi VAPs.")
+        return False
+    ctx["vaps_split"] = True
+    return True
+
+
+def configure_wifi_band(ctx, page_class, label, vap, name, shots):
+    """
+    STEPS 7-9: SSID/password, WPA3 + Save, MAC filtering (Allow -> Disable) and device selection
+    for one private VAP. shots: screenshot numbers for this band (loaded .. device applied).
+    """
+    logger = Logger().get_logger()
+    state = ctx["state"]
+    logger.info(f"\n--- WIFI {label} DETAILS PHASE ---")
+    page = page_class(ctx["driver"])
+    # 2.4GHz screenshots historically carry no band prefix
+    prefix = "" if name == "wifi24" else f"{name}_"
+
+    try:
+        # 1. Navigate to the band details URL
+        page.navigate()
+        page.take_screenshot(f"{shots[0]}_{name}_details_loaded")
+
+        # 2. Update SSID and 3. Password (values from the desired state, skipped when unchanged)
+        if page.update_ssid_and_password(
+                state.value(f"Device.WiFi.SSID.{vap}.SSID"),
+                state.value(f"Device.WiFi.AccessPoint.{vap}.Security.KeyPassphrase")):
+            page.take_screenshot(f"{shots[1]}_{prefix}ssid_password_updated")
+
+        # 4 & 5 & 6 & 7. Select the security mode, Save, and Re-navigate (skipped when already set and nothing changed)
+        if page.select_security(state.value(f"Device.WiFi.AccessPoint.{vap}.Security.ModeEnabled")):
+            page.take_screenshot(f"{shots[2]}_{prefix}security_saved_and_re-navigated")
+
+    except RecoveryHandledException:
+        logger.warning(f"WiFi {label} configuration interrupted by popup. Skipping to MAC filtering.")
+
+    # 8 & 9. MAC Filtering Radios (Allow -> Disable)
+    try:
+        logger.info(f"Setting WiFi {label} MAC Filtering to 'Allow'...")
+        if page.toggle_radio_and_apply(locator=page.MAC_FILTER_ALLOW_RADIO):
+            page.take_screenshot(f"{shots[3]}_{prefix}mac_filter_allow_applied")
+
+        logger.info(f"Setting WiFi {label} MAC Filtering to 'Disable'...")
+        if page.toggle_radio_and_apply(locator=page.MAC_FILTER_DISABLE_RADIO):
+            page.take_screenshot(f"{shots[4]}_{prefix}mac_filter_disable_applied")
+    except RecoveryHandledException:
+        logger.warning(f"WiFi {label} MAC Filter toggle interrupted by popup. Skipping to device selection.")
+
+    # 10. Select first device from dynamic list and Apply
+    try:
+        logger.info(f"Selecting first device from WiFi {label} dynamic list and applying...")
+        if page.select_first_device_and_apply():
+            page.take_screenshot(f"{shots[5]}_{prefix}device_selected_and_applied")
+    except RecoveryHandledException:
+        logger.warning(f"WiFi {label} device selection interrupted by popup.")
+
+    # Stability step: back to the main WiFi page before the next band
+    logger.info("Stability step: Navigating to main WiFi page and waiting for it to settle...")
+    wifi_page = WifiPage(ctx["driver"])
+    wifi_page.navigate(base_url=Config.BASE_URL)
+    wifi_page.wait_for_dom_quiet()
 
-        # 9. WIFI 6GHz DETAILS PHASE
-        logger.info("\n--- WIFI 6GHz DETAILS PHASE ---")
-        wifi6_page = Wifi6Page(driver)
-        
-        try:
-            # 1. Navigate to WiFi 6GHz details URL
-            wifi6_page.navigate()
-            wifi6_page.take_screenshot("23_wifi6_details_loaded")
-            
-            # 2. Update SSID to amine_prpl_6ghz and 3. Password to amine123
-            if wifi6_page.update_ssid_and_password("amine_prpl_6ghz", "amine123"):
-                wifi6_page.take_screenshot("24_wifi6_ssid_password_updated")
-            
-            # 4 & 5 & 6 & 7. Select WPA3, Save, and Re-navigate
-            if wifi6_page.select_security_wpa3():
-                wifi6_page.take_screenshot("25_wifi6_security_saved_and_re-navigated")
-            
-            # 8 & 9. MAC Filtering Radios (Allow -> Disable)
-            try:
-                logger.info("Setting WiFi 6GHz MAC Filtering to 'Allow'...")
-                if wifi6_page.toggle_radio_and_apply(locator=wifi6_page.MAC_FILTER_ALLOW_RADIO):
-                    wifi6_page.take_screenshot("26_wifi6_mac_filter_allow_applied")
 
-                logger.info("Setting WiFi 6GHz MAC Filtering to 'Disable'...")
-                if wifi6_page.toggle_radio_and_apply(locator=wifi6_page.MAC_FILTER_DISABLE_RADIO):
-                    wifi6_page.take_screenshot("27_wifi6_mac_filter_disable_applied")
-            except RecoveryHandledException:
-                logger.warning("WiFi 6GHz MAC Filter toggle interrupted by popup. Skipping to device selection.")
+def step_wifi24(ctx):
+    configure_wifi_band(ctx, Wifi24Page, "2.4GHz", "vap2g0priv", "wifi24", (11, 12, 13, 14, 15, 16))
 
-            # 10. Select first device from dynamic list and Apply
+
+def step_wifi5(ctx):
+    configure_wifi_band(ctx, Wifi5Page, "5GHz", "vap5g0priv", "wifi5", (17, 18, 19, 20, 21, 22))
+
+
+def step_wifi6(ctx):
+    configure_wifi_band(ctx, Wifi6Page, "6GHz", "vap6g0priv", "wifi6", (23, 24, 25, 26, 27, 28))
+
+
+def run_page_step(ctx, title, page_class, loaded_shot, action, applied_shot, label):
+    """Navigates to a page, runs action(page) and logs/screenshots the outcome. Returns the action's result."""
+    logger = Logger().get_logger()
+    logger.info(f"\n--- {title} ---")
+    page = page_class(ctx["driver"])
+    page.navigate()
+    page.take_screenshot(loaded_shot)
+    if action(page):
+        page.take_screenshot(applied_shot)
+        logger.info(f"{label} configured successfully.")
+        return True
+    logger.error(f"{label} configuration failed.")
+    return False
+
+
+def step_radio24(ctx):
+    channel = ctx["state"].value("Device.WiFi.Radio.1.Channel")
+    return run_page_step(ctx, "STEP 10: RADIO 2.4GHz CONFIGURATION", Radio24Page, "29_radio24_loaded",
+                  lambda page: page.select_channel(channel), f"30_radio24_channel{channel}_applied", "Radio 2.4GHz")
+
+
+def step_radio5(ctx):
+    channel = ctx["state"].value("Device.WiFi.Radio.2.Channel")
+    return run_page_step(ctx, "STEP 11: RADIO 5GHz CONFIGURATION", Radio5Page, "31_radio5_loaded",
+                  lambda page: page.select_channel(channel), f"32_radio5_channel{channel}_applied", "Radio 5GHz")
+
+
+def step_radio6(ctx):
+    channel = ctx["state"].value("Device.WiFi.Radio.3.Channel")
+    return run_page_step(ctx, "STEP 12: RADIO 6GHz CONFIGURATION", Radio6Page, "33_radio6_loaded",
+                  lambda page: page.select_channel(channel), f"34_radio6_channel{channel}_applied", "Radio 6GHz")
+
+
+def step_dyndns(ctx):
+    state = ctx["state"]
+    return run_page_step(ctx, "STEP 13: DYNDNS CONFIGURATION", DyndnsPage, "35_dyndns_loaded",
+                  lambda page: page.configure_dyndns_client(
+                      state.value("Device.DynamicDNS.Client.1.Hostname.1.Name"),
+                      state.value("Device.DynamicDNS.Client.1.Username"),
+                      state.value("Device.DynamicDNS.Client.1.Password")),
+                  "36_dyndns_client_configured", "DynDNS client")
+
+
+def step_ntp(ctx):
+    return run_page_step(ctx, "STEP 14: NTP TIMEZONE CONFIGURATION", NtpPage, "37_ntp_loaded",
+                  lambda page: page.select_timezone(ctx["state"].value("Device.Time.LocalTimeZone")),
+                  "38_ntp_timezone_applied", "NTP timezone")
+
+
+def step_firewall(ctx):
+    return run_page_step(ctx, "STEP 15: FIREWALL CONFIGURATION", FirewallPage, "39_firewall_loaded",
+                  lambda page: page.select_level(ctx["state"].value("Device.Firewall.Config")),
+                  "40_firewall_level_applied", "Firewall level")
+
+
+def step_guest(ctx):
+    state = ctx["state"]
+    return run_page_step(ctx, "STEP 16: WIFI GUEST CONFIGURATION", WifiGuestPage, "41_wifi_guest_loaded",
+                  lambda page: page.configure_guest(state.value("Device.WiFi.SSID.vap5g0guest.SSID")),
+                  "42_wifi_guest_configured", "WiFi Guest")
+
+
+def step_users(ctx):
+    state = ctx["state"]
+    return run_page_step(ctx, "STEP 17: ADMIN PASSWORD CONFIGURATION", UsersPage, "43_users_page_loaded",
+                  lambda page: page.update_admin_password(state.value("Device.Users.User.admin.Password")),
+                  "44_admin_password_updated", "Admin password")
+
+
+# Steps that only (re)build the browser session: always run, also when resuming
+SESSION_STEPS = {"login", "advanced_mode"}
+# Re-opens the browser session at the new address: never delegated to another backend
+BROWSER_ONLY_STEPS = {"relogin"}
+# Run-context keys saved in the checkpoint next to the current base URL
+RESUME_CONTEXT = ("vaps_split", "previous_base_url")
+
+# Every step after the LAN change needs the session at the new address; the band pages need split VAPs.
+# The admin password is changed last: the new password would end the current web session.
+CONFIG_STEPS = ["wifi24", "wifi5", "wifi6", "radio24", "radio5", "radio6", "dyndns", "ntp", "firewall", "guest"]
+UI_GRAPH = StepGraph([
+    Step("login", step_login, page=LoginPage),
+    Step("advanced_mode", step_advanced_mode, deps=["login"], page=DashboardPage),
+    Step("lan", step_lan, deps=["advanced_mode"], page=LanPage, section="lan"),
+    Step("relogin", step_relogin, deps=["lan"], page=LoginPage, section="lan"),
+    Step("split_vaps", step_split_vaps, deps=["relogin"], page=WifiPage),
+    Step("wifi24", step_wifi24, deps=["split_vaps"], page=Wifi24Page, section="wifi24"),
+    Step("wifi5", step_wifi5, deps=["split_vaps"], page=Wifi5Page, section="wifi5"),
+    Step("wifi6", step_wifi6, deps=["split_vaps"], page=Wifi6Page, section="wifi6"),
+    Step("radio24", step_radio24, deps=["relogin"], page=Radio24Page, section="radio24"),
+    Step("radio5", step_radio5, deps=["relogin"], page=Radio5Page, section="radio5"),
+    Step("radio6", step_radio6, deps=["relogin"], page=Radio6Page, section="radio6"),
+    Step("dyndns", step_dyndns, deps=["relogin"], page=DyndnsPage, section="dyndns"),
+    Step("ntp", step_ntp, deps=["relogin"], page=NtpPage, section="ntp"),
+    Step("firewall", step_firewall, deps=["relogin"], page=FirewallPage, section="firewall"),
+    Step("guest", step_guest, deps=["split_vaps"], page=WifiGuestPage, section="guest"),
+    Step("users", step_users, deps=CONFIG_STEPS, page=UsersPage, section="users"),
+])
+
+
+def run_ui_pipeline(driver, gateway, state):
+    """
+    Runs the 17-step UI configuration pipeline (UI_GRAPH), taking every value from the desired state.
+    The gateway's current values are read first; steps whose section already matches are skipped.
+    Every completed step is checkpointed; gateway['resume'] continues after the last completed one.
+    A failing step only blocks the steps that depend on it; the run raises once the graph is done.
+    """
+    logger = Logger().get_logger()
+    # Checkpoint file and recording prefix: the inventory name, else host[:port] made file-name safe
+    name = gateway.get("name") or re.sub(r"[:/]", "_", Config.BASE_URL.split("//", 1)[-1].split("/")[0])
+    checkpoint = Checkpoint(name, state_fingerprint(state))
+    ctx = {"driver": driver, "state": state}
+
+    if gateway.get("resume") and checkpoint.load():
+        # The LAN change may already have moved the gateway: continue at the recorded address
+        Config.BASE_URL = checkpoint.context.get("base_url", Config.BASE_URL)
+        ctx.update({key: checkpoint.context[key] for key in RESUME_CONTEXT if key in checkpoint.context})
+        logger.info(f"Resuming at {Config.BASE_URL}")
+    else:
+        checkpoint.clear()
+
+    pending = read_pending_sections(state)
+    backends = step_backends(gateway)
+
+    def runner(step, ctx):
+        if backends.get(step.name) == "api" and step.section and step.name not in BROWSER_ONLY_STEPS:
+            return run_step_via_api(ctx, step)
+        return step.func(ctx)
+
+    def skip(step):
+        if step.name not in SESSION_STEPS and checkpoint.is_done(step.name):
+            return "completed in a previous run"
+        if step.section and step.section not in pending:
+            Metrics().increment("steps_skipped")
+            return "already in desired state"
+        return None
+
+    def on_complete(step, status):
+        # Soft failures are not checkpointed, so --resume runs them again
+        if status in ("passed", "skipped"):
+            checkpoint.mark_done(step.name, base_url=Config.BASE_URL,
+                                 **{key: ctx[key] for key in RESUME_CONTEXT if key in ctx})
+        elif status in ("failed", "soft_failed") and recorder and recorder.flight_seconds:
+            recorder.save(f"{step.name}_{status}")
+
+    # One video per gateway session, from this browser's own screencast
+    # (flight recorder: only the seconds before each failure are kept)
+    recorder = None
+    if Config.VIDEO_RECORDING:
+        recorder = VideoRecorder(driver)
+    elif Config.FLIGHT_RECORDER:
+        recorder = VideoRecorder(driver, flight_seconds=Config.FLIGHT_RECORDER_SECONDS)
+
+    # One browser per gateway: every UI step shares the 'browser' resource, so they run one at a time
+    try:
+        if recorder:
             try:
-                logger.info("Selecting first device from WiFi 6GHz dynamic list and applying...")
-                if wifi6_page.select_first_device_and_apply():
-                    wifi6_page.take_screenshot("28_wifi6_device_selected_and_applied")
-            except RecoveryHandledException:
-                logger.warning("WiFi 6GHz device selection interrupted by popup.")
+                recorder.start(name_prefix=name)
+            except Exception as e:
+                # Recording is optional: the configuration run goes on without it
+                logger.warning(f"[VIDEO] Could not start recording ({e}). Continuing without video.")
+                recorder = None
+        UI_GRAPH.run(ctx, skip=skip, on_complete=on_complete, runner=runner)
+    finally:
+        if ctx.get("api"):
+            ctx.pop("api").logout()
+        if recorder:
+            recorder.stop()
+
+    if UI_GRAPH.errors:
+        failed = ", ".join(f"{step_name}: {error}" for step_name, error in UI_GRAPH.errors)
+        raise RuntimeError(f"{len(UI_GRAPH.errors)} step(s) failed ({failed})") from UI_GRAPH.errors[0][1]
+
+    # Nothing left to resume once every step went through
+    if all(checkpoint.is_done(step_name) for step_name in UI_GRAPH.steps):
+        checkpoint.clear()
 
+    logger.info("\n" + "=" * 60)
+    logger.info("All automation steps completed successfully!")
+    logger.info("=" * 60)
+
+
+def run_step_via_api(ctx, step):
+    """Applies the step's desired-state section over the HTTP API instead of driving its page object."""
+    logger = Logger().get_logger()
+    state = ctx["state"]
+    logger.info(f"\n--- {step.name.upper()}: APPLY '{step.section}' VIA HTTP API ---")
+    if not ctx.get("api"):
+        ctx["api"] = ApiClient(Config.BASE_URL)
+        ctx["api"].login()
+    applied = ctx["api"].apply_desired_state(state, [step.section])
+
+    if applied and step.section in state.APPLY_LAST:
+        # The gateway moved: the next API step logs in again at the new address
+        ctx.pop("api").logout()
+        ctx["previous_base_url"] = Config.BASE_URL
+        Config.BASE_URL = f"http://{state.value(LAN_IP_PATH)}"
+        logger.info(f"Config.BASE_URL updated to: {Config.BASE_URL}")
+    return applied
+
+
+def run_api_pipeline(gateway, state):
+    """
+    Applies the desired state over the gateway's HTTP/JSON API only (no browser).
+    LAN is applied last; the values are then verified again at the new address.
+    """
+    logger = Logger().get_logger()
+    new_url = f"http://{state.value(LAN_IP_PATH)}"
+
+    # 1. APPLY (LAN last: it moves the gateway to the new address)
+    logger.info(f"\n--- API STEP 1: APPLY DESIRED STATE VIA HTTP API ({Config.BASE_URL}) ---")
+    with ApiClient(Config.BASE_URL) as api:
+        if not api.apply_desired_state(state, only_changed=Config.DIFF_BEFORE_APPLY):
+            raise RuntimeError("Desired state could not be applied over the HTTP API.")
+
+    # 2. VERIFY AT THE (NEW) ADDRESS
+    logger.info(f"\n--- API STEP 2: VERIFY AT {new_url} ---")
+    Config.BASE_URL = new_url
+    if not wait_until_reachable(new_url):
+        raise RuntimeError(f"Gateway not reachable at {new_url} after the LAN change.")
+    with ApiClient(new_url) as api:
+        if not api.verify_parameters(state.parameters()):
+            raise RuntimeError("Desired state verification over the HTTP API failed.")
+
+    logger.info("\n" + "=" * 60)
+    logger.info("Desired state applied and verified via HTTP API.")
+    logger.info("=" * 60)
+
+
+def run_dm_pipeline(driver, gateway, state):
+    """
+    Applies the desired state over the data model in one batched ubus-cli session.
+    The browser is only used afterwards to verify each page and capture evidence.
+    """
+    logger = Logger().get_logger()
+    lan_ip = state.value(LAN_IP_PATH)
+    host = Config.BASE_URL.split("//", 1)[-1].split("/")[0]
+
+    # 1. APPLY (LAN last: it moves the gateway to lan_ip)
+    logger.info(f"\n--- DM STEP 1: APPLY DESIRED STATE VIA UBUS-CLI ({host}) ---")
+    with DMClient(host=host) as dm:
+        if not dm.apply_desired_state(state, only_changed=Config.DIFF_BEFORE_APPLY):
+            raise RuntimeError("Desired state could not be applied over the data model.")
+
+    # 2. LOGIN AT THE (NEW) ADDRESS
+    logger.info("\n--- DM STEP 2: LOGIN FOR VERIFICATION ---")
+    new_url = f"http://{lan_ip}"
+    previous_url, Config.BASE_URL = Config.BASE_URL, new_url
+    login_page = LoginPage(driver)
+    login_page.wait_for_login_form(new_url)
+    login_page.login(url=new_url, session_from=previous_url)
+    dashboard_page = DashboardPage(driver)
+    dashboard_page.wait_for_page_load()
+    dashboard_page.ensure_advanced_mode()
+
+    # 3. VISUAL VERIFICATION / EVIDENCE
+    logger.info("\n--- DM STEP 3: CAPTURE EVIDENCE ---")
+    evidence_pages = [
+        ("lan", LanPage), ("wifi24", Wifi24Page), ("wifi5", Wifi5Page), ("wifi6", Wifi6Page),
+        ("radio24", Radio24Page), ("radio5", Radio5Page), ("radio6", Radio6Page),
+        ("dyndns", DyndnsPage), ("ntp", NtpPage), ("firewall", FirewallPage),
+        ("wifi_guest", WifiGuestPage), ("users", UsersPage),
+    ]
+    for name, page_class in evidence_pages:
+        page = page_class(driver)
+        try:
+            page.navigate()
+            page.take_screenshot(f"verify_{name}")
         except RecoveryHandledException:
-            logger.warning("WiFi 6GHz configuration interrupted by popup. Finishing automation.")
-
-        # Final stability step
-        logger.info("Final stability step: Navigating to main WiFi page and wait 5s...")
-        wifi_page.navigate()
-        time.sleep(5)
-
-        # 10. RADIO 2.4GHz CONFIGURATION
-        logger.info("\n--- STEP 10: RADIO 2.4GHz CONFIGURATION ---")
-        radio24_page = Radio24Page(driver)
-        radio24_page.navigate()
-        radio24_page.take_screenshot("29_radio24_loaded")
-        if radio24_page.select_channel_11():
-            radio24_page.take_screenshot("30_radio24_channel11_applied")
-            logger.info("Radio 2.4GHz configured successfully.")
-        else:
-            logger.error("Radio 2.4GHz configuration failed.")
-
-        # 11. RADIO 5GHz CONFIGURATION
-        logger.info("\n--- STEP 11: RADIO 5GHz CONFIGURATION ---")
-        radio5_page = Radio5Page(driver)
-        radio5_page.navigate()
-        radio5_page.take_screenshot("31_radio5_loaded")
-        if radio5_page.select_channel_36():
-            radio5_page.take_screenshot("32_radio5_channel36_applied")
-            logger.info("Radio 5GHz configured successfully.")
-        else:
-            logger.error("Radio 5GHz configuration failed.")
-
-        # 12. RADIO 6GHz CONFIGURATION
-        logger.info("\n--- STEP 12: RADIO 6GHz CONFIGURATION ---")
-        radio6_page = Radio6Page(driver)
-        radio6_page.navigate()
-        radio6_page.take_screenshot("33_radio6_loaded")
-        if radio6_page.select_channel_37():
-            radio6_page.take_screenshot("34_radio6_channel37_applied")
-            logger.info("Radio 6GHz configured successfully.")
-        else:
-            logger.error("Radio 6GHz configuration failed.")
-
-        # 13. DYNDNS CONFIGURATION
-        logger.info("\n--- STEP 13: DYNDNS CONFIGURATION ---")
-        dyndns_page = DyndnsPage(driver)
-        dyndns_page.navigate()
-        dyndns_page.take_screenshot("35_dyndns_loaded")
-        if dyndns_page.add_dyndns_client("sah.longmusic.com", "mjd.anas@gmail.com", "sahtelnet"):
-            dyndns_page.take_screenshot("36_dyndns_client_added")
-            logger.info("DynDNS client added successfully.")
-        else:
-            logger.error("DynDNS configuration failed.")
-
-        # 14. NTP TIMEZONE CONFIGURATION
-        logger.info("\n--- STEP 14: NTP TIMEZONE CONFIGURATION ---")
-        ntp_page = NtpPage(driver)
-        ntp_page.navigate()
-        ntp_page.take_screenshot("37_ntp_loaded")
-        if ntp_page.select_timezone_utc_minus4():
-            ntp_page.take_screenshot("38_ntp_timezone_applied")
-            logger.info("NTP timezone configured successfully.")
-        else:
-            logger.error("NTP timezone configuration failed.")
-
-        # 15. FIREWALL CONFIGURATION
-        logger.info("\n--- STEP 15: FIREWALL CONFIGURATION ---")
-        firewall_page = FirewallPage(driver)
-        firewall_page.navigate()
-        firewall_page.take_screenshot("39_firewall_loaded")
-        if firewall_page.select_custom_mode():
-            firewall_page.take_screenshot("40_firewall_custom_applied")
-            logger.info("Firewall Custom mode configured successfully.")
-        else:
-            logger.error("Firewall configuration failed.")
-
-        # 16. WIFI GUEST CONFIGURATION
-        logger.info("\n--- STEP 16: WIFI GUEST CONFIGURATION ---")
-        wifi_guest_page = WifiGuestPage(driver)
-        wifi_guest_page.navigate()
-        wifi_guest_page.take_screenshot("41_wifi_guest_loaded")
-        if wifi_guest_page.configure_guest("prpl_guest"):
-            wifi_guest_page.take_screenshot("42_wifi_guest_configured")
-            logger.info("WiFi Guest configured successfully.")
-        else:
-            logger.error("WiFi Guest configuration failed.")
-
-        # 17. ADMIN PASSWORD CONFIGURATION
-        logger.info("\n--- STEP 17: ADMIN PASSWORD CONFIGURATION ---")
-        users_page = UsersPage(driver)
-        users_page.navigate()
-        users_page.take_screenshot("43_users_page_loaded")
-        if users_page.update_admin_password("SoftAtHome"):
-            users_page.take_screenshot("44_admin_password_updated")
-            logger.info("Admin password updated successfully.")
-        else:
-            logger.error("Admin password configuration failed.")
-
-        logger.info("\n" + "=" * 60)
-        logger.info("All automation steps completed successfully!")
+            logger.warning(f"Evidence capture for {name} interrupted by popup.")
+
+    logger.info("\n" + "=" * 60)
+    logger.info("Desired state applied via data model and verified.")
+    logger.info("=" * 60)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Home Gateway Configuration Automation")
+    parser.add_argument("--inventory", "-i", help="JSON/CSV list of gateways to configure concurrently (fleet mode)")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                        help="Max gateways processed in parallel (default: Config.FLEET_WORKERS or CPU count)")
+    parser.add_argument("--apply-mode", choices=["ui", "dm", "api"], default=None,
+                        help="ui: configure through the page objects; dm: apply the desired state over ubus-cli "
+                             "and use the browser only for verification; api: apply and verify over the "
+                             "gateway's HTTP/JSON API without a browser (default: Config.APPLY_MODE)")
+    parser.add_argument("--api-steps", default=None,
+                        help="Comma-separated UI steps applied over the HTTP API instead (e.g. radio24,ntp)")
+    parser.add_argument("--state", default=None,
+                        help="Desired-state JSON file (default: Config.DESIRED_STATE_FILE)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue each gateway at its first incomplete step (checkpoints/<gateway>.json)")
+    parser.add_argument("--force-credentials", action="store_true",
+                        help="Re-apply passwords/passphrases (they cannot be read back, so the diff skips them)")
+    return parser.parse_args()
+
+
+def main():
+    """Main orchestration function."""
+    args = parse_args()
+    logger = Logger().get_logger()
+
+    # CLI options become defaults of every gateway entry (inventory entries can still override them)
+    defaults = {}
+    if args.apply_mode:
+        defaults["apply_mode"] = args.apply_mode
+    if args.state:
+        defaults["desired_state"] = args.state
+    if args.resume:
+        defaults["resume"] = True
+    if args.force_credentials:
+        defaults["force_credentials"] = True
+    if args.api_steps:
+        defaults["step_backends"] = {name: "api" for name in args.api_steps.split(",") if name}
+    browser_needed = defaults.get("apply_mode", Config.APPLY_MODE) != "api"
+
+    if args.inventory:
         logger.info("=" * 60)
+        logger.info(f"Starting Fleet Mode from inventory: {args.inventory}")
+        logger.info("=" * 60)
+        gateways = [{**defaults, **gateway} for gateway in load_inventory(args.inventory)]
+        browser_needed = any(gw.get("apply_mode", Config.APPLY_MODE) != "api" for gw in gateways)
+        results = run_fleet(run_pipeline, gateways, workers=args.workers, browser=browser_needed)
+        if any(r["status"] != "passed" for r in results):
+            raise SystemExit(1)
+        return
+
+    driver = None
+    
+    try:
+        logger.info("=" * 60)
+        logger.info("Starting Home Gateway Configuration Automation")
+        logger.info("Target URL: " + Config.BASE_URL)
+        logger.info("=" * 60)
+        
+        # Initialize driver (not needed when everything goes over the HTTP API)
+        if browser_needed:
+            logger.info("Initializing WebDriver...")
+            driver = get_driver()
+        
+        run_pipeline(driver, defaults)
         
     except Exception as e:
         logger.error(f"Automation failed during initial steps: {e}")
         if driver:
             try:
-                driver.save_screenshot("screenshots/main_error.png")
-                logger.info("Error screenshot saved to screenshots/main_error.png")
+                error_path = os.path.join(Config.SCREENSHOT_DIR, "main_error.png")
+                driver.save_screenshot(error_path)
+                logger.info(f"Error screenshot saved to {error_path}")
             except:
                 pass
         raise
         
     finally:
+        EvidenceWriter().flush()
+        Metrics().log_summary()
         if driver:
             logger.info("Closing browser...")
             driver.quit()
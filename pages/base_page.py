@@ -4,6 +4,11 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 from selenium.webdriver.common.by import By
 from utils.logger import Logger
+from utils.config import Config
+from utils.metrics import Metrics
+from utils.cdp_events import CdpEventBus, CommitWatcher
+from utils.evidence import EvidenceWriter, evidence_kind, should_capture
+from utils.video_recorder import VideoRecorder
 import time
 import os
 from datetime import datetime
@@ -14,12 +19,283 @@ class RecoveryHandledException(Exception):
 
 class BasePage:
     """Base class for all page objects with logging and generic validation."""
+
+    # Installs (once per document) a MutationObserver that timestamps the last DOM change.
+    # A full page load wipes window state, so the observer is naturally re-injected on the next call.
+    DOM_OBSERVER_JS = """
+        if (!window.__hgwDomObserver) {
+            window.__hgwLastMutation = performance.now();
+            window.__hgwDomObserver = new MutationObserver(function () {
+                window.__hgwLastMutation = performance.now();
+            });
+            window.__hgwDomObserver.observe(document.documentElement, {
+                childList: true, subtree: true, attributes: true, characterData: true
+            });
+        }
+    """
+
+    # Returns how many ms the DOM has been quiet
+    DOM_QUIET_SCRIPT = DOM_OBSERVER_JS + """
+        return performance.now() - window.__hgwLastMutation;
+    """
     
+    # REMOVED 'popup-background' from this list because it blocks VALID interactive popups
+    # Error popups are handled separately by checks inside the loop.
+    SPINNER_SELECTORS = [
+        "div.spinner-background",
+        "div.spinner",
+        "[class*='spinner']",
+        "div.loading-overlay",
+        ".f-icon_loading",
+        ".splash",
+        ".loader",
+        ".loading",
+        "div#init-loader"
+    ]
+
+    # Evaluates every spinner selector + visibility in the browser in one round trip.
+    # Returns the first visible spinner selector (or null) and the number of WebDriver
+    # commands the equivalent find_elements/is_displayed loop would have issued.
+    SPINNER_PROBE_SCRIPT = """
+        var selectors = arguments[0];
+        var commands = 0;
+        function isDisplayed(el) {
+            var style = window.getComputedStyle(el);
+            return el.getClientRects().length > 0 && style.visibility !== 'hidden'
+                && style.display !== 'none' && parseFloat(style.opacity) !== 0;
+        }
+        for (var i = 0; i < selectors.length; i++) {
+            commands++;  // find_elements
+            var elements = document.querySelectorAll(selectors[i]);
+            for (var j = 0; j < elements.length; j++) {
+                commands++;  // is_displayed
+                if (isDisplayed(elements[j])) {
+                    return {spinner: selectors[i], commands: commands};
+                }
+            }
+        }
+        return {spinner: null, commands: commands};
+    """
+
+    # Registry of REAL error popups / blocking dialogs. Each signature matches visible elements by
+    # CSS selector ('css'), by direct text content ('text'), or both. Order matters: first match wins.
+    POPUP_SIGNATURES = [
+        {"name": "error_occurred_text", "text": "An error has occurred"},
+        {"name": "technical_error_text", "text": "technical error"},
+        {"name": "failed_text", "text": "Failed"},
+        {"name": "error_message_class", "css": "[class*='error-message']"},
+        {"name": "popup_title_error", "css": "div[class*='popup-title']", "text": "Error"},
+        {"name": "popup_title_alert", "css": "div[class*='popup-title']", "text": "Alert"},
+        {"name": "popup_error_box", "css": "div.popup-error, div.modal-error"},
+    ]
+
+    # Evaluates the whole signature registry in the browser. A MutationObserver (installed once per
+    # document) marks the DOM dirty; while nothing changes the cached verdict is returned without
+    # rescanning, so an idle page costs a single trivial round trip.
+    POPUP_PROBE_SCRIPT = """
+        var signatures = arguments[0];
+        var watch = window.__hgwPopupWatch;
+        if (!watch) {
+            watch = window.__hgwPopupWatch = {dirty: true, result: null};
+            new MutationObserver(function () { watch.dirty = true; }).observe(document.documentElement, {
+                childList: true, subtree: true, characterData: true,
+                attributes: true, attributeFilter: ['class', 'style', 'hidden']
+            });
+        }
+        if (!watch.dirty) { return watch.result; }
+        watch.dirty = false;
+
+        function isDisplayed(el) {
+            var style = window.getComputedStyle(el);
+            return el.getClientRects().length > 0 && style.visibility !== 'hidden'
+                && style.display !== 'none' && parseFloat(style.opacity) !== 0;
+        }
+        function ownText(el) {
+            var text = '';
+            for (var n = el.firstChild; n; n = n.nextSibling) {
+                if (n.nodeType === 3) { text += n.nodeValue; }
+            }
+            return text;
+        }
+        var textNodes = null;  // collected once per rescan, shared by all text signatures
+        function elementsWithText(needle) {
+            if (textNodes === null) {
+                textNodes = [];
+                var walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+                while (walker.nextNode()) { textNodes.push(walker.currentNode); }
+            }
+            var found = [];
+            for (var k = 0; k < textNodes.length; k++) {
+                var parent = textNodes[k].parentElement;
+                if (parent && textNodes[k].nodeValue.indexOf(needle) !== -1 && found.indexOf(parent) === -1) {
+                    found.push(parent);
+                }
+            }
+            return found;
+        }
+
+        var commands = 0;
+        watch.result = {name: null, text: null, commands: 0};
+        for (var i = 0; i < signatures.length; i++) {
+            var sig = signatures[i];
+            commands++;  // find_elements
+            var candidates = sig.css ? Array.prototype.slice.call(document.querySelectorAll(sig.css))
+                                     : elementsWithText(sig.text);
+            if (sig.css && sig.text) {
+                candidates = candidates.filter(function (el) { return ownText(el).indexOf(sig.text) !== -1; });
+            }
+            for (var j = 0; j < candidates.length; j++) {
+                commands++;  // is_displayed
+                if (isDisplayed(candidates[j])) {
+                    watch.result = {name: sig.name, text: (candidates[j].innerText || '').trim().slice(0, 120),
+                                    commands: commands};
+                    return watch.result;
+                }
+            }
+        }
+        watch.result.commands = commands;
+        return watch.result;
+    """
+
+    # Element the Vue router renders the current page view into
+    ROUTER_VIEW_SELECTOR = "#app-app-hgw .page__main-content"
+
+    # Changes the hash route inside the loaded app and restarts the DOM quiet window at that moment.
+    # Returns false when there is no app to route in, or the route is already the current one
+    # (a hash change would not fire, so the caller does a full reload instead).
+    HASH_NAVIGATE_SCRIPT = DOM_OBSERVER_JS + """
+        var hash = arguments[0], view = document.querySelector(arguments[1]);
+        if (!view || window.location.hash === hash) { return false; }
+        window.__hgwLastMutation = performance.now();
+        window.location.hash = hash;
+        return true;
+    """
+
+    # Page-coordinate rectangle of an element (CDP clip for region screenshots)
+    ELEMENT_RECT_SCRIPT = """
+        var r = arguments[0].getBoundingClientRect();
+        return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+    """
+
+    # Reads the current value of several fields in one round trip: input/select value, checkbox
+    # state, or the trimmed text of any other element. Missing elements come back as null.
+    READ_FIELDS_SCRIPT = """
+        var fields = arguments[0];
+        var values = {};
+        for (var name in fields) {
+            var by = fields[name][0], selector = fields[name][1];
+            var el = by === 'xpath'
+                ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+                : document.querySelector(selector);
+            if (!el) { values[name] = null; }
+            else if (el.type === 'checkbox' || el.type === 'radio') { values[name] = el.checked; }
+            else if ('value' in el && /^(INPUT|SELECT|TEXTAREA)$/.test(el.tagName)) { values[name] = el.value; }
+            else { values[name] = (el.innerText || el.textContent || '').trim(); }
+        }
+        return values;
+    """
+
+    # Sets several inputs in one round trip: the native value setter (bypasses the framework's own
+    # property wrapper), then input/change events so the Vue v-models update, then a readback.
+    # Returns one {value, ok} per field, or null when the element is not in the DOM (yet).
+    FILL_FORM_SCRIPT = """
+        var fields = arguments[0];
+        var results = [];
+        for (var i = 0; i < fields.length; i++) {
+            var by = fields[i][0], selector = fields[i][1], value = fields[i][2];
+            var el = by === 'xpath'
+                ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+                : by === 'id' ? document.getElementById(selector) : document.querySelector(selector);
+            if (!el) { results.push(null); continue; }
+            var setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+            el.focus();
+            setter.call(el, value);
+            el.dispatchEvent(new Event('input', {bubbles: true}));
+            el.dispatchEvent(new Event('change', {bubbles: true}));
+            el.blur();
+            results.push({value: el.value, ok: el.value === value});
+        }
+        return results;
+    """
+
+    # Picks an option of a dropdown widget in one (async) round trip: opens it, waits for the options
+    # to render, clicks the one matching the visible text (exact, then contained) or data-value, then
+    # checks that the widget shows the requested text. The 1-based index (same numbering as the old
+    # nth-child locators) only picks on its own when neither text nor value is given; otherwise the
+    # option at that position is reported as the substitute and nothing is clicked.
+    # Native <select> elements are set directly.
+    SELECT_OPTION_SCRIPT = """
+        var opener = arguments[0], match = arguments[1], done = arguments[arguments.length - 1];
+        var el = opener[0] === 'xpath'
+            ? document.evaluate(opener[1], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+            : document.querySelector(opener[1]);
+        if (!el) { return done({error: 'dropdown not found'}); }
+        function text(node) { return (node.innerText || node.textContent || '').trim(); }
+        function notFound(count, substitute) {
+            return done({error: 'no matching option', requested: match.text || match.value, count: count,
+                         substitute: substitute, position: substitute === undefined ? undefined : match.index});
+        }
+
+        if (el.tagName === 'SELECT') {
+            var opts = Array.prototype.slice.call(el.options);
+            var pick = opts.filter(function (o) { return o.text.trim() === match.text || o.value === match.value; })[0];
+            var byPosition = match.index ? opts[match.index - 1] : null;
+            if (!pick && byPosition && (match.text || match.value)) { return notFound(opts.length, byPosition.text.trim()); }
+            pick = pick || byPosition;
+            if (!pick) { return notFound(opts.length); }
+            el.value = pick.value;
+            el.dispatchEvent(new Event('change', {bubbles: true}));
+            var chosen = el.options[el.selectedIndex];
+            chosen = chosen ? chosen.text.trim() : '';
+            return done({ok: el.value === pick.value && (!match.text || chosen === match.text),
+                         option: pick.text.trim(), shown: chosen});
+        }
+
+        // The widget's own root: pages such as radio hold several dropdowns in one container, so the
+        // option list and the shown value are only looked up inside the clicked dropdown
+        function widgetRoot(node) {
+            var basic = node.closest('.basic-select');
+            if (basic) { return basic; }
+            for (; node; node = node.parentElement) {
+                if (node.querySelector(':scope > .basic-select__content-container')) { return node; }
+                if (node.querySelectorAll('.select-placeholder').length > 1) { return null; }  // walked past it
+            }
+            return null;
+        }
+
+        el.click();
+        var deadline = Date.now() + 3000;
+        (function pickOption() {
+            var root = widgetRoot(el);
+            var list = root && root.querySelector('.basic-select__content-container');
+            var options = list ? Array.prototype.slice.call(list.querySelectorAll(':scope > div > div')) : [];
+            if (!options.length) {
+                if (Date.now() < deadline) { return setTimeout(pickOption, 50); }
+                return done({error: 'options not rendered'});
+            }
+            var pick = options.filter(function (o) { return match.text && text(o) === match.text; })[0]
+                || options.filter(function (o) { return match.text && text(o).indexOf(match.text) !== -1; })[0]
+                || options.filter(function (o) { return match.value && o.getAttribute('data-value') === match.value; })[0];
+            var byPosition = match.index ? options[match.index - 1] : null;
+            if (!pick && byPosition && (match.text || match.value)) { return notFound(options.length, text(byPosition)); }
+            pick = pick || byPosition;
+            if (!pick) { return notFound(options.length); }
+            var label = text(pick), wanted = match.text || label;
+            (pick.querySelector('span') || pick).click();
+            setTimeout(function () {
+                var shown = root.querySelector('.select-placeholder');
+                shown = shown ? text(shown) : '';
+                done({ok: !!shown && (shown.indexOf(wanted) !== -1 || (!match.text && label.indexOf(shown) !== -1)),
+                      option: label, shown: shown});
+            }, 50);
+        })();
+    """
+
     def __init__(self, driver: WebDriver):
         self.driver = driver
         self.timeout = 10
         self.logger = Logger().get_logger()
-        self.screenshot_dir = "screenshots"
+        self.screenshot_dir = Config.SCREENSHOT_DIR
         # Create screenshots directory if it doesn't exist
         if not os.path.exists(self.screenshot_dir):
             os.makedirs(self.screenshot_dir)
@@ -32,37 +308,21 @@ class BasePage:
                 lambda driver: driver.execute_script("return document.readyState") == "complete"
             )
             
+            # CDP strategy: settled once no request to the gateway was in flight for NETWORK_IDLE_MS.
+            # Spinner polling below remains the fallback (no performance log, or a spinner is still shown).
+            settled = (Config.WAIT_STRATEGY == "network" and self.wait_for_network_idle()
+                       and not self.probe_spinner())
+
             # Custom polling loop for spinners + Active Error Detection
             # We replace strict WebDriverWait with a loop to ensure we catch "Error Popups" 
             # that might be blocking the "Spinner" from disappearing.
-            end_time = time.time() + 60
-            spinners_cleared = False
-            
-            # REMOVED 'popup-background' from this list because it blocks VALID interactive popups
-            # Error popups are handled separately by checks inside the loop.
-            spinner_selectors = [
-                "div.spinner-background",
-                "div.spinner",
-                "[class*='spinner']",
-                "div.loading-overlay",
-                ".f-icon_loading",
-                ".splash",
-                ".loader",
-                ".loading",
-                "div#init-loader"
-            ]
+            end_time = time.time() + (0 if settled else 60)
+            spinners_cleared = bool(settled)
             
             while time.time() < end_time:
-                # 1. Check if any spinner is visible
-                # We use find_elements for speed (non-blocking)
-                found_visible_spinner = False
-                for selector in spinner_selectors:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements and any(e.is_displayed() for e in elements):
-                        found_visible_spinner = True
-                        break # Found one, so we are still loading
-                
-                if not found_visible_spinner:
+                # 1. Check if any spinner is visible (single in-browser probe instead of
+                # one find_elements + is_displayed round trip per selector/element)
+                if not self.probe_spinner():
                     self.logger.info("All detected spinners are gone.")
                     spinners_cleared = True
                     break
@@ -82,18 +342,52 @@ class BasePage:
             if not spinners_cleared:
                 self.logger.warning("Some spinner is still present after 60s wait, attempting to proceed anyway.")
 
+            # Replaces the old fixed 1s buffer: wait until Vue stops re-rendering
+            self.wait_for_dom_quiet()
             self.logger.info("Page fully loaded and ready.")
-            time.sleep(1) # Extra buffer
         except RecoveryHandledException:
             raise # Ensure recovery skip is propagated
         except Exception as e:
             self.logger.warning(f"Page load wait encountered an issue: {e}")
 
-    def find_element(self, locator):
+    def wait_for_network_idle(self, idle_ms=None, timeout=30):
+        """
+        Waits until the gateway's requests have been idle for idle_ms (default Config.NETWORK_IDLE_MS),
+        checking for error popups meanwhile. Returns None when CDP network events are not available.
+        """
+        bus = CdpEventBus.for_driver(self.driver)
+        if not bus.available():
+            return None
+        start = time.time()
+        idle = bus.wait_for_network_idle(self.driver.current_url, idle_ms or Config.NETWORK_IDLE_MS,
+                                         timeout, check=self.check_for_unexpected_popups)
+        Metrics().increment("network_idle_waits")
+        self.logger.info(f"[CDP] Network idle after {time.time() - start:.2f}s.")
+        return idle
+
+    def expect_commit(self):
+        """
+        Starts collecting the backend write calls of the next Apply/Save (Config.COMMIT_DETECTION).
+        Returns a CommitWatcher to wait() on after the click, or None when detection is off/unavailable.
+        """
+        if not Config.COMMIT_DETECTION:
+            return None
+        bus = CdpEventBus.for_driver(self.driver)
+        if not bus.available():
+            return None
+        return CommitWatcher(bus).start()
+
+    def probe_spinner(self):
+        """Returns the selector of the first visible spinner, or None. One WebDriver command."""
+        result = self.driver.execute_script(self.SPINNER_PROBE_SCRIPT, self.SPINNER_SELECTORS)
+        Metrics().increment("webdriver_commands_saved", result["commands"] - 1)
+        return result["spinner"]
+
+    def find_element(self, locator, timeout=None):
         """Finds a visible and clickable element with logging and proactive auto-recovery."""
         try:
             # We use a custom wait that also checks for popups
-            return WebDriverWait(self.driver, self.timeout).until(
+            return WebDriverWait(self.driver, timeout or self.timeout).until(
                 lambda d: EC.element_to_be_clickable(locator)(d) or self.check_for_unexpected_popups()
             )
         except RecoveryHandledException:
@@ -141,25 +435,256 @@ class BasePage:
             self.take_screenshot("enter_text_failed")
             raise
     
+    def fill_form(self, fields: dict) -> bool:
+        """
+        Sets {locator: value} input fields in a single WebDriver command and reads every field back.
+        Fields not rendered yet fall back to enter_text (waits for them). Returns True when all match.
+        """
+        self.logger.info(f"Filling {len(fields)} field(s) in one pass...")
+        self.check_for_unexpected_popups()
+        items = list(fields.items())
+        results = self.driver.execute_script(
+            self.FILL_FORM_SCRIPT, [[by, selector, str(value)] for (by, selector), value in items]
+        )
+        Metrics().increment("webdriver_commands_saved", max(len(items) * 3 - 1, 0))
+
+        ok = True
+        for (locator, value), result in zip(items, results):
+            if result is None:
+                self.logger.warning(f"Field {locator} not rendered yet. Typing it instead...")
+                self.enter_text(locator, value)
+                result = {"value": self.find_element(locator).get_attribute("value"), "ok": None}
+                result["ok"] = result["value"] == str(value)
+            if not result["ok"]:
+                self.logger.error(f"Field {locator} reads back '{result['value']}', expected '{value}'")
+                ok = False
+        if not ok:
+            self.take_screenshot("fill_form_failed")
+        return ok
+    
+    def select_option(self, dropdown, text=None, value=None, index=None):
+        """
+        Selects a dropdown option by visible text or value in a single WebDriver command and verifies
+        that the widget shows the requested text. index (1-based) selects on its own only when no text
+        or value is given; alongside them it merely names the option found at that position when the
+        requested one is missing. Returns True on success.
+        """
+        self.logger.info(f"Selecting option text={text!r} value={value!r} index={index} in {dropdown}")
+        self.check_for_unexpected_popups()
+        result = self.driver.execute_async_script(
+            self.SELECT_OPTION_SCRIPT, list(dropdown), {"text": text, "value": value, "index": index}
+        )
+        if not result.get("ok"):
+            self.logger.error(f"Option selection failed in {dropdown}: {result}")
+            self.take_screenshot("select_option_failed")
+            return False
+        # Replaces: click dropdown + page-load wait + click option + page-load wait
+        Metrics().increment("webdriver_commands_saved", 5)
+        self.logger.info(f"Selected '{result['option']}' (shown: '{result['shown']}')")
+        self.wait_for_dom_quiet()
+        return True
+    
     def open_url(self, url: str):
         """Navigates to a specific URL."""
         self.logger.info(f"Navigating to {url}")
         self.driver.get(url)
         self.wait_for_page_load()
 
-    def take_screenshot(self, name: str):
-        """Take a screenshot and save it with timestamp."""
+    def navigate_to_path(self, url_path: str, expected_fragment: str, base_url=None):
+        """
+        Navigates to Config.BASE_URL/url_path and waits until the router settles on it.
+        When the app is already loaded (Config.NAVIGATION_MODE 'hash'), only window.location.hash
+        changes and the router mounts the new view without a re-bootstrap. A full load is used
+        otherwise, or when a route guard redirected the hash change.
+        If the app redirects elsewhere (e.g. dashboard), the full navigation is retried once.
+        """
+        target_base = base_url if base_url else Config.BASE_URL
+        url = f"{target_base}/{url_path}"
+        self.take_resource_stats()
+
+        if Config.NAVIGATION_MODE == "hash" and self.navigate_hash(target_base, url_path, expected_fragment):
+            self.log_resource_stats(url_path)
+            return
+
+        self.logger.info(f"Navigating to {url}")
+        Metrics().increment("full_navigations")
+        self.driver.get(url)
+        if not self.wait_for_url_contains(expected_fragment, timeout=5):
+            self.logger.warning("Redirected? Attempting direct navigation again...")
+            self.driver.get(url)
+            self.wait_for_url_contains(expected_fragment, timeout=5)
+
+        self.wait_for_page_load()
+        self.log_resource_stats(url_path)
+
+    def take_resource_stats(self):
+        """Traffic since the last call ({'requests', 'bytes', 'cached', 'blocked'}), None when RESOURCE_STATS is off."""
+        if not Config.RESOURCE_STATS:
+            return None
+        bus = CdpEventBus.for_driver(self.driver)
+        if not bus.available():
+            return None
+        bus.poll()
+        return bus.take_stats()
+
+    def log_resource_stats(self, url_path: str):
+        """Logs (and adds to the run metrics) the requests and bytes one page navigation cost."""
+        stats = self.take_resource_stats()
+        if stats is None:
+            return
+        self.logger.info(f"[NET] {url_path}: {stats['requests']} request(s), {stats['bytes'] / 1024:.1f} KB, "
+                         f"{stats['cached']} from cache, {stats['blocked']} blocked "
+                         f"(policy '{Config.RESOURCE_POLICY}')")
+        for name, value in stats.items():
+            Metrics().increment(f"page_{name}", value)
+
+    def navigate_hash(self, target_base: str, url_path: str, expected_fragment: str, timeout=3, quiet_ms=150):
+        """
+        In-app navigation: sets location.hash and waits until the DOM has been quiet for quiet_ms
+        since the change (a new view mounting, or the same component re-rendered with other params).
+        Returns False (caller falls back to a full load) when the app is not loaded at target_base,
+        the route is already the current one, or the route guard redirected elsewhere.
+        """
+        if not url_path.startswith("#") or not self.driver.current_url.startswith(target_base):
+            return False
+        try:
+            if not self.driver.execute_script(self.HASH_NAVIGATE_SCRIPT, url_path, self.ROUTER_VIEW_SELECTOR):
+                return False
+        except Exception as e:
+            self.logger.debug(f"Hash navigation unavailable ({e}). Using full load.")
+            return False
+
+        self.logger.info(f"Navigating in-app to {url_path}")
+        # #radio/1 -> #radio/2 reuses the component and patches it in place, so no element marks the
+        # new route: the render shows up as mutations, and the quiet window ends after the last one
+        self.wait_for_dom_quiet(quiet_ms=quiet_ms, timeout=timeout)
+        if expected_fragment.lower() not in self.driver.current_url.lower():
+            self.logger.warning(f"Route guard redirected to {self.driver.current_url}. Falling back to full load.")
+            return False
+
+        Metrics().increment("hash_navigations")
+        self.wait_for_page_load()
+        return True
+
+    # ------------------------------------------------------------------
+    # Condition-based synchronization (replaces fixed time.sleep calls)
+    # ------------------------------------------------------------------
+
+    def wait_until(self, condition, timeout=10, poll=0.2, message=""):
+        """
+        Polls condition(driver) until it returns a truthy value, checking for error popups meanwhile.
+        Returns the condition's value, or False on timeout.
+        """
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=poll).until(
+                lambda d: condition(d) or self.check_for_unexpected_popups()
+            )
+        except RecoveryHandledException:
+            raise
+        except TimeoutException:
+            if message:
+                self.logger.warning(f"Timed out after {timeout}s waiting for: {message}")
+            return False
+
+    def wait_for_url_contains(self, fragment: str, timeout=10):
+        """Waits until the current URL (including the #hash route) contains fragment."""
+        fragment = fragment.lower()
+        return self.wait_until(
+            lambda d: fragment in d.current_url.lower(), timeout, message=f"URL containing '{fragment}'"
+        )
+
+    def wait_for_url_change(self, old_url: str, timeout=10):
+        """Waits until the URL (or its #hash route) differs from old_url. Returns the new URL or False."""
+        return self.wait_until(
+            lambda d: d.current_url if d.current_url != old_url else False,
+            timeout, message=f"URL change from {old_url}"
+        )
+
+    def wait_for_element_state(self, locator, state="clickable", timeout=10):
+        """
+        Waits for an element to reach a state: 'present', 'visible', 'clickable' or 'invisible'.
+        Returns the element (True for 'invisible'), or False on timeout.
+        """
+        conditions = {
+            "present": EC.presence_of_element_located,
+            "visible": EC.visibility_of_element_located,
+            "clickable": EC.element_to_be_clickable,
+            "invisible": EC.invisibility_of_element_located,
+        }
+        return self.wait_until(conditions[state](locator), timeout, message=f"{locator} to be {state}")
+
+    def wait_for_text(self, locator, text: str, timeout=10):
+        """Waits until the element's visible text contains text."""
+        return self.wait_until(
+            EC.text_to_be_present_in_element(locator, text), timeout, message=f"'{text}' in {locator}"
+        )
+
+    def wait_for_dom_quiet(self, quiet_ms=300, timeout=10):
+        """
+        Waits until no DOM mutation has happened for quiet_ms (MutationObserver injected once per page).
+        Returns True when quiet, False on timeout (the caller proceeds anyway).
+        """
+        end_time = time.time() + timeout
+        while time.time() < end_time:
+            try:
+                idle_ms = self.driver.execute_script(self.DOM_QUIET_SCRIPT)
+            except Exception as e:
+                self.logger.debug(f"DOM quiet probe failed (page unloading?): {e}")
+                idle_ms = 0
+            if idle_ms is not None and idle_ms >= quiet_ms:
+                return True
+            # Sleep only for the remaining quiet window instead of a fixed interval
+            remaining = (quiet_ms - (idle_ms or 0)) / 1000.0
+            time.sleep(min(max(remaining, 0.05), max(end_time - time.time(), 0)))
+        self.logger.warning(f"DOM still changing after {timeout}s, proceeding anyway.")
+        return False
+
+    def take_screenshot(self, name: str, element=None):
+        """
+        Take a screenshot and save it with timestamp. Only the capture blocks: decoding and writing
+        happen on the EvidenceWriter thread (call EvidenceWriter().flush() before reading the files).
+        Skipped (returns None) when Config.EVIDENCE_LEVEL does not keep this kind of shot.
+        element: locator or WebElement to clip the capture to (default with Config.EVIDENCE_CLIP:
+        the router view for non-failure shots).
+        """
+        if not should_capture(name):
+            Metrics().increment("evidence_skipped")
+            return None
         try:
+            fmt = Config.EVIDENCE_FORMAT
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{name}_{timestamp}.png"
+            filename = f"{name}_{timestamp}.{'jpg' if fmt == 'jpeg' else fmt}"
             filepath = os.path.join(self.screenshot_dir, filename)
-            self.driver.save_screenshot(filepath)
+            if element is None and Config.EVIDENCE_CLIP and evidence_kind(name) != "failure":
+                element = (By.CSS_SELECTOR, self.ROUTER_VIEW_SELECTOR)
+            EvidenceWriter().submit(self.capture_image(fmt, element), filepath, name)
             self.logger.info(f"Screenshot saved: {filepath}")
             return filepath
         except Exception as e:
             self.logger.error(f"Failed to take screenshot: {e}")
             return None
 
+    def capture_image(self, fmt="png", element=None):
+        """
+        Returns a base64 screenshot. Full-window PNG goes through WebDriver; other formats and element
+        clips through CDP Page.captureScreenshot (encoded by Chrome, lossy formats at EVIDENCE_QUALITY).
+        """
+        if fmt == "png" and element is None:
+            return self.driver.get_screenshot_as_base64()
+        params = {"format": fmt}
+        if fmt != "png":
+            params["quality"] = Config.EVIDENCE_QUALITY
+        if element is not None:
+            try:
+                target = self.driver.find_element(*element) if isinstance(element, tuple) else element
+                rect = self.driver.execute_script(self.ELEMENT_RECT_SCRIPT, target)
+                if rect["width"] and rect["height"]:
+                    params["clip"] = {**rect, "scale": 1}
+                    params["captureBeyondViewport"] = True
+            except Exception as e:
+                self.logger.debug(f"Clip element {element} unavailable ({e}). Capturing the full window.")
+        return self.driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"]
+
     def validate_all_interactive_elements(self):
         """
         Generic method to validate presence of inputs and buttons.
@@ -198,40 +723,53 @@ class BasePage:
             self.logger.warning(f"Element {locator} still visible after {timeout}s")
             return False
 
+    def read_fields(self, fields: dict) -> dict:
+        """
+        Reads {name: locator} fields in a single WebDriver command (CSS or XPath locators).
+        Used to diff the page against the desired state before touching it.
+        """
+        values = self.driver.execute_script(self.READ_FIELDS_SCRIPT, {name: list(loc) for name, loc in fields.items()})
+        Metrics().increment("webdriver_commands_saved", max(len(fields) * 2 - 1, 0))
+        return values
+
+    def probe_popup(self):
+        """
+        Evaluates POPUP_SIGNATURES in the browser in one WebDriver command.
+        Returns {'name': signature, 'text': element text} for the first visible match, or None.
+        """
+        result = self.driver.execute_script(self.POPUP_PROBE_SCRIPT, self.POPUP_SIGNATURES)
+        if not result:
+            return None
+        Metrics().increment("webdriver_commands_saved", result["commands"] - 1)
+        return result if result["name"] else None
+
     def check_for_unexpected_popups(self):
         """
         Checks if an unexpected popup or error is present.
-        If found, takes a screenshot, refreshes the page, and returns True.
+        If found, takes a screenshot, refreshes the page, and raises RecoveryHandledException.
         """
         try:
-            # Specific patterns for REAL error popups or blocking dialogs
-            recovery_locators = [
-                (By.XPATH, "//*[contains(text(), 'An error has occurred')]"),
-                (By.XPATH, "//*[contains(text(), 'technical error')]"),
-                (By.XPATH, "//*[contains(text(), 'Failed')]"),
-                (By.XPATH, "//*[contains(@class, 'error-message')]"),
-                (By.XPATH, "//div[contains(@class, 'popup-title') and contains(text(), 'Error')]"),
-                (By.XPATH, "//div[contains(@class, 'popup-title') and contains(text(), 'Alert')]"),
-                (By.CSS_SELECTOR, "div.popup-error, div.modal-error")
-            ]
-            
-            for locator in recovery_locators:
-                elements = self.driver.find_elements(*locator)
-                if len(elements) > 0 and any(e.is_displayed() for e in elements):
-                    self.logger.warning(f"Unexpected popup/error detected via: {locator}")
-                    self.take_screenshot("unexpected_popup_detected")
-                    curr_url = self.driver.current_url
-                    self.logger.info("Popup detected. Refreshing immediately...")
-                    # User requested: Wait 3 sec before refresh
-                    time.sleep(3) 
-                    self.logger.info(f"Navigating to current URL to clear popup: {curr_url}")
-                    self.driver.get(curr_url)
-                    
-                    # User requested: "wait until page ready" (Full wait logic)
-                    self.wait_for_page_load()
-                    
-                    self.logger.info("Page ready after recovery navigation. Skipping current step.")
-                    raise RecoveryHandledException("Error popup handled via navigation.")
+            # Specific patterns for REAL error popups or blocking dialogs (see POPUP_SIGNATURES)
+            match = self.probe_popup()
+            if match:
+                self.logger.warning(f"Unexpected popup/error detected via signature '{match['name']}': {match['text']}")
+                Metrics().increment(f"popup_{match['name']}")
+                self.take_screenshot(f"unexpected_popup_{match['name']}")
+                flight_recorder = VideoRecorder.attached(self.driver)
+                if flight_recorder:
+                    flight_recorder.save(f"unexpected_popup_{match['name']}")
+                curr_url = self.driver.current_url
+                self.logger.info("Popup detected. Refreshing immediately...")
+                # User requested: Wait 3 sec before refresh
+                time.sleep(3) 
+                self.logger.info(f"Navigating to current URL to clear popup: {curr_url}")
+                self.driver.get(curr_url)
+                
+                # User requested: "wait until page ready" (Full wait logic)
+                self.wait_for_page_load()
+                
+                self.logger.info("Page ready after recovery navigation. Skipping current step.")
+                raise RecoveryHandledException(f"Error popup '{match['name']}' handled via navigation.")
         except RecoveryHandledException:
             raise # Bubble up
         except Exception as e:
@@ -2,7 +2,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from pages.base_page import BasePage
-import time
 
 class DashboardPage(BasePage):
     """Page Object for the Dashboard Page."""
@@ -63,7 +62,7 @@ class DashboardPage(BasePage):
                 
                 # 7. Wait for the mode to change
                 self.logger.info("Waiting for mode switch to complete...")
-                time.sleep(2)
+                self.wait_for_text(self.MODE_MENU_VALUE, "Advanced")
                 
                 # 8. Verify the switch was successful
                 mode_element = self.find_element(self.MODE_MENU_VALUE)
@@ -1,7 +1,5 @@
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
-from utils.config import Config
-import time
 
 class DyndnsPage(BasePage):
     """Page Object for the DynDNS Configuration Page."""
@@ -10,38 +8,64 @@ class DyndnsPage(BasePage):
 
     # Locators
     SERVICE_DROPDOWN = (By.CSS_SELECTOR, "div.dyndns-service span.f-icon_select-down")
-    SERVICE_OPTION_CHANGEIP = (By.CSS_SELECTOR, ".basic-select__content-container div:nth-child(65)")
+    # Option matched by its text (nth-child index only named in the error when the text is missing)
+    SERVICE_CHANGEIP_TEXT = "changeip.com"
+    SERVICE_CHANGEIP_INDEX = 65
     HOSTNAME_INPUT = (By.CSS_SELECTOR, "input[placeholder='Hostname']")
     USERNAME_INPUT = (By.CSS_SELECTOR, "input[placeholder='Username']")
     PASSWORD_INPUT = (By.CSS_SELECTOR, "input[placeholder='Password']")
     ADD_BUTTON = (By.CSS_SELECTOR, "div.f-icon_add")
+    # Existing clients: the list row showing a hostname, its edit icon and the check icon confirming an edit
+    CLIENT_ROW_XPATH = "//div[contains(@class, 'group-row')][.//*[not(self::input)][normalize-space(text())={hostname}]]"
+    ROW_EDIT_ICON = (By.XPATH, ".//div[contains(@class, 'f-icon_edit')]")
+    ROW_SAVE_ICON = (By.XPATH, ".//div[contains(@class, 'f-icon_check')]")
 
     def navigate(self):
         """Navigates to the DynDNS page."""
-        url = f"{Config.BASE_URL}/{self.URL_PATH}"
-        self.logger.info(f"Navigating to DynDNS page: {url}")
-        
-        self.driver.get(url)
-        time.sleep(3)
-        
-        if "wan" not in self.driver.current_url.lower():
-             self.logger.warning("Redirected? Attempting direct navigation again...")
-             self.driver.get(url)
-             time.sleep(3)
-             
+        self.navigate_to_path(self.URL_PATH, "wan")
+
+    def client_rows(self, hostname):
+        """List rows of the DynDNS clients registered for hostname."""
+        quoted = f"'{hostname}'" if "'" not in hostname else f'"{hostname}"'
+        return self.driver.find_elements(By.XPATH, self.CLIENT_ROW_XPATH.format(hostname=quoted))
+
+    def configure_dyndns_client(self, hostname, username, password):
+        """
+        Makes sure one DynDNS client exists for hostname with the given credentials: the existing
+        client is edited when the list already shows the hostname (a rerun must not add a duplicate),
+        otherwise a new one is added.
+        """
+        try:
+            rows = self.client_rows(hostname)
+            if rows:
+                if len(rows) > 1:
+                    self.logger.warning(f"{len(rows)} DynDNS clients registered for {hostname}. Updating the first.")
+                return self.update_dyndns_client(rows[0], hostname, username, password)
+            return self.add_dyndns_client(hostname, username, password)
+        except Exception as e:
+            self.logger.error(f"Failed to configure DynDNS client: {e}")
+            self.take_screenshot("dyndns_config_failed")
+            return False
+
+    def update_dyndns_client(self, row, hostname, username, password):
+        """Edits the credentials of the existing client shown in row."""
+        self.logger.info(f"Updating existing DynDNS client: {hostname}")
+        row.find_element(*self.ROW_EDIT_ICON).click()
+        self.wait_for_dom_quiet()
+        if not self.fill_form({self.USERNAME_INPUT: username, self.PASSWORD_INPUT: password}):
+            return False
+        row.find_element(*self.ROW_SAVE_ICON).click()
         self.wait_for_page_load()
+        return True
 
     def add_dyndns_client(self, hostname, username, password):
         """Adds a DynDNS client with the provided credentials."""
         self.logger.info(f"Adding DynDNS client: {hostname}")
         try:
-            # 1. Open service dropdown
-            self.click(self.SERVICE_DROPDOWN)
-            time.sleep(1)
-
-            # 2. Select changeip.com (option 65)
-            self.click(self.SERVICE_OPTION_CHANGEIP)
-            time.sleep(1)
+            # 1-2. Open service dropdown and select changeip.com (one scripted operation, verified)
+            if not self.select_option(self.SERVICE_DROPDOWN, text=self.SERVICE_CHANGEIP_TEXT,
+                                      index=self.SERVICE_CHANGEIP_INDEX):
+                return False
 
             # 3. Fill Hostname
             self.enter_text(self.HOSTNAME_INPUT, hostname)
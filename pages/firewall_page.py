@@ -1,7 +1,5 @@
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
-from utils.config import Config
-import time
 
 class FirewallPage(BasePage):
     """Page Object for the Firewall (Network Security) Configuration Page."""
@@ -11,29 +9,25 @@ class FirewallPage(BasePage):
     # Locators
     CUSTOM_RADIO = (By.CSS_SELECTOR, "#app-app-hgw > div > div.page__container > div.main-content.page__main-content > div.network-security-page > div > div > div > div > div > div.page-section__content > div > div.group-item.firewall-levels > div.group-row.group-row_info > div > div:nth-child(4) > div.focus-item.label-radio-checkbox__icon.f-icon.f-icon_radio-checkbox-off")
     APPLY_BUTTON = (By.CSS_SELECTOR, "#app-app-hgw > div > div.page__container > div.main-content.page__main-content > div.network-security-page > div > div > div > div > div > div.page-section__content > div > div.group-item.firewall-levels > div.group-row.firewall-levels__button.group-row_buttons > div > div:nth-child(2)")
+    # Data-model firewall level (Device.Firewall.Config) -> level radio (the UI calls 'Advanced' Custom)
+    LEVEL_RADIOS = {
+        "Advanced": CUSTOM_RADIO,
+    }
 
     def navigate(self):
         """Navigates to the Firewall page."""
-        url = f"{Config.BASE_URL}/{self.URL_PATH}"
-        self.logger.info(f"Navigating to Firewall page: {url}")
-        
-        self.driver.get(url)
-        time.sleep(3)
-        
-        if "networksecurity" not in self.driver.current_url.lower():
-             self.logger.warning("Redirected? Attempting direct navigation again...")
-             self.driver.get(url)
-             time.sleep(3)
-             
-        self.wait_for_page_load()
+        self.navigate_to_path(self.URL_PATH, "networksecurity")
 
-    def select_custom_mode(self):
-        """Selects Custom firewall mode and clicks Apply."""
-        self.logger.info("Selecting Custom firewall mode")
+    def select_level(self, level):
+        """Selects the radio of a data-model firewall level (e.g. 'Advanced') and clicks Apply."""
+        if level not in self.LEVEL_RADIOS:
+            self.logger.error(f"No firewall level radio known for '{level}'. Add it to FirewallPage.LEVEL_RADIOS.")
+            return False
+        self.logger.info(f"Selecting firewall level {level}")
         try:
-            # 1. Click Custom radio button
-            self.click(self.CUSTOM_RADIO)
-            time.sleep(1)
+            # 1. Click the level's radio button
+            self.click(self.LEVEL_RADIOS[level])
+            self.wait_for_dom_quiet()
 
             # 2. Click Apply
             self.click(self.APPLY_BUTTON)
@@ -1,12 +1,12 @@
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
-import time
 
 class LanPage(BasePage):
     """Page Object for the LAN Settings Page."""
     
+    URL_PATH = "#lan/"
+
     # Locators
-    URL = "http://192.168.1.1/#lan/"
     
     # Using the specific selectors provided by the user
     IP_INPUT_1 = (By.CSS_SELECTOR, "#app-app-hgw > div > div.page__container > div.main-content.page__main-content > div.page-view-container.page-lan.page-view-container_large-page > div > div > div > div > div.page-section__content > div > div:nth-child(2) > div > div:nth-child(1) > div > div.label-field__content > div > input")
@@ -18,26 +18,17 @@ class LanPage(BasePage):
 
     def navigate(self):
         """Navigates to the LAN page."""
-        self.logger.info(f"Navigating to LAN page: {self.URL}")
-        self.driver.get(self.URL)
-        self.wait_for_page_load()
-        time.sleep(3) # Ensure dynamic elements are truly ready
+        self.navigate_to_path(self.URL_PATH, "lan")
+        # Ensure dynamic elements are truly ready
+        self.wait_for_element_state(self.IP_INPUT_1, "visible")
 
     def configure_ips(self, ip1, ip2, ip3):
-        """Clears and sets the three IP input fields."""
+        """Sets the three IP input fields in one pass. Returns False if any of them did not take the value."""
         self.logger.info(f"Configuring IPs: {ip1}, {ip2}, {ip3}")
-        
-        # IP 1
-        self.enter_text(self.IP_INPUT_1, ip1)
-        
-        # IP 2
-        self.enter_text(self.IP_INPUT_2, ip2)
-        
-        # IP 3
-        self.enter_text(self.IP_INPUT_3, ip3)
+        return self.fill_form({self.IP_INPUT_1: ip1, self.IP_INPUT_2: ip2, self.IP_INPUT_3: ip3})
 
     def apply_changes(self):
-        """Clicks Apply and confirms with Ok button, then waits 10s."""
+        """Clicks Apply and confirms with Ok button, then waits for the page to settle."""
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
 
@@ -60,8 +51,8 @@ class LanPage(BasePage):
             
             # 3. Wait until the page reloads or settles
             self.logger.info("Waiting for page to reload after apply...")
-            # Small buffer to allow browser to register the click/unload start
-            time.sleep(1) 
+            # The popup closing marks the start of the apply/unload
+            self.wait_for_element_state(self.OK_BUTTON, "invisible")
             self.wait_for_page_load()
             
             return True
@@ -2,9 +2,12 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import TimeoutException
 from pages.base_page import BasePage
 from utils.config import Config
+from utils.metrics import Metrics
+from utils.reachability import wait_until_reachable
+from utils.session_cache import SessionCache
 
 class LoginPage(BasePage):
     """Page Object for the Login Page."""
@@ -13,10 +16,19 @@ class LoginPage(BasePage):
     USERNAME_INPUT = (By.CSS_SELECTOR, "input.basic-input[placeholder='Username']")
     PASSWORD_INPUT = (By.CSS_SELECTOR, "input[type='password']") 
     LOGIN_BUTTON = (By.CSS_SELECTOR, "div.login__button")
+    # Header mode menu: only rendered for an authenticated session
+    AUTHENTICATED_MARKER = (By.CSS_SELECTOR, "div.mode-ui-menu__value")
 
-    def login(self, url=None):
-        """Performs the login action at the specified URL or the default BASE_URL."""
+    def login(self, url=None, session_from=None):
+        """
+        Performs the login action at the specified URL or the default BASE_URL.
+        A cached session (of url, else of session_from, e.g. the address before the LAN change)
+        is tried first; the form is only used when there is none or the gateway rejects it.
+        """
         target_url = url if url else Config.BASE_URL
+        if Config.SESSION_CACHE and self.restore_session(target_url, session_from):
+            return
+
         self.open_url(target_url)
         self.logger.info(f"Attempting login at {target_url}...")
         
@@ -24,7 +36,7 @@ class LoginPage(BasePage):
             wait = WebDriverWait(self.driver, 20)
 
             # Wait for Vue.js to finish mounting before interacting
-            time.sleep(2)
+            self.wait_for_dom_quiet()
 
             # 1. Wait until username input is clickable (overlay dismissed)
             username_element = wait.until(
@@ -57,10 +69,72 @@ class LoginPage(BasePage):
             self.driver.execute_script("arguments[0].click();", login_btn)
             self.logger.info("Login submitted.")
             
-            # 5. Wait until next page is fully loaded
+            # 5. Wait until the login form is gone and the next page is fully loaded
             self.logger.info("Waiting for next page to load...")
-            time.sleep(10) 
+            if not self.wait_for_element_state(self.LOGIN_BUTTON, "invisible", timeout=20):
+                raise TimeoutException("Login form still displayed 20s after submit.")
+            self.wait_for_page_load()
             
         except Exception as e:
             self.logger.error(f"Login failed: {e}")
-            raise
\ No newline at end of file
+            raise
+
+        if Config.SESSION_CACHE:
+            try:
+                SessionCache().capture(self.driver, target_url)
+            except Exception as e:
+                self.logger.warning(f"Could not cache the session: {e}")
+
+    def restore_session(self, url, session_from=None):
+        """
+        Loads url with a cached session injected and checks that the app shows an authenticated view.
+        Returns False (rejected snapshots are dropped) so the caller falls back to the login form.
+        """
+        cache = SessionCache()
+        for source in dict.fromkeys(filter(None, (url, session_from))):
+            try:
+                if not cache.inject(self.driver, url, source):
+                    continue
+                self.open_url(url)
+            except Exception as e:
+                self.logger.warning(f"Cached session could not be injected: {e}")
+                self.discard_session()
+                continue
+            finally:
+                # Always unregister: a leftover seed would restore the stale token on every later load
+                cache.remove_seed(self.driver)
+
+            # Validation: the app's own auth check renders either the header or the login form
+            state = self.wait_until(
+                lambda d: ("ok" if d.find_elements(*self.AUTHENTICATED_MARKER) else None)
+                or ("rejected" if d.find_elements(*self.USERNAME_INPUT) else None),
+                timeout=15, message="authenticated view or login form",
+            )
+            if state == "ok":
+                self.logger.info(f"Logged in at {url} with the cached session of {source}. Login form skipped.")
+                Metrics().increment("session_reused")
+                return True
+            cache.invalidate(source)
+            self.discard_session()
+        return False
+
+    def discard_session(self):
+        """Drops the injected session (cookies and the seeded Web Storage) before the form login."""
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception as e:
+            self.logger.debug(f"Injected session not fully cleared (no page loaded?): {e}")
+
+    def wait_for_login_form(self, url, timeout=None):
+        """
+        Waits until the login page answers at url (e.g. after a LAN IP change).
+        The address is probed outside the browser (TCP/HTTP in parallel, jittered backoff), so Chrome
+        is not left reloading its error page; login() then loads the page once and waits for the form.
+        """
+        timeout = timeout or Config.REACHABILITY_TIMEOUT
+        if wait_until_reachable(url, timeout=timeout):
+            self.logger.info(f"Login page reachable at {url}.")
+            return True
+        self.logger.warning(f"Login page not reachable at {url} after {timeout}s.")
+        return False
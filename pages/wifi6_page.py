@@ -1,11 +1,12 @@
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage, RecoveryHandledException
-from utils.config import Config
-import time
 
 class Wifi6Page(BasePage):
     """Page Object for the WiFi 6GHz Details Page."""
 
+    # Set when the form holds edits that still need a Save
+    pending_changes = False
+
     # URL
     URL_PATH = "#wifi/details/private:6"
 
@@ -13,7 +14,12 @@ class Wifi6Page(BasePage):
     SSID_INPUT = (By.CSS_SELECTOR, "input.basic-input[type='text']")
     PASSWORD_INPUT = (By.CSS_SELECTOR, "input.basic-input[type='password']")
     SECURITY_DROPDOWN_ICON = (By.XPATH, "//div[contains(@class, 'select-placeholder')]//span[contains(@class, 'f-icon_select')]")
-    WPA3_PERSONAL_OPTION = (By.CSS_SELECTOR, "#app-app-hgw > div > div.page__container > div.main-content.page__main-content > div.wifi-page > div > div > div.page-view__content > div:nth-child(1) > div > div > div > div > div:nth-child(4) > div > div.label-field__content > div > div > div > div.basic-select__content-container > div > div:nth-child(2) > span")
+    SECURITY_VALUE = (By.XPATH, "//div[contains(@class, 'select-placeholder')]")
+    # Data-model security mode (Security.ModeEnabled) -> option text and nth-child index (None: text only).
+    # Other modes are looked up as e.g. "WPA2 Personal" for WPA2-Personal; select_option verifies the pick.
+    SECURITY_MODE_OPTIONS = {
+        "WPA3-Personal": ("WPA3 Personal", 2),
+    }
     
     DEVICE_INPUT = (By.CSS_SELECTOR, "#app-app-hgw > div > div.page__container > div.main-content.page__main-content > div.wifi-page > div > div > div.page-view__content > div:nth-child(2) > div > div > div:nth-child(2) > div.wifi-mac-filtering-form > div > div.field-placeholder.wifi-mac-filtering-form__devices > div.label-select-input > div > div > div > div.label-select__select > div > div.focus-item.basic-select__selection > div.label-field.label-input.label-select-input__input.label-field_no-label.label-field_no-status > div > div > input")
     DEVICE_LIST_ITEM = (By.CSS_SELECTOR, "div.select-option, div.basic-select__item, div.basic-select__content-container div span")
@@ -30,61 +36,64 @@ class Wifi6Page(BasePage):
 
     def navigate(self):
         """Navigates to the WiFi 6GHz details page."""
-        url = f"{Config.BASE_URL}/{self.URL_PATH}"
-        self.logger.info(f"Navigating to WiFi 6GHz details page: {url}")
-        
-        # Robust navigation with retry if redirected to dashboard
-        self.driver.get(url)
-        time.sleep(3)
-        
-        if "details" not in self.driver.current_url.lower():
-             self.logger.warning("Redirected? Attempting direct navigation again...")
-             self.driver.get(url)
-             time.sleep(3)
-             
-        self.wait_for_page_load()
+        self.navigate_to_path(self.URL_PATH, "details")
+
+    def read_current_settings(self):
+        """Reads SSID, password and security mode shown on the page in one DOM read."""
+        return self.read_fields({
+            "ssid": self.SSID_INPUT,
+            "password": self.PASSWORD_INPUT,
+            "security": self.SECURITY_VALUE,
+        })
 
     def update_ssid_and_password(self, ssid, password):
         """Changes the SSID and Password with clearing."""
         self.logger.info(f"Changing SSID to {ssid} and Password to {password} for WiFi 6GHz")
         try:
-            # SSID
-            ssid_elem = self.find_element(self.SSID_INPUT)
-            ssid_elem.clear()
-            ssid_elem.send_keys(ssid)
-            
-            # Password
-            pass_elem = self.find_element(self.PASSWORD_INPUT)
-            pass_elem.clear()
-            pass_elem.send_keys(password)
-            return True
+            current = self.read_current_settings()
+            if current["ssid"] == ssid and current["password"] == password:
+                self.logger.info("SSID and Password already up to date for WiFi 6GHz. Skipping.")
+                return True
+            self.pending_changes = True
+
+            # SSID + Password in one pass (verified by readback)
+            return self.fill_form({self.SSID_INPUT: ssid, self.PASSWORD_INPUT: password})
         except RecoveryHandledException:
             self.logger.warning("Recovery happened during WiFi 6GHz SSID/Password update.")
             return False
 
-    def select_security_wpa3(self):
-        """Selects WPA3 Personal security mode and clicks Save."""
-        self.logger.info("Selecting WPA3 Personal security mode for WiFi 6GHz")
+    def select_security(self, mode):
+        """Selects the security mode of the desired state (e.g. 'WPA3-Personal') and clicks Save."""
+        text, index = self.SECURITY_MODE_OPTIONS.get(mode, (mode.replace("-Personal", " Personal"), None))
+        self.logger.info(f"Selecting {text} security mode for WiFi 6GHz")
         try:
-            # 1. Open menu
-            self.click(self.SECURITY_DROPDOWN_ICON)
-            time.sleep(1) # Wait for menu
-            
-            # 2. Click WPA3 Personal option
-            self.click(self.WPA3_PERSONAL_OPTION)
-            time.sleep(1) 
+            security = (self.read_fields({"security": self.SECURITY_VALUE})["security"] or "").strip()
+            # Exact match: mixed modes such as "WPA2-WPA3 Personal" still need the selection
+            mode_selected = security == text
+            if mode_selected and not self.pending_changes:
+                self.logger.info(f"{text} already selected for WiFi 6GHz and nothing to save. Skipping.")
+                return True
+
+            if not mode_selected:
+                # 1-2. Open menu and select the mode (one scripted operation, verified)
+                if not self.select_option(self.SECURITY_DROPDOWN_ICON, text=text, index=index):
+                    return False
             
             # 3. Click Save
-            time.sleep(1.5) # Stability wait
+            url_before_save = self.driver.current_url
+            commit = self.expect_commit()
             self.click(self.SAVE_BUTTON)
             
-            # 4. Wait for redirect
-            self.logger.info("Waiting 10 seconds for automatic redirect/processing...")
-            time.sleep(10)
+            # 4. Wait for the gateway's commit response (raises on an error payload), else for the
+            # redirect Save triggers
+            self.logger.info("Waiting for automatic redirect/processing after Save...")
+            if not (commit and commit.wait(timeout=20)) and not self.wait_for_url_change(url_before_save, timeout=20):
+                self.logger.warning("No redirect detected after Save. Continuing.")
             
             # 5. Re-navigate
             self.logger.info("Re-navigating to WiFi 6GHz details page...")
             self.navigate()
+            self.pending_changes = False
             
             return True
         except RecoveryHandledException:
@@ -97,29 +106,25 @@ class Wifi6Page(BasePage):
         try:
             # 1. Click the input to open the list
             self.click(self.DEVICE_INPUT)
-            time.sleep(2) # Wait for dynamic list to populate
             
-            # 2. Find options
-            options = self.driver.find_elements(*self.DEVICE_LIST_ITEM)
+            # 2. Find options (wait for the dynamic list to populate; it may legitimately stay empty)
+            options = self.wait_until(lambda d: d.find_elements(*self.DEVICE_LIST_ITEM), timeout=5) or []
             if options:
                 self.logger.info(f"Found {len(options)} device options for WiFi 6GHz. Selecting the first one.")
                 target_option = options[0]
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", target_option)
-                time.sleep(1)
                 
                 target_option.click() 
-                time.sleep(1)
+                self.wait_for_dom_quiet()
                 
                 # 3. Click Add Button
                 self.logger.info("Clicking Add button...")
                 self.click(self.ADD_BUTTON)
-                time.sleep(1)
                 
                 # 4. Click Apply
                 self.logger.info("Clicking Apply button...")
                 self.click(self.APPLY_BUTTON)
                 self.wait_for_page_load()
-                time.sleep(2)
                 return True
             else:
                 self.logger.info("No device entries found in the list for WiFi 6GHz.")
@@ -147,7 +152,7 @@ class Wifi6Page(BasePage):
                     self.logger.warning(f"No radio/checkbox found at index {index} for WiFi 6GHz")
                     return False
                 
-            time.sleep(1.5) # Increased stability wait
+            self.wait_for_dom_quiet()
             self.click(self.APPLY_BUTTON)
             self.wait_for_page_load()
             return True
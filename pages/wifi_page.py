@@ -3,7 +3,6 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from pages.base_page import BasePage, RecoveryHandledException
-from utils.config import Config
 import time
 
 class WifiPage(BasePage):
@@ -20,23 +19,11 @@ class WifiPage(BasePage):
     APPLY_BUTTON = (By.XPATH, "//div[contains(@class, 'button-basic') and contains(text(), 'Apply')]")
     SPLIT_STATE_INDICATOR = (By.XPATH, "//div[contains(text(), 'Split')]")
     SPLIT_ICON = (By.CSS_SELECTOR, "div.f-icon_split")
+    POPUP_BACKGROUND = (By.CSS_SELECTOR, "div.popup-background")
 
     def navigate(self, base_url=None):
         """Navigates to the WiFi page."""
-        target_base = base_url if base_url else Config.BASE_URL
-        url = f"{target_base}/{self.URL_PATH}"
-        self.logger.info(f"Navigating to {url}")
-        
-        # Robust navigation with retry if redirected to dashboard
-        self.driver.get(url)
-        time.sleep(3) # Increase buffer
-        
-        if "wifi" not in self.driver.current_url.lower():
-             self.logger.warning("Redirected? Attempting direct navigation again...")
-             self.driver.get(url)
-             time.sleep(3)
-             
-        self.wait_for_page_load()
+        self.navigate_to_path(self.URL_PATH, "wifi", base_url=base_url)
         
         # Verify content
         try:
@@ -90,11 +77,7 @@ class WifiPage(BasePage):
             self.click(self.WIFI_TOGGLE)
             self.logger.info("WiFi toggle clicked.")
 
-            # 2. Wait for any loading/popup
-            self.logger.info("Waiting for secondary UI state (popup or spinner)...")
-            time.sleep(1.5) 
-            
-            # 3. Custom Poll Loop: "Yes" Button vs. Error Popup/Blocker
+            # 2. Custom Poll Loop: "Yes" Button vs. Error Popup/Blocker
             # Adjusted strategy: Wait longer (30s) but check specifically for ERRORS.
             self.logger.info("Polling for confirmation or error (Concurrent Check)...")
             confirmation_clicked = False
@@ -132,10 +115,10 @@ class WifiPage(BasePage):
                  # Proceeding to wait_for_page_load to ensure stability.
 
 
-            # 4. Wait for the toggle action to process (UI sync)
+            # 3. Wait for the toggle action to process (UI sync)
             self.wait_for_page_load(timeout=60)
             
-            # 5. Functional Verification: Wait until the state is reached
+            # 4. Functional Verification: Wait until the state is reached
             if target_state is not None:
                 return self.wait_until_wifi_state(target_state)
             
@@ -159,7 +142,7 @@ class WifiPage(BasePage):
 
     def launch_wps(self):
         """
-        Clicks Launch WPS and waits 10 seconds.
+        Clicks Launch WPS and waits (up to 10 seconds) for the button label to change.
         Returns the button label text after the wait.
         """
         self.logger.info("Attempting to launch WPS...")
@@ -167,22 +150,23 @@ class WifiPage(BasePage):
             # 1. Locate and click WPS button
             # We look for the div containing 'Launch WPS'
             wps_btn = self.find_element(self.WPS_BUTTON)
-            if "LAUNCH WPS" not in wps_btn.text.upper():
-                self.logger.warning(f"WPS button text is '{wps_btn.text}', expected something like 'Launch WPS'.")
+            initial_label = wps_btn.text
+            if "LAUNCH WPS" not in initial_label.upper():
+                self.logger.warning(f"WPS button text is '{initial_label}', expected something like 'Launch WPS'.")
             
             self.click(self.WPS_BUTTON)
-            self.logger.info("WPS Launch clicked. Waiting 10 seconds...")
+            self.logger.info("WPS Launch clicked. Waiting for the label to change...")
             
-            # 2. Wait 10 seconds as requested
-            time.sleep(10)
+            # 2. Wait until the label changes (popups are checked while polling and
+            # raise RecoveryHandledException)
+            self.wait_until(
+                lambda d: d.find_element(*self.WPS_BUTTON).text != initial_label,
+                timeout=10, message="WPS label change"
+            )
             
-            # 3. Check for unexpected popups after the wait (proactive)
-            # This will raise RecoveryHandledException if a popup appeared
-            self.check_for_unexpected_popups()
-            
-            # 4. Get new label
+            # 3. Get new label
             new_label = self.find_element(self.WPS_BUTTON).text
-            self.logger.info(f"WPS Label after 10s: '{new_label}'")
+            self.logger.info(f"WPS Label after launch: '{new_label}'")
             return new_label
 
         except RecoveryHandledException as e:
@@ -219,19 +203,20 @@ class WifiPage(BasePage):
         self.logger.info("Attempting to Apply changes (JS)...")
         try:
             # 1. Click Apply via JS to avoid interception
+            commit = self.expect_commit()
             element = self.find_element(self.APPLY_BUTTON)
             self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-            time.sleep(1)
             self.driver.execute_script("arguments[0].click();", element)
             self.logger.info("Apply button clicked (JS).")
             
-            # 2. Handle 'Yes, continue' popup
-            time.sleep(2) # Give popup a moment to appear
+            # 2. Handle 'Yes, continue' popup (click() waits until it is clickable)
             self.logger.info("Confirming with 'Yes, continue'...")
             self.click(self.POPUP_OK)
             self.logger.info("Confirmation 'Yes, continue' clicked.")
             
-            # 3. Wait for popup to disappear
+            # 3. Wait for the commit response (raises on an error payload), else for the popup to disappear
+            if commit and commit.wait(timeout=60):
+                return True
             self.wait_until_invisible(self.POPUP_BACKGROUND)
             self.wait_for_page_load(timeout=60)
             return True
@@ -250,6 +235,7 @@ class WifiPage(BasePage):
             
             # 2. Click Apply
             self.logger.info("Clicking Apply button...")
+            commit = self.expect_commit()
             self.click(self.APPLY_BUTTON)
             
             # 3. Confirm with 'Yes, continue'
@@ -258,7 +244,8 @@ class WifiPage(BasePage):
             self.click(self.POPUP_OK)
             
             self.logger.info("Waiting for VAP split to be processed...")
-            self.wait_for_page_load(timeout=60)
+            if not (commit and commit.wait(timeout=60)):
+                self.wait_for_page_load(timeout=60)
             self.logger.info("VAP split completed successfully.")
             return True
         except Exception as e:
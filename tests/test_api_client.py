@@ -0,0 +1,105 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utils.api_client import ApiClient, ApiError
+from utils.config import Config
+from utils.desired_state import DesiredState
+
+CONTEXT_ID = "ctx-1234"
+
+
+class GatewayStandIn(BaseHTTPRequestHandler):
+    """Minimal data-model API: createContext, get/set on flat objects, releaseContext."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, as the client's pooled session expects
+    objects = {}
+    calls = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.calls.append((body["service"], body["method"], self.headers.get("X-Context")))
+        service, method, params = body["service"], body["method"], body["parameters"]
+
+        if method == "createContext":
+            if params.get("password") != "secret":
+                return self.reply(401, {})
+            return self.reply(200, {"status": 0, "data": {"contextID": CONTEXT_ID}})
+        if self.headers.get("X-Context") != CONTEXT_ID:
+            return self.reply(403, {})
+        if method == "releaseContext":
+            return self.reply(200, {"status": 0})
+        if method == "get":
+            return self.reply(200, {"status": {}, "data": {service + ".": self.objects.get(service, {})}})
+        if method == "set":
+            self.objects.setdefault(service, {}).update(params["parameters"])
+            return self.reply(200, {"status": True})
+        return self.reply(200, {"errors": [{"description": f"unknown method {method}"}]})
+
+    def reply(self, code, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setattr(Config, "API_ENDPOINT", "/ws")
+    GatewayStandIn.objects = {"Device.WiFi.Radio.1": {"Channel": 6, "AutoChannelEnable": True}}
+    GatewayStandIn.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GatewayStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_login_sends_context_on_later_calls(gateway):
+    with ApiClient(gateway, "admin", "secret") as api:
+        assert api.context_id == CONTEXT_ID
+        api.get_parameters(["Device.WiFi.Radio.1.Channel"])
+    assert GatewayStandIn.calls[0] == ("sah.Device.Information", "createContext", None)
+    assert all(context == CONTEXT_ID for _, _, context in GatewayStandIn.calls[1:])
+    assert GatewayStandIn.calls[-1][1] == "releaseContext"
+
+
+def test_login_with_wrong_password_raises(gateway):
+    with pytest.raises(ApiError):
+        ApiClient(gateway, "admin", "wrong").login()
+
+
+def test_get_parameters_normalizes_values(gateway):
+    with ApiClient(gateway, "admin", "secret") as api:
+        values = api.get_parameters(["Device.WiFi.Radio.1.Channel", "Device.WiFi.Radio.1.AutoChannelEnable",
+                                     "Device.WiFi.Radio.1.Missing"])
+    assert values == {"Device.WiFi.Radio.1.Channel": "6", "Device.WiFi.Radio.1.AutoChannelEnable": "1",
+                      "Device.WiFi.Radio.1.Missing": None}
+
+
+def test_set_parameters_sends_one_call_per_object(gateway):
+    with ApiClient(gateway, "admin", "secret") as api:
+        assert api.set_parameters({"Device.WiFi.Radio.1.Channel": "11", "Device.WiFi.Radio.1.AutoChannelEnable": "0",
+                                   "Device.Time.Enable": "1"})
+    sets = [(service, method) for service, method, _ in GatewayStandIn.calls if method == "set"]
+    assert sets == [("Device.WiFi.Radio.1", "set"), ("Device.Time", "set")]
+    assert GatewayStandIn.objects["Device.WiFi.Radio.1"] == {"Channel": "11", "AutoChannelEnable": "0"}
+
+
+def test_apply_desired_state_only_sends_changed_sections(gateway):
+    state = DesiredState({
+        "radio24": {"parameters": {"Device.WiFi.Radio.1.Channel": "11"}},
+        "ntp": {"parameters": {"Device.Time.Enable": "1"}},
+    })
+    GatewayStandIn.objects["Device.Time"] = {"Enable": True}
+    with ApiClient(gateway, "admin", "secret") as api:
+        assert api.apply_desired_state(state, only_changed=True)
+    sets = [service for service, method, _ in GatewayStandIn.calls if method == "set"]
+    assert sets == ["Device.WiFi.Radio.1"]
+    assert GatewayStandIn.objects["Device.WiFi.Radio.1"]["Channel"] == "11"
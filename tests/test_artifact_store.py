@@ -0,0 +1,58 @@
+import io
+from PIL import Image, ImageDraw
+from utils.artifact_store import ArtifactStore, dhash
+
+
+def page(text="amine_prpl_24", noise=None):
+    """PNG of a settings page: a header bar and one text field."""
+    image = Image.new("RGB", (640, 360), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 640, 48), fill=(30, 60, 120))
+    draw.rectangle((40, 120, 400, 150), outline="gray")
+    draw.text((48, 128), text, fill="black")
+    if noise:
+        image.putpixel(noise, (250, 250, 250))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_exact_duplicate_is_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.put(page(), "png")
+    second = store.put(page(), "png")
+    assert first["dedup"] == "new"
+    assert second["dedup"] == "exact"
+    assert second["object"] == first["object"]
+
+
+def test_visually_identical_image_is_merged_when_perceptual(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.put(page(), "png")
+    twin = store.put(page(noise=(600, 300)), "png", perceptual=True)
+    assert twin["dedup"] == "perceptual"
+    assert twin["sha256"] == first["sha256"]
+    assert twin["image_sha256"] != first["sha256"]
+
+
+def test_near_duplicate_is_not_merged_without_perceptual(tmp_path):
+    # A key-step shot that only differs by the new SSID must keep its own image
+    store = ArtifactStore(str(tmp_path))
+    first = store.put(page("old_ssid"), "png", perceptual=True)
+    updated = store.put(page("amine_prpl_24"), "png", perceptual=False)
+    assert updated["dedup"] == "new"
+    assert updated["object"] != first["object"]
+    assert (tmp_path / updated["object"]).exists()
+
+
+def test_closest_requires_same_dimensions(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.put(page(), "png")
+    image = Image.open(io.BytesIO(page()))
+    assert store._closest(dhash(image), (640, 360))["size"] == [640, 360]
+    assert store._closest(dhash(image), (320, 180)) is None
+
+
+def test_index_is_shared_between_store_instances(tmp_path):
+    ArtifactStore(str(tmp_path)).put(page(), "png")
+    assert ArtifactStore(str(tmp_path)).put(page(), "png")["dedup"] == "exact"
@@ -0,0 +1,54 @@
+import json
+import pytest
+from utils.checkpoint import Checkpoint, state_fingerprint
+from utils.config import Config
+from utils.desired_state import DesiredState
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CHECKPOINT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def state(channel="11"):
+    return DesiredState({"radio24": {"parameters": {"Device.WiFi.Radio.1.Channel": channel}}})
+
+
+def test_resume_restores_completed_steps_and_context(checkpoint_dir):
+    fingerprint = state_fingerprint(state())
+    checkpoint = Checkpoint("gw1", fingerprint)
+    checkpoint.mark_done("login", base_url="http://192.168.1.1")
+    checkpoint.mark_done("lan", base_url="http://192.168.3.5")
+
+    resumed = Checkpoint("gw1", fingerprint)
+    assert resumed.load()
+    assert resumed.is_done("login") and resumed.is_done("lan") and not resumed.is_done("wifi")
+    assert resumed.context == {"base_url": "http://192.168.3.5"}
+    assert json.loads((checkpoint_dir / "gw1.json").read_text())["completed"] == ["login", "lan"]
+
+
+def test_checkpoint_of_another_desired_state_is_ignored():
+    Checkpoint("gw1", state_fingerprint(state("11"))).mark_done("login")
+    resumed = Checkpoint("gw1", state_fingerprint(state("6")))
+    assert not resumed.load()
+    assert resumed.completed == []
+
+
+def test_missing_or_corrupt_checkpoint_starts_empty(checkpoint_dir):
+    assert not Checkpoint("gw1").load()
+    (checkpoint_dir / "gw1.json").write_text("{not json")
+    assert not Checkpoint("gw1").load()
+
+
+def test_clear_removes_the_file(checkpoint_dir):
+    checkpoint = Checkpoint("gw1")
+    checkpoint.mark_done("login")
+    checkpoint.clear()
+    assert not (checkpoint_dir / "gw1.json").exists()
+    assert not list(checkpoint_dir.iterdir())
+
+
+def test_fingerprint_depends_on_values_only():
+    assert state_fingerprint(state("11")) == state_fingerprint(state("11"))
+    assert state_fingerprint(state("11")) != state_fingerprint(state("6"))
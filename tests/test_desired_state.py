@@ -0,0 +1,51 @@
+from utils.desired_state import DesiredState, format_set_command, readable_paths
+
+SSID = "Device.WiFi.SSID.vap2g0priv.SSID"
+PASSPHRASE = "Device.WiFi.AccessPoint.vap2g0priv.Security.KeyPassphrase"
+CHANNEL = "Device.WiFi.Radio.1.Channel"
+
+
+def make_state():
+    return DesiredState({
+        "wifi24": {"parameters": {SSID: "amine_prpl_24", PASSPHRASE: "amine123"}},
+        "radio24": {"parameters": {CHANNEL: 11}},
+        "lan": {"parameters": {"Device.IP.Interface.lan.IPv4Address.lan.IPAddress": "192.168.3.5"}},
+    })
+
+
+def test_section_names_put_apply_last_at_the_end():
+    assert make_state().section_names() == ["wifi24", "radio24", "lan"]
+
+
+def test_diff_reports_changed_readable_paths():
+    state = make_state()
+    drift = state.diff({SSID: "old_ssid", CHANNEL: "11"}, ["wifi24", "radio24"])
+    assert drift == {"wifi24": {SSID: ("amine_prpl_24", "old_ssid")}}
+
+
+def test_diff_skips_section_in_sync():
+    assert make_state().diff({CHANNEL: "11"}, ["radio24"]) == {}
+
+
+def test_diff_ignores_write_only_paths_by_default():
+    # The SSID matches and the passphrase cannot be read back: nothing to apply on a rerun
+    state = make_state()
+    current = {path: "amine_prpl_24" for path in readable_paths(state.parameters(["wifi24"]))}
+    assert state.diff(current, ["wifi24"]) == {}
+
+
+def test_diff_returns_write_only_sections_when_forced():
+    state = make_state()
+    state.force_write_only = True
+    current = {path: "amine_prpl_24" for path in readable_paths(state.parameters(["wifi24"]))}
+    assert state.diff(current, ["wifi24"]) == {"wifi24": {}}
+
+
+def test_readable_paths_drops_write_only_parameters():
+    assert readable_paths([SSID, PASSPHRASE, "Device.Users.User.1.Password"]) == [SSID]
+
+
+def test_format_set_command_quotes_special_values():
+    assert format_set_command(SSID, "plain") == f"{SSID}=plain"
+    assert format_set_command(SSID, "with space") == f'{SSID}="with space"'
+    assert format_set_command(SSID, "") == f'{SSID}=""'
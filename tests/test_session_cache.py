@@ -0,0 +1,44 @@
+import json
+import os
+import threading
+from utils.session_cache import SessionCache
+
+
+class FakeDriver:
+    """The two WebDriver calls SessionCache.capture makes."""
+
+    def __init__(self, token):
+        self.token = token
+
+    def execute_script(self, script):
+        return {"local": {"context": self.token}, "session": {}}
+
+    def get_cookies(self):
+        return [{"name": "sessionid", "value": self.token, "path": "/", "domain": "ignored"}]
+
+
+def test_concurrent_captures_keep_every_gateway(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    workers = [threading.Thread(target=SessionCache(path).capture,
+                                args=(FakeDriver(f"t{i}"), f"http://192.168.{i}.1/#/login"))
+               for i in range(20)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    entries = json.loads(open(path, encoding="utf-8").read())
+    assert sorted(entries) == sorted(f"http://192.168.{i}.1" for i in range(20))
+    assert entries["http://192.168.7.1"]["cookies"] == [{"name": "sessionid", "value": "t7", "path": "/"}]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_invalidate_drops_only_that_gateway(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    SessionCache(path).capture(FakeDriver("a"), "http://192.168.1.1")
+    SessionCache(path).capture(FakeDriver("b"), "http://192.168.3.1")
+
+    SessionCache(path).invalidate("http://192.168.1.1")
+    SessionCache(path).invalidate("http://192.168.1.1")
+
+    assert list(json.loads(open(path, encoding="utf-8").read())) == ["http://192.168.3.1"]
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from utils.step_graph import Step, StepGraph, current_step
+
+
+def graph(*steps):
+    return StepGraph(list(steps))
+
+
+def test_rejects_unknown_dependency_and_cycles():
+    with pytest.raises(ValueError):
+        graph(Step("a", lambda ctx: True, deps=["missing"]))
+    with pytest.raises(ValueError):
+        graph(Step("a", lambda ctx: True, deps=["b"]), Step("b", lambda ctx: True, deps=["a"]))
+
+
+def test_order_is_stable_topological():
+    g = graph(Step("login", None), Step("wifi", None, deps=["login"]),
+              Step("ssh", None, resource="ssh"), Step("radio", None, deps=["login"]))
+    assert [s.name for s in g.order()] == ["login", "wifi", "ssh", "radio"]
+
+
+def test_statuses_and_blocking():
+    def boom(ctx):
+        raise RuntimeError("no element")
+
+    g = graph(
+        Step("login", lambda ctx: True),
+        Step("wifi", lambda ctx: False, deps=["login"]),
+        Step("radio", boom, deps=["login"]),
+        Step("radio_verify", lambda ctx: True, deps=["radio"]),
+        Step("ntp", lambda ctx: True, deps=["wifi"]),
+        Step("users", lambda ctx: True, deps=["login"]),
+    )
+    completed = []
+    results = g.run({}, skip=lambda step: "in sync" if step.name == "users" else None,
+                    on_complete=lambda step, status: completed.append((step.name, status)))
+    status = {r["name"]: r["status"] for r in results}
+    assert status == {"login": "passed", "wifi": "soft_failed", "radio": "failed",
+                      "radio_verify": "blocked", "ntp": "passed", "users": "skipped"}
+    assert sorted(completed) == sorted(status.items())
+    assert [name for name, _ in g.errors] == ["radio"]
+
+
+def test_runner_replaces_step_function_and_tags_current_step():
+    seen = []
+    g = graph(Step("a", lambda ctx: pytest.fail("runner not used")))
+    g.run({}, runner=lambda step, ctx: seen.append((step.name, current_step())))
+    assert seen == [("a", "a")]
+    assert current_step() is None
+
+
+def test_steps_on_the_same_resource_never_overlap():
+    lock = threading.Lock()
+    active, overlaps = [], []
+
+    def work(resource):
+        def func(ctx):
+            with lock:
+                if resource in active:
+                    overlaps.append(resource)
+                active.append(resource)
+            time.sleep(0.02)
+            with lock:
+                active.remove(resource)
+            return True
+        return func
+
+    resources = ["browser", "ssh"] * 3
+    steps = [Step(f"s{i}", work(resource), resource=resource) for i, resource in enumerate(resources)]
+    results = graph(*steps).run({}, max_workers=2)
+    assert not overlaps
+    assert all(r["status"] == "passed" for r in results)
+
+
+def test_exception_without_message_only_fails_its_step():
+    def bare(ctx):
+        raise AssertionError()
+
+    results = graph(Step("a", bare), Step("b", lambda ctx: True)).run({})
+    assert [(r["name"], r["status"], r["error"]) for r in results] == [
+        ("a", "failed", "AssertionError"), ("b", "passed", "")]
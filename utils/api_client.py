@@ -0,0 +1,209 @@
+"""
+API Client — configures the gateway through the same HTTP/JSON data-model API the web UI calls.
+
+Every request is a JSON call {"service": <object path>, "method": <get|set|...>, "parameters": {...}}
+posted to Config.API_ENDPOINT on one keep-alive requests.Session. Authentication mirrors the web UI:
+createContext with the UI credentials returns a context id that is sent with every later call.
+No browser is involved, so one runner can provision many gateways per hour.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from utils.config import Config
+from utils.desired_state import readable_paths
+from utils.logger import Logger
+
+
+class ApiError(Exception):
+    """The gateway API answered with an error status (or not as JSON)."""
+    pass
+
+
+class ApiClient:
+    """
+    HTTP/JSON data-model client with pooled keep-alive connections.
+
+    Usage:
+        with ApiClient("http://192.168.1.1") as api:
+            api.set_parameters({"Device.WiFi.Radio.1.Channel": "11"})
+            api.apply_desired_state(DesiredState.load(), only_changed=True)
+    """
+
+    CONTENT_TYPE = "application/x-sah-ws-4-call+json"
+    LOGIN_SERVICE = "sah.Device.Information"
+    TIMEOUT = 15  # seconds per request
+    # Objects whose change moves the gateway to another address: written after everything else
+    MOVING_OBJECT_MARKERS = ["IPv4Address"]
+
+    def __init__(self, base_url=None, username=None, password=None):
+        self.logger = Logger().get_logger()
+        self.base_url = (base_url or Config.BASE_URL).rstrip("/")
+        self.username = username or Config.USERNAME
+        self.password = password or Config.PASSWORD
+        self.context_id = None
+        self.session = requests.Session()
+        # Keep-alive pool: every call of this client reuses the same few TCP connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.API_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": self.CONTENT_TYPE, "Accept": "application/json"})
+
+    # ------------------------------------------------------------------
+    # Context manager support
+    # ------------------------------------------------------------------
+
+    def __enter__(self):
+        self.login()
+        return self
+
+    def __exit__(self, *_):
+        self.logout()
+
+    # ------------------------------------------------------------------
+    # Session
+    # ------------------------------------------------------------------
+
+    def login(self):
+        """Opens an API context with the web UI credentials (session cookie + context id)."""
+        self.logger.info(f"[API] Logging in at {self.base_url} as {self.username}...")
+        data = self.call(self.LOGIN_SERVICE, "createContext", {
+            "applicationName": "webui", "username": self.username, "password": self.password,
+        }, headers={"Authorization": "X-Sah-Login"})
+        self.context_id = (data or {}).get("contextID")
+        if not self.context_id:
+            raise ApiError(f"Login at {self.base_url} returned no context id.")
+        self.session.headers.update({"X-Context": self.context_id, "Authorization": f"X-Sah {self.context_id}"})
+        self.logger.info("[API] Logged in.")
+
+    def logout(self):
+        """Releases the API context and the pooled connections."""
+        if self.context_id:
+            try:
+                self.call(self.LOGIN_SERVICE, "releaseContext", {"applicationName": "webui"})
+            except (ApiError, requests.RequestException) as e:
+                self.logger.debug(f"[API] Logout failed (gateway moved?): {e}")
+            self.context_id = None
+        self.session.close()
+
+    def call(self, service: str, method: str, parameters=None, headers=None):
+        """Posts one JSON call and returns its 'data' (raises ApiError on an error status)."""
+        response = self.session.post(
+            f"{self.base_url}{Config.API_ENDPOINT}",
+            json={"service": service, "method": method, "parameters": parameters or {}},
+            headers=headers, timeout=self.TIMEOUT,
+        )
+        if response.status_code in (401, 403):
+            raise ApiError(f"{service}.{method}: not authorized ({response.status_code}).")
+        response.raise_for_status()
+        try:
+            body = response.json()
+        except ValueError:
+            raise ApiError(f"{service}.{method}: response is not JSON.")
+        if body.get("errors") or body.get("status") is False:
+            raise ApiError(f"{service}.{method} failed: {body.get('errors') or body}")
+        return body.get("data", body.get("status"))
+
+    # ------------------------------------------------------------------
+    # Parameters
+    # ------------------------------------------------------------------
+
+    def get_parameters(self, paths: list[str]) -> dict:
+        """Reads parameters with one 'get' per data-model object. Returns {path: value} (None if absent)."""
+        values = {}
+        for obj, names in _group_by_object(paths).items():
+            data = self.call(obj, "get") or {}
+            # The object's parameters come back either flat or nested under the object path
+            params = data.get(obj + ".", data.get(obj, data)) if isinstance(data, dict) else {}
+            for name in names:
+                values[f"{obj}.{name}"] = _to_text(params.get(name)) if name in params else None
+        return values
+
+    def set_parameters(self, params: dict) -> bool:
+        """Writes parameters with one 'set' per data-model object."""
+        grouped = _group_by_object(params)
+        self.logger.info(f"[API] Setting {len(params)} parameter(s) on {len(grouped)} object(s)...")
+        for obj, names in grouped.items():
+            try:
+                self.call(obj, "set", {"parameters": {name: params[f"{obj}.{name}"] for name in names}})
+            except ApiError as e:
+                self.logger.error(f"[API] {e}")
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Declarative desired state (same contract as DMClient)
+    # ------------------------------------------------------------------
+
+    def diff_desired_state(self, state, sections=None) -> dict:
+        """Reads the readable desired-state parameters and returns the sections that differ."""
+        current = self.get_parameters(readable_paths(state.parameters(sections)))
+        drift = state.diff(current, sections)
+        for name, changed in drift.items():
+            for path, (want, got) in changed.items():
+                self.logger.info(f"[API] Drift in {name}: {path} is '{got}', want '{want}'")
+        self.logger.info(f"[API] {len(drift)} section(s) to apply: {list(drift)}")
+        return drift
+
+    def apply_desired_state(self, state, sections=None, verify=True, only_changed=False) -> bool:
+        """
+        Applies a DesiredState over the API, then reads the values back.
+        Sections in DesiredState.APPLY_LAST (LAN) are sent last: they move the gateway, so a dropped
+        connection afterwards is expected.
+        """
+        names = sections or state.section_names()
+        if only_changed:
+            names = list(self.diff_desired_state(state, names))
+            if not names:
+                self.logger.info("[API] Gateway already in desired state. Nothing to apply.")
+                return True
+        regular = [n for n in names if n not in state.APPLY_LAST]
+        last = [n for n in names if n in state.APPLY_LAST]
+
+        params = state.parameters(regular)
+        if params and not self.set_parameters(params):
+            return False
+        if verify and params and not self.verify_parameters(params):
+            return False
+
+        if last:
+            self.logger.info(f"[API] Applying {last} last (gateway address may change)...")
+            lan_params = state.parameters(last)
+            # One 'set' per object: the address change must come after the DHCP pool or it is never sent
+            ordered = dict(sorted(lan_params.items(),
+                                  key=lambda item: any(m in item[0] for m in self.MOVING_OBJECT_MARKERS)))
+            try:
+                if not self.set_parameters(ordered):
+                    return False
+            except requests.RequestException as e:
+                self.logger.info(f"[API] Connection dropped after {last} change, as expected: {e}")
+        return True
+
+    def verify_parameters(self, expected: dict) -> bool:
+        """Reads expected paths back and logs every mismatch. Write-only parameters are skipped."""
+        readable = readable_paths(expected)
+        actual = self.get_parameters(readable)
+        mismatches = {p: (expected[p], actual[p]) for p in readable if str(expected[p]) != actual[p]}
+        for path, (want, got) in mismatches.items():
+            self.logger.error(f"[API] Verification mismatch: {path} expected '{want}', got '{got}'")
+        if not mismatches:
+            self.logger.info(f"[API] Verified {len(readable)} parameter(s).")
+        return not mismatches
+
+
+# ------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------
+
+def _group_by_object(paths) -> dict:
+    """{'Device.WiFi.Radio.1': ['Channel', 'AutoChannelEnable'], ...} in first-seen order."""
+    grouped = {}
+    for path in paths:
+        obj, name = path.rsplit(".", 1)
+        grouped.setdefault(obj, []).append(name)
+    return grouped
+
+
+def _to_text(value):
+    """Normalizes JSON values to the data-model text form used in the desired state."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return None if value is None else str(value)
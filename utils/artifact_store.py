@@ -0,0 +1,144 @@
+"""
+Content-addressed screenshot store.
+
+Images are stored once under <store>/objects/<sha256[:2]>/<sha256>.<ext>. A new image is first
+matched exactly (same SHA-256), then perceptually: a difference hash (dHash) computed with NumPy is
+compared against every stored hash in one vectorized Hamming-distance pass, so the same page shot
+on 40 gateways (or twice in one run) is kept once. Each stored object gets a JPEG thumbnail for
+reports. The index is an append-only JSONL file, safe to share between fleet worker processes.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import numpy as np
+from PIL import Image
+from utils.config import Config
+
+INDEX_NAME = "index.jsonl"
+
+
+def dhash(image: Image.Image, size: int = 16) -> np.ndarray:
+    """size*size-bit difference hash (packed uint8): is each pixel brighter than its right neighbour."""
+    pixels = np.asarray(image.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1])
+
+
+class ArtifactStore:
+    """
+    Deduplicating image store shared by every gateway of a run (and across runs).
+
+    Usage:
+        store = ArtifactStore()
+        ref = store.put(png_bytes, "png", perceptual=True)
+        ref -> {'image_sha256', 'sha256' (stored object), 'object', 'thumb', 'dedup': 'new' | 'exact' | 'perceptual'}
+    """
+
+    def __init__(self, root=None):
+        self.root = root or Config.EVIDENCE_STORE_DIR
+        self.index_path = os.path.join(self.root, INDEX_NAME)
+        self.lock = threading.Lock()
+        self.entries = {}                       # sha256 -> index entry
+        self.hashes = np.zeros((0, 0), np.uint8)  # one packed dHash row per perceptual candidate
+        self.hash_owners = []                   # sha256 of each row in self.hashes
+        self._index_offset = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def put(self, data: bytes, ext: str, perceptual: bool = True) -> dict:
+        """Stores data unless an identical (or, if perceptual, visually identical) image exists."""
+        sha = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            self._refresh()
+            if sha in self.entries:
+                return self._ref(self.entries[sha], "exact", sha)
+
+            image = Image.open(io.BytesIO(data))
+            image_hash = dhash(image)
+            if perceptual:
+                twin = self._closest(image_hash, image.size)
+                if twin:
+                    return self._ref(twin, "perceptual", sha)
+
+            entry = {
+                "sha256": sha,
+                "object": os.path.join("objects", sha[:2], f"{sha}.{ext}"),
+                "thumb": os.path.join("thumbs", f"{sha}.jpg"),
+                "dhash": image_hash.tobytes().hex(),
+                "size": list(image.size),
+                "perceptual": perceptual,
+            }
+            self._write_atomic(os.path.join(self.root, entry["object"]), data)
+            self._write_thumbnail(image, os.path.join(self.root, entry["thumb"]))
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._add(entry)
+            return self._ref(entry, "new", sha)
+
+    def path(self, ref: dict) -> str:
+        """Absolute path of the stored object a put() reference points to."""
+        return os.path.join(self.root, ref["object"])
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _refresh(self):
+        """Loads index lines appended since the last call (by this or another process)."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # another process is still writing this line
+                self._index_offset += len(line.encode("utf-8"))
+                try:
+                    self._add(json.loads(line))
+                except ValueError:
+                    continue
+
+    def _add(self, entry):
+        if entry["sha256"] in self.entries:
+            return
+        self.entries[entry["sha256"]] = entry
+        if entry.get("perceptual"):
+            row = np.frombuffer(bytes.fromhex(entry["dhash"]), np.uint8)[None, :]
+            self.hashes = row if not self.hashes.size else np.vstack([self.hashes, row])
+            self.hash_owners.append(entry["sha256"])
+
+    def _closest(self, image_hash, size):
+        """Stored entry within EVIDENCE_PHASH_DISTANCE bits of image_hash (same dimensions), or None."""
+        if not self.hashes.size or self.hashes.shape[1] != image_hash.size:
+            return None
+        distances = np.unpackbits(self.hashes ^ image_hash, axis=1).sum(axis=1)
+        for i in np.argsort(distances, kind="stable"):
+            if distances[i] > Config.EVIDENCE_PHASH_DISTANCE:
+                return None
+            entry = self.entries[self.hash_owners[i]]
+            if tuple(entry["size"]) == size:
+                return entry
+        return None
+
+    def _ref(self, entry, dedup, sha=None):
+        return {
+            "image_sha256": sha or entry["sha256"],
+            "sha256": entry["sha256"],
+            "object": entry["object"],
+            "thumb": entry["thumb"],
+            "dedup": dedup,
+        }
+
+    def _write_thumbnail(self, image, path):
+        thumb = image.convert("RGB")
+        thumb.thumbnail((Config.EVIDENCE_THUMB_WIDTH, Config.EVIDENCE_THUMB_WIDTH))
+        buffer = io.BytesIO()
+        thumb.save(buffer, "JPEG", quality=60)
+        self._write_atomic(path, buffer.getvalue())
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
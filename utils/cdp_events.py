@@ -0,0 +1,252 @@
+"""
+Chrome DevTools Protocol network events of one browser.
+
+get_driver() turns on chromedriver's performance log (Network domain only) when a CDP-based
+strategy is configured. CdpEventBus drains that log, keeps the set of in-flight requests per
+origin up to date and hands every event to its subscribers. BasePage uses it to wait until the
+gateway's background XHRs are done instead of inferring it from spinner classes, and
+CommitWatcher to wait for the backend's answer to an Apply/Save instead of a UI change.
+"""
+import json
+import time
+from urllib.parse import urlsplit
+from utils.config import Config
+from utils.logger import Logger
+
+# Requests that never finish by design: they are not counted as in flight
+STREAMING_TYPES = ("EventSource", "WebSocket")
+# Backend calls that only read: every other call to Config.API_ENDPOINT counts as a commit
+READ_METHOD_PREFIXES = ("get", "list", "is", "createContext", "releaseContext")
+
+
+class CommitError(Exception):
+    """The gateway answered an Apply/Save with an error payload."""
+    pass
+
+
+class CdpEventBus:
+    """
+    Network event tracker bound to one driver (one bus per driver, see for_driver).
+
+    Usage:
+        bus = CdpEventBus.for_driver(driver)
+        if bus.available():
+            bus.wait_for_network_idle("http://192.168.1.1", idle_ms=500)
+    """
+
+    # In-flight requests older than this (ms) are treated as long-polls and ignored for idleness
+    LONG_POLL_MS = 10000
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.logger = Logger().get_logger()
+        self.inflight = {}          # requestId -> (url, start time)
+        self.last_activity = time.time()
+        self.subscribers = []       # callback(method, params)
+        self.stats = {}             # traffic since the last take_stats()
+        self.take_stats()
+        self._available = None
+
+    @classmethod
+    def for_driver(cls, driver):
+        """Returns the bus of driver, created on first use (the log can only be drained once)."""
+        bus = getattr(driver, "_hgw_cdp_bus", None)
+        if bus is None:
+            bus = cls(driver)
+            driver._hgw_cdp_bus = bus
+        return bus
+
+    def available(self) -> bool:
+        """True when the driver was started with the performance log (see get_driver)."""
+        if self._available is None:
+            try:
+                self.poll()
+                self._available = True
+            except Exception as e:
+                self.logger.debug(f"[CDP] Performance log unavailable ({e}).")
+                self._available = False
+        return self._available
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def poll(self):
+        """Drains the performance log: updates the in-flight set, then notifies the subscribers."""
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method", ""), message.get("params", {})
+            if method.startswith("Network."):
+                self._track(method, params, entry["timestamp"] / 1000.0)
+            for callback in list(self.subscribers):
+                callback(method, params)
+
+    def take_stats(self) -> dict:
+        """Returns {'requests', 'bytes', 'cached', 'blocked'} since the last call and starts over."""
+        stats, self.stats = self.stats, {"requests": 0, "bytes": 0, "cached": 0, "blocked": 0}
+        return stats
+
+    def pending(self, origin=None) -> list:
+        """URLs still in flight (optionally only those of origin), long-polls excluded."""
+        cutoff = time.time() - self.LONG_POLL_MS / 1000.0
+        return [url for url, started in self.inflight.values()
+                if started >= cutoff and (origin is None or url.startswith(origin))]
+
+    def wait_for_network_idle(self, url=None, idle_ms=500, timeout=30, poll=0.05, check=None):
+        """
+        Waits until no request to url's origin has been in flight for idle_ms.
+        check() runs on every poll (e.g. the popup probe, which may raise). Returns True when idle,
+        False on timeout.
+        """
+        origin = _origin(url) if url else None
+        end_time = time.time() + timeout
+        while time.time() < end_time:
+            self.poll()
+            busy = self.pending(origin)
+            idle_for = (time.time() - self.last_activity) * 1000
+            if not busy and idle_for >= idle_ms:
+                return True
+            if check:
+                check()
+            # Sleep for the remaining idle window at most, so a settled page is detected promptly
+            remaining = (idle_ms - idle_for) / 1000.0 if not busy else poll
+            time.sleep(min(max(remaining, poll), max(end_time - time.time(), 0)))
+        self.logger.warning(f"[CDP] Network still busy after {timeout}s: {self.pending(origin)[:3]}")
+        return False
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _track(self, method, params, timestamp):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if params.get("type") in STREAMING_TYPES or not params["request"]["url"].startswith("http"):
+                return
+            self.stats["requests"] += 1
+            self.inflight[request_id] = (params["request"]["url"], timestamp)
+        elif method == "Network.requestServedFromCache":
+            self.stats["cached"] += 1
+            return
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            self.stats["bytes"] += int(params.get("encodedDataLength", 0))
+            self.stats["blocked"] += 1 if params.get("blockedReason") else 0
+            if self.inflight.pop(request_id, None) is None:
+                return
+        else:
+            return
+        self.last_activity = max(self.last_activity, timestamp)
+
+
+class CommitWatcher:
+    """
+    Collects the backend write calls the UI sends after it started (POSTs to Config.API_ENDPOINT
+    whose method is not a read) and their responses.
+
+    Usage:
+        commit = CommitWatcher(bus).start()
+        page.click(SAVE_BUTTON)
+        commit.wait(timeout=60)   # True once committed, CommitError on an error payload
+    """
+
+    # Once the first write answered, further writes of the same Save may follow within this window (ms)
+    SETTLE_MS = 300
+    # The click sends its first write call within this window (s); none means the endpoint does not
+    # match (e.g. a misconfigured API_ENDPOINT), so the caller's fallback wait takes over early
+    FIRST_CALL_GRACE = 3
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.logger = Logger().get_logger()
+        self.calls = {}     # requestId -> {'call': 'service.method', 'status': HTTP status, 'done': bool}
+        self.last_done = None
+        self.started = None
+
+    def start(self):
+        self.bus.driver.execute_cdp_cmd("Network.enable", {})  # Network.getResponseBody needs it
+        self.bus.poll()  # earlier events belong to earlier actions
+        self.bus.subscribe(self._on_event)
+        self.started = time.time()
+        return self
+
+    def wait(self, timeout=60, poll=0.1, grace=None):
+        """
+        Waits until the write calls were answered. Returns True when committed, False when no write
+        was seen within grace (default FIRST_CALL_GRACE) or the calls did not finish within timeout.
+        Raises CommitError on an HTTP error or an error payload.
+        """
+        end_time = time.time() + timeout
+        grace_end = time.time() + (self.FIRST_CALL_GRACE if grace is None else grace)
+        try:
+            while time.time() < end_time:
+                self.bus.poll()
+                if not self.calls and time.time() >= grace_end:
+                    self.logger.warning(f"[COMMIT] No write call to {Config.API_ENDPOINT} within "
+                                        f"{grace_end - self.started:.1f}s of the action. Using the fallback wait.")
+                    return False
+                errors = [c for c in self.calls.values() if c.get("error")]
+                if errors:
+                    raise CommitError(f"{errors[0]['call']} failed: {errors[0]['error']}")
+                settled = self.last_done and (time.time() - self.last_done) * 1000 >= self.SETTLE_MS
+                if self.calls and settled and all(c["done"] for c in self.calls.values()):
+                    self.logger.info(f"[COMMIT] {len(self.calls)} call(s) committed after "
+                                     f"{time.time() - self.started:.2f}s: {[c['call'] for c in self.calls.values()]}")
+                    return True
+                time.sleep(poll)
+            self.logger.warning(f"[COMMIT] No committed backend call after {timeout}s ({len(self.calls)} seen).")
+            return False
+        finally:
+            self.bus.unsubscribe(self._on_event)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _on_event(self, method, params):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            request = params["request"]
+            if request["method"] != "POST" or Config.API_ENDPOINT not in urlsplit(request["url"]).path:
+                return
+            try:
+                body = json.loads(request.get("postData") or "{}")
+            except ValueError:
+                body = {}
+            call = f"{body.get('service', '?')}.{body.get('method', '?')}"
+            if not str(body.get("method", "")).startswith(READ_METHOD_PREFIXES):
+                self.calls[request_id] = {"call": call, "status": None, "done": False}
+        elif request_id not in self.calls:
+            return
+        elif method == "Network.responseReceived":
+            self.calls[request_id]["status"] = params["response"]["status"]
+        elif method == "Network.loadingFailed":
+            # Cancelled by the page itself (e.g. Save redirects away): not a gateway error
+            error = None if params.get("canceled") else params.get("errorText", "request failed")
+            self.calls[request_id].update(done=True, error=error)
+            self.last_done = time.time()
+        elif method == "Network.loadingFinished":
+            call = self.calls[request_id]
+            call.update(done=True, error=self._error_of(request_id, call["status"]))
+            self.last_done = time.time()
+
+    def _error_of(self, request_id, status):
+        """Error text of a finished write call (HTTP status or error payload), None when it succeeded."""
+        if status and status >= 400:
+            return f"HTTP {status}"
+        try:
+            body = self.bus.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            payload = json.loads(body.get("body") or "{}")
+        except Exception as e:
+            self.logger.debug(f"[COMMIT] Response body of {request_id} unavailable: {e}")
+            return None
+        if isinstance(payload, dict) and (payload.get("errors") or payload.get("status") is False):
+            return str(payload.get("errors") or payload)
+        return None
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
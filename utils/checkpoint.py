@@ -0,0 +1,84 @@
+"""
+Per-gateway checkpoint of the UI pipeline.
+
+After every completed step the step name and the context needed to continue (current base URL
+after the LAN change, VAP split state) are written to checkpoints/<gateway>.json, so a run that
+failed mid-way can be resumed with --resume at the first incomplete step instead of from login.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from utils.config import Config
+from utils.logger import Logger
+
+
+class Checkpoint:
+    """Completed steps + resume context of one gateway, persisted atomically after each step."""
+
+    def __init__(self, gateway_name: str, state_fingerprint: str = ""):
+        self.path = os.path.join(Config.CHECKPOINT_DIR, f"{gateway_name}.json")
+        self.gateway_name = gateway_name
+        self.state_fingerprint = state_fingerprint
+        self.completed = []
+        self.context = {}
+        self.logger = Logger().get_logger()
+
+    def load(self) -> bool:
+        """
+        Loads a previous checkpoint. Returns False (and starts empty) when there is none or when it
+        was written for a different desired state.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.logger.info(f"[CHECKPOINT] No checkpoint for {self.gateway_name}. Starting from the first step.")
+            return False
+
+        if data.get("state_fingerprint") != self.state_fingerprint:
+            self.logger.warning(f"[CHECKPOINT] {self.path} was written for another desired state. Ignoring it.")
+            return False
+
+        self.completed = data.get("completed", [])
+        self.context = data.get("context", {})
+        self.logger.info(f"[CHECKPOINT] Resuming {self.gateway_name}: {len(self.completed)} step(s) already "
+                         f"completed {self.completed}, context {self.context}")
+        return True
+
+    def is_done(self, step: str) -> bool:
+        return step in self.completed
+
+    def mark_done(self, step: str, **context):
+        """Records a completed step and updates the resume context."""
+        if step not in self.completed:
+            self.completed.append(step)
+        self.context.update(context)
+        self._save()
+
+    def clear(self):
+        """Removes the checkpoint (the pipeline finished, nothing left to resume)."""
+        self.completed, self.context = [], {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _save(self):
+        """Atomic write: a crash while saving must not corrupt the previous checkpoint."""
+        os.makedirs(Config.CHECKPOINT_DIR, exist_ok=True)
+        data = {
+            "gateway": self.gateway_name,
+            "state_fingerprint": self.state_fingerprint,
+            "completed": self.completed,
+            "context": self.context,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def state_fingerprint(state) -> str:
+    """Short hash of the desired-state values, so a checkpoint is never resumed against other targets."""
+    payload = json.dumps(state.parameters(), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
@@ -10,3 +10,77 @@ class Config:
     PASSWORD = os.getenv("PASSWORD", "sah")
     TIMEOUT = int(os.getenv("TIMEOUT", 10))
     HEADLESS = os.getenv("HEADLESS", "False").lower() == "true"
+    SCREENSHOT_DIR = os.getenv("SCREENSHOT_DIR", "screenshots")
+    # Screenshots are written by a background thread (bounded queue) instead of the automation thread
+    EVIDENCE_ASYNC = os.getenv("EVIDENCE_ASYNC", "True").lower() == "true"
+    EVIDENCE_QUEUE_SIZE = int(os.getenv("EVIDENCE_QUEUE_SIZE", 16))
+    # Which screenshots are kept ("none", "failures", "key-steps", "all") and how they are encoded:
+    # png | jpeg | webp (quality 0-100 for the lossy formats), step shots clipped to the page content
+    EVIDENCE_LEVEL = os.getenv("EVIDENCE_LEVEL", "all")
+    EVIDENCE_FORMAT = os.getenv("EVIDENCE_FORMAT", "png")
+    EVIDENCE_QUALITY = int(os.getenv("EVIDENCE_QUALITY", 70))
+    EVIDENCE_CLIP = os.getenv("EVIDENCE_CLIP", "False").lower() == "true"
+    # Content-addressed evidence store shared by all gateways: exact + perceptual (dHash) dedup,
+    # max differing hash bits for "visually identical", thumbnail width (px)
+    EVIDENCE_STORE = os.getenv("EVIDENCE_STORE", "False").lower() == "true"
+    EVIDENCE_STORE_DIR = os.getenv("EVIDENCE_STORE_DIR", os.path.join("screenshots", "store"))
+    EVIDENCE_PHASH_DISTANCE = int(os.getenv("EVIDENCE_PHASH_DISTANCE", 2))
+    EVIDENCE_THUMB_WIDTH = int(os.getenv("EVIDENCE_THUMB_WIDTH", 320))
+    # Video of each gateway's UI run from the browser's CDP screencast (frames: JPEG quality, max width)
+    VIDEO_RECORDING = os.getenv("VIDEO_RECORDING", "False").lower() == "true"
+    VIDEO_DIR = os.getenv("VIDEO_DIR", "recordings")
+    VIDEO_FPS = float(os.getenv("VIDEO_FPS", 8.0))
+    VIDEO_QUALITY = int(os.getenv("VIDEO_QUALITY", 60))
+    VIDEO_MAX_WIDTH = int(os.getenv("VIDEO_MAX_WIDTH", 1280))
+    VIDEO_QUEUE_SIZE = int(os.getenv("VIDEO_QUEUE_SIZE", 64))
+    # Frames changing at most this share of (thumbnail) pixels are skipped. 0 = only frames with no
+    # visible change: a one-field edit (new SSID) changes well under 0.1% of the picture
+    VIDEO_DIFF_THRESHOLD = float(os.getenv("VIDEO_DIFF_THRESHOLD", 0.0))
+    # Flight recorder: keep only the last N seconds in memory, saved to VIDEO_DIR when a step fails
+    FLIGHT_RECORDER = os.getenv("FLIGHT_RECORDER", "False").lower() == "true"
+    FLIGHT_RECORDER_SECONDS = float(os.getenv("FLIGHT_RECORDER_SECONDS", 30))
+    # Fleet mode: max concurrent gateways (one Chrome per worker). 0 = one per CPU core.
+    FLEET_WORKERS = int(os.getenv("FLEET_WORKERS", 0))
+    # Warm browser pool (fleet workers): browsers per worker, recycle after N gateways or RSS (MB, needs psutil)
+    DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", 1))
+    DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", 10))
+    DRIVER_MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", 1500))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "chrome_profiles")
+    # Chrome/chromedriver resolution (empty = auto-detect); resolved driver is cached per Chrome binary
+    CHROME_BINARY = os.getenv("CHROME_BINARY", "")
+    CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+    DRIVER_CACHE_FILE = os.getenv("DRIVER_CACHE_FILE", os.path.join(".driver_cache", "chromedriver.json"))
+    # Declarative target configuration and how it is applied: "ui" (page objects), "dm" (ubus-cli) or "api"
+    DESIRED_STATE_FILE = os.getenv("DESIRED_STATE_FILE", "desired_state.json")
+    APPLY_MODE = os.getenv("APPLY_MODE", "ui")
+    # Read the gateway's current values first and only apply the sections that differ
+    DIFF_BEFORE_APPLY = os.getenv("DIFF_BEFORE_APPLY", "True").lower() == "true"
+    # Passwords/passphrases cannot be read back: only re-sent when their section differs, or with this
+    FORCE_CREDENTIALS = os.getenv("FORCE_CREDENTIALS", "False").lower() == "true"
+    # Per-gateway checkpoints of completed pipeline steps (used by --resume)
+    CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "checkpoints")
+    # Page navigation: "hash" changes the route inside the loaded app, "full" always reloads (driver.get)
+    NAVIGATION_MODE = os.getenv("NAVIGATION_MODE", "hash")
+    # Readiness probe after the LAN IP change: hard deadline (s), and whether SSH must answer too
+    REACHABILITY_TIMEOUT = int(os.getenv("REACHABILITY_TIMEOUT", 90))
+    REACHABILITY_CHECK_SSH = os.getenv("REACHABILITY_CHECK_SSH", "False").lower() == "true"
+    # Reuse the web session (cookies + storage token) of a previous login per gateway address
+    SESSION_CACHE = os.getenv("SESSION_CACHE", "True").lower() == "true"
+    SESSION_CACHE_FILE = os.getenv("SESSION_CACHE_FILE", os.path.join(".session_cache", "sessions.json"))
+    SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", 1800))
+    # Gateway HTTP/JSON data-model API (the web UI's own backend) and per-step backend overrides
+    API_ENDPOINT = os.getenv("API_ENDPOINT", "/ws")
+    API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", 4))
+    STEP_BACKENDS = os.getenv("STEP_BACKENDS", "")
+    # Page-load wait: "spinner" polls spinner classes, "network" waits for NETWORK_IDLE_MS without
+    # in-flight requests to the gateway (CDP network events via the performance log)
+    WAIT_STRATEGY = os.getenv("WAIT_STRATEGY", "spinner")
+    NETWORK_IDLE_MS = int(os.getenv("NETWORK_IDLE_MS", 500))
+    # Apply/Save completion from the backend's commit responses (CDP) instead of the UI reaction
+    COMMIT_DETECTION = os.getenv("COMMIT_DETECTION", "False").lower() == "true"
+    # Browser resource policy: "lean" blocks BLOCKED_RESOURCES (CDP) and disables background Chrome
+    # services, "off" loads everything. RESOURCE_STATS logs requests/bytes per page navigation.
+    # Fonts are not blocked: the UI's controls (f-icon_select-down, f-icon_add, ...) are icon-font glyphs
+    RESOURCE_POLICY = os.getenv("RESOURCE_POLICY", "off")
+    BLOCKED_RESOURCES = os.getenv("BLOCKED_RESOURCES", "*.png,*.jpg,*.jpeg,*.gif,*.webp,*.ico,*.mp4")
+    RESOURCE_STATS = os.getenv("RESOURCE_STATS", "False").lower() == "true"
@@ -0,0 +1,101 @@
+"""
+Declarative desired-state configuration.
+
+The target gateway configuration lives in a JSON file (default: desired_state.json) grouped by
+pipeline section, each section mapping TR-181 'Device.*' paths to values:
+
+    {"wifi24": {"description": "...", "parameters": {"Device.WiFi.SSID.vap2g0priv.SSID": "amine_prpl_24"}}}
+
+The same file drives both backends: DMClient applies it over ubus-cli in one batched session, and the
+UI steps take their values from it (LAN addressing, SSIDs, passphrases, security modes, channels,
+timezone, firewall level, DynDNS, guest SSID, admin password). Values the UI maps to a widget
+(timezone, firewall level) must have an entry in the page object, or their step fails. MAC filtering
+and the device list keep the UI's fixed Allow -> Disable and first-device sequence.
+"""
+import json
+from utils.config import Config
+
+
+class DesiredState:
+    """Loaded desired-state file with helpers to look up values and build DM commands."""
+
+    # Sections whose change moves the gateway (the SSH session drops), so they are applied last
+    APPLY_LAST = ["lan"]
+
+    def __init__(self, sections: dict):
+        self.sections = sections
+        # Re-send sections holding write-only paths even when their readable values match
+        self.force_write_only = Config.FORCE_CREDENTIALS
+
+    @classmethod
+    def load(cls, path=None):
+        """Loads the desired state from path (default: Config.DESIRED_STATE_FILE)."""
+        with open(path or Config.DESIRED_STATE_FILE, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def section_names(self):
+        """Section names in apply order (APPLY_LAST sections at the end)."""
+        names = [name for name in self.sections if name not in self.APPLY_LAST]
+        return names + [name for name in self.APPLY_LAST if name in self.sections]
+
+    def parameters(self, sections=None) -> dict:
+        """Returns {path: value} for the given sections (default: all, in apply order)."""
+        params = {}
+        for name in sections or self.section_names():
+            params.update(self.sections[name]["parameters"])
+        return params
+
+    def value(self, path: str):
+        """Returns the desired value of a data-model path (searched across all sections)."""
+        for section in self.sections.values():
+            if path in section["parameters"]:
+                return section["parameters"][path]
+        raise KeyError(f"{path} is not defined in the desired state.")
+
+    def override(self, path: str, value):
+        """Replaces the desired value of an existing path (e.g. per-gateway LAN addressing)."""
+        section = self.section_of(path)
+        if section is None:
+            raise KeyError(f"{path} is not defined in the desired state.")
+        self.sections[section]["parameters"][path] = value
+
+    def diff(self, current: dict, sections=None) -> dict:
+        """
+        Compares current {path: value} readings against the desired state.
+        Returns {section: {path: (desired, current)}} for every section that still needs applying,
+        in apply order. Paths absent from current (write-only, e.g. passwords) cannot be compared: the
+        readable paths decide, so a rerun without changes stays a no-op. With force_write_only every
+        section holding such a path is returned as well (credentials re-sent on request).
+        """
+        drift = {}
+        for name in sections or self.section_names():
+            params = self.sections[name]["parameters"]
+            readable = [path for path in params if path in current]
+            changed = {path: (params[path], current[path]) for path in readable
+                       if str(params[path]) != current[path]}
+            if changed or (self.force_write_only and len(readable) < len(params)):
+                drift[name] = changed
+        return drift
+
+    def section_of(self, path: str):
+        for name, section in self.sections.items():
+            if path in section["parameters"]:
+                return name
+        return None
+
+
+# Write-only parameters: the gateway returns them empty/masked, so they are never read back
+WRITE_ONLY_MARKERS = ["Password", "Passphrase"]
+
+
+def readable_paths(paths) -> list:
+    """Drops write-only parameters (passwords/passphrases read back empty or masked)."""
+    return [p for p in paths if not any(m in p for m in WRITE_ONLY_MARKERS)]
+
+
+def format_set_command(path: str, value) -> str:
+    """Builds a ubus-cli set command, quoting values that contain spaces or special characters."""
+    value = str(value)
+    if value == "" or any(c in value for c in ' "\'<>;&|'):
+        value = '"' + value.replace('"', '\\"') + '"'
+    return f"{path}={value}"
@@ -0,0 +1,81 @@
+"""
+Direct DevTools Protocol connection to the page target of a WebDriver session.
+
+driver.execute_cdp_cmd can send commands but never delivers events, and the performance log is
+drained by CdpEventBus on the automation thread. Streams such as Page.screencastFrame need their
+own websocket: chromedriver reports the browser's debugger address, each browser has its own,
+so concurrent browsers never mix their events.
+"""
+import itertools
+import json
+import threading
+import urllib.request
+import websocket  # websocket-client, installed with selenium
+from utils.logger import Logger
+
+
+class DevToolsConnection:
+    """
+    CDP websocket to one page target. Events are handed to on_event(method, params) on a reader thread.
+
+    Usage:
+        conn = DevToolsConnection(driver, on_event=handler)
+        conn.send("Page.startScreencast", {"format": "jpeg"})
+        conn.close()
+    """
+
+    def __init__(self, driver, on_event=None, timeout=5):
+        self.logger = Logger().get_logger()
+        self.on_event = on_event
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._replies = {}  # id -> [threading.Event, reply]
+        self._send_lock = threading.Lock()
+
+        address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        with urllib.request.urlopen(f"http://{address}/json", timeout=timeout) as response:
+            pages = [t for t in json.load(response) if t.get("type") == "page"]
+        # chromedriver window handles are DevTools target ids
+        handle = driver.current_window_handle
+        target = next((t for t in pages if t["id"] == handle), pages[0])
+        # No Origin header: Chrome 111+ rejects websocket origins that are not allow-listed
+        self.ws = websocket.create_connection(target["webSocketDebuggerUrl"], timeout=timeout, suppress_origin=True)
+        self.ws.settimeout(None)
+        self.reader = threading.Thread(target=self._read, name="devtools-reader", daemon=True)
+        self.reader.start()
+
+    def send(self, method, params=None, wait=False):
+        """Sends a command. wait=True blocks for its result (None on timeout)."""
+        message_id = next(self._ids)
+        if wait:
+            self._replies[message_id] = [threading.Event(), None]
+        with self._send_lock:
+            self.ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+        if not wait:
+            return None
+        event, _ = self._replies[message_id]
+        event.wait(self.timeout)
+        return self._replies.pop(message_id)[1]
+
+    def close(self):
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+        self.reader.join(timeout=self.timeout)
+
+    def _read(self):
+        while True:
+            try:
+                message = json.loads(self.ws.recv())
+            except (websocket.WebSocketException, OSError, ValueError):
+                return  # closed (browser quit or close())
+            if "method" in message:
+                if self.on_event:
+                    try:
+                        self.on_event(message["method"], message.get("params", {}))
+                    except Exception as e:
+                        self.logger.debug(f"[CDP] Event handler failed for {message['method']}: {e}")
+            elif message.get("id") in self._replies:
+                self._replies[message["id"]][1] = message.get("result", message.get("error"))
+                self._replies[message["id"]][0].set()
@@ -2,8 +2,11 @@
 DM Client — SSH fallback via paramiko + ubus-cli.
 Used when WebUI automation fails to configure a parameter.
 """
+import re
+import socket
 import time
 import paramiko
+from utils.desired_state import format_set_command, readable_paths
 from utils.logger import Logger
 
 
@@ -15,6 +18,9 @@ class DMClient:
     Usage:
         with DMClient() as dm:
             dm.set_wifi_ssids("amine_prpl_24", "amine_prpl_5ghz", "amine_prpl_6ghz")
+
+        with DMClient(host="192.168.1.1") as dm:
+            dm.apply_desired_state(DesiredState.load())
     """
 
     SSH_HOST     = "192.168.3.5"
@@ -23,9 +29,18 @@ class DMClient:
     SSH_PORT     = 22
     TIMEOUT      = 15  # seconds per command
 
-    def __init__(self):
+    # Prompts are detected instead of sleeping: login shell ("root@prplOS:~# ") and
+    # ubus-cli ("root - ubus: - [ubus-cli] (0)\n > ")
+    SHELL_PROMPT = re.compile(r"[#$] ?$")
+    UBUS_PROMPT  = re.compile(r"[^\n]*\[ubus-cli\][^\n]*\r?\n\s*> ?")
+    PIPELINE_DEPTH = 8  # max commands in flight before waiting for their prompts
+    ERROR_MARKERS = ["error", "failed", "invalid", "unknown"]
+    def __init__(self, host=None):
         self.logger = Logger().get_logger()
+        self.host = host or self.SSH_HOST
         self.client = None
+        self.channel = None  # persistent ubus-cli session
+        self._pending = ""   # bytes read past the last prompt (next pipelined response)
 
     # ------------------------------------------------------------------
     # Context manager support
@@ -44,11 +59,11 @@ class DMClient:
 
     def connect(self):
         """Open SSH connection to the HGW."""
-        self.logger.info(f"[DM] Connecting to {self.SSH_HOST} via SSH...")
+        self.logger.info(f"[DM] Connecting to {self.host} via SSH...")
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.client.connect(
-            hostname=self.SSH_HOST,
+            hostname=self.host,
             port=self.SSH_PORT,
             username=self.SSH_USER,
             password=self.SSH_PASSWORD,
@@ -60,18 +75,75 @@ class DMClient:
 
     def disconnect(self):
         """Close SSH connection."""
+        self.close_session()
         if self.client:
             self.client.close()
             self.client = None
             self.logger.info("[DM] SSH connection closed.")
 
+    # ------------------------------------------------------------------
+    # Persistent ubus-cli session
+    # ------------------------------------------------------------------
+
+    def open_session(self):
+        """Opens the interactive shell and starts ubus-cli once; reused by every command."""
+        if self.session_alive():
+            return self.channel
+        self.close_session()
+
+        self.logger.info("[DM] Opening persistent ubus-cli session...")
+        start = time.time()
+        self._pending = ""
+        self.channel = self.client.invoke_shell()
+        self._read_until(self.SHELL_PROMPT)
+
+        self.channel.send("ubus-cli\n")
+        output = self._read_until(self.UBUS_PROMPT)
+        self.logger.info(f"[DM] ubus-cli ready in {time.time() - start:.1f}s. Output: {output.strip()[:200]}")
+        return self.channel
+
+    def close_session(self):
+        """Exits ubus-cli and closes the shell channel."""
+        if self.channel:
+            try:
+                self.channel.send("exit\n")
+            except Exception:
+                pass
+            self.channel.close()
+            self.channel = None
+
+    def session_alive(self):
+        return bool(self.channel) and not self.channel.closed and not self.channel.exit_status_ready()
+
     # ------------------------------------------------------------------
     # Core: run commands inside ubus-cli interactive shell
     # ------------------------------------------------------------------
 
+    def execute(self, commands: list[str]) -> list[tuple[str, str]]:
+        """
+        Runs DM commands in the persistent ubus-cli session and returns [(command, response), ...].
+        Commands are pipelined (up to PIPELINE_DEPTH in flight); each response is read up to its
+        prompt, so latency follows the gateway's real response time. Raises on timeout/closed session.
+        """
+        if not self.client:
+            raise ConnectionError("SSH client not connected.")
+        self.open_session()
+
+        results = []
+        for offset in range(0, len(commands), self.PIPELINE_DEPTH):
+            batch = commands[offset:offset + self.PIPELINE_DEPTH]
+            self.channel.send("".join(f"{cmd}\n" for cmd in batch))
+            for cmd in batch:
+                # Responses arrive in order: one prompt terminates each command
+                output = self._read_until(self.UBUS_PROMPT)
+                response = self.UBUS_PROMPT.sub("", output).replace(cmd, "", 1).strip()
+                self.logger.info(f"[DM] {cmd} → {response[:200]}")
+                results.append((cmd, response))
+        return results
+
     def run_ubus_commands(self, commands: list[str]) -> bool:
         """
-        Opens an interactive ubus-cli shell and runs a list of DM commands.
+        Runs a list of DM commands in the persistent ubus-cli session.
         Each command is a string like: Device.WiFi.SSID.vap2g0priv.SSID=my_ssid
 
         Returns True if all commands executed without error, False otherwise.
@@ -81,47 +153,100 @@ class DMClient:
             return False
 
         try:
-            self.logger.info(f"[DM] Opening ubus-cli shell to run {len(commands)} command(s)...")
-            channel = self.client.invoke_shell()
-            channel.settimeout(self.TIMEOUT)
-
-            # Wait for shell prompt
-            time.sleep(1)
-            self._flush(channel)
-
-            # Launch ubus-cli
-            channel.send("ubus-cli\n")
-            time.sleep(2)
-            output = self._read(channel)
-            self.logger.info(f"[DM] ubus-cli started. Output: {output.strip()[:200]}")
-
-            # Send each DM command
-            for cmd in commands:
-                self.logger.info(f"[DM] Sending command: {cmd}")
-                channel.send(f"{cmd}\n")
-                time.sleep(1.5)
-                result = self._read(channel)
-                self.logger.info(f"[DM] Response: {result.strip()[:200]}")
-
+            self.logger.info(f"[DM] Running {len(commands)} command(s) in ubus-cli session...")
+            start = time.time()
+            ok = True
+            for cmd, response in self.execute(commands):
                 # Basic error detection
-                if any(err in result.lower() for err in ["error", "failed", "invalid", "unknown"]):
-                    self.logger.error(f"[DM] Command failed: {cmd} → {result.strip()[:200]}")
-                    channel.send("exit\n")
-                    channel.close()
-                    return False
+                if any(err in response.lower() for err in self.ERROR_MARKERS):
+                    self.logger.error(f"[DM] Command failed: {cmd} → {response[:200]}")
+                    ok = False
 
-            # Exit ubus-cli cleanly
-            channel.send("exit\n")
-            time.sleep(0.5)
-            channel.close()
-
-            self.logger.info("[DM] All ubus-cli commands executed successfully.")
-            return True
+            if ok:
+                self.logger.info(f"[DM] All ubus-cli commands executed successfully in {time.time() - start:.1f}s.")
+            return ok
 
         except Exception as e:
             self.logger.error(f"[DM] ubus-cli execution failed: {e}")
+            # The session may be half-way through a response; start clean next time
+            self.close_session()
+            return False
+
+    def get_parameters(self, paths: list[str]) -> dict:
+        """Reads DM parameters in one pipelined batch. Returns {path: value} (None if not returned)."""
+        values = {}
+        for cmd, response in self.execute([f"{path}?" for path in paths]):
+            path = cmd[:-1]
+            match = re.search(re.escape(path) + r"\s*=\s*(.*)", response)
+            values[path] = match.group(1).strip().strip('"') if match else None
+        return values
+
+    # ------------------------------------------------------------------
+    # Declarative desired state
+    # ------------------------------------------------------------------
+
+    def diff_desired_state(self, state, sections=None) -> dict:
+        """
+        Reads every readable parameter of the desired state in one pipelined batch and returns the
+        sections that differ (see DesiredState.diff).
+        """
+        current = self.get_parameters(readable_paths(state.parameters(sections)))
+        drift = state.diff(current, sections)
+        for name, changed in drift.items():
+            for path, (want, got) in changed.items():
+                self.logger.info(f"[DM] Drift in {name}: {path} is '{got}', want '{want}'")
+            if not changed:
+                self.logger.info(f"[DM] {name}: credentials re-sent on request (write-only, cannot be compared)")
+        in_sync = [n for n in (sections or state.section_names()) if n not in drift]
+        self.logger.info(f"[DM] {len(drift)} section(s) to apply, {len(in_sync)} already in desired state: {in_sync}")
+        return drift
+
+    def apply_desired_state(self, state, sections=None, verify=True, only_changed=False) -> bool:
+        """
+        Applies a DesiredState in one batched ubus-cli session, then reads the values back.
+        Sections in DesiredState.APPLY_LAST (LAN) are sent at the very end: they move the gateway,
+        so a dropped session afterwards is expected and not treated as a failure.
+        only_changed: read the current values first and only send the sections that differ.
+        """
+        names = sections or state.section_names()
+        if only_changed:
+            names = list(self.diff_desired_state(state, names))
+            if not names:
+                self.logger.info("[DM] Gateway already in desired state. Nothing to apply.")
+                return True
+        regular = [n for n in names if n not in state.APPLY_LAST]
+        last = [n for n in names if n in state.APPLY_LAST]
+
+        params = state.parameters(regular)
+        self.logger.info(f"[DM] Applying desired state: {len(params)} parameter(s) in {regular}")
+        commands = [format_set_command(path, value) for path, value in params.items()]
+        if commands and not self.run_ubus_commands(commands):
+            return False
+
+        if verify and params and not self.verify_parameters(params):
             return False
 
+        if last:
+            lan_params = state.parameters(last)
+            self.logger.info(f"[DM] Applying {last} last (gateway address may change)...")
+            try:
+                self.execute([format_set_command(path, value) for path, value in lan_params.items()])
+            except (ConnectionError, TimeoutError, OSError) as e:
+                self.logger.info(f"[DM] Session dropped after {last} change, as expected: {e}")
+                self.close_session()
+        return True
+
+    def verify_parameters(self, expected: dict) -> bool:
+        """Reads expected paths back and logs every mismatch. Write-only parameters are skipped."""
+        readable = readable_paths(expected)
+        actual = self.get_parameters(readable)
+        mismatches = {p: (expected[p], actual[p]) for p in readable if str(expected[p]) != actual[p]}
+        for path, (want, got) in mismatches.items():
+            self.logger.error(f"[DM] Verification mismatch: {path} expected '{want}', got '{got}'")
+        if not mismatches:
+            self.logger.info(f"[DM] Verified {len(readable)} parameter(s).")
+        return not mismatches
+
     # ------------------------------------------------------------------
     # WiFi SSID fallback
     # ------------------------------------------------------------------
@@ -152,14 +277,27 @@ class DMClient:
     # Helpers
     # ------------------------------------------------------------------
 
-    def _read(self, channel, delay: float = 0.5) -> str:
-        """Read available output from the channel."""
-        time.sleep(delay)
-        output = ""
-        while channel.recv_ready():
-            output += channel.recv(4096).decode("utf-8", errors="ignore")
-        return output
-
-    def _flush(self, channel):
-        """Discard any pending output."""
-        self._read(channel)
\ No newline at end of file
+    def _read_until(self, prompt, timeout: float = None) -> str:
+        """
+        Reads from the session as data arrives until prompt matches, then returns everything read.
+        Bytes after the prompt (next pipelined response) are kept for the following call.
+        """
+        timeout = timeout or self.TIMEOUT
+        deadline = time.time() + timeout
+        buffer, self._pending = self._pending, ""
+        while True:
+            match = prompt.search(buffer)
+            if match:
+                self._pending = buffer[match.end():]
+                return buffer[:match.end()]
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"No prompt within {timeout}s. Last output: {buffer.strip()[-200:]!r}")
+            self.channel.settimeout(remaining)
+            try:
+                chunk = self.channel.recv(4096)
+            except socket.timeout:
+                continue
+            if not chunk:
+                raise ConnectionError("ubus-cli session closed by the gateway.")
+            buffer += chunk.decode("utf-8", errors="ignore")
@@ -1,24 +1,268 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
 from utils.config import Config
+from utils.driver_resolver import resolve_chromedriver
+from utils.logger import Logger
+
+try:
+    import psutil  # Optional: only needed for the RSS-based recycling of pooled browsers
+except ImportError:
+    psutil = None
+
+# Chrome services that only cost CPU/network on an automation box (lean resource policy)
+LEAN_CHROME_ARGS = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-features=Translate,OptimizationHints,MediaRouter",
+    "--metrics-recording-only",
+    "--no-first-run",
+]
+
+def get_driver(driver_path=None, user_data_dir=None):
+    """
+    Initializes and returns a Chrome WebDriver instance.
+    driver_path: already-resolved chromedriver (default: offline cache, see utils/driver_resolver.py).
+    user_data_dir: persistent Chrome profile directory (keeps the HTTP cache warm between launches).
+    """
+    chrome_binary, cached_driver_path = resolve_chromedriver()
 
-def get_driver():
-    """Initializes and returns a Chrome WebDriver instance."""
     options = Options()
     options.add_argument("--start-maximized")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    options.binary_location = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-    
+    options.binary_location = chrome_binary
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+    if Config.RESOURCE_POLICY == "lean":
+        for arg in LEAN_CHROME_ARGS:
+            options.add_argument(arg)
+
     if Config.HEADLESS:
         options.add_argument("--headless=new")  # nouveau flag headless Chrome 112+
         options.add_argument("--disable-gpu")
         options.add_argument("--window-size=1920,1080")
 
-    # Force fresh download matching installed Chrome version
-    service = Service(ChromeDriverManager().install())
+    if Config.WAIT_STRATEGY == "network" or Config.COMMIT_DETECTION or Config.RESOURCE_STATS:
+        # CDP Network events through the performance log (drained by utils/cdp_events.py)
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    # Driver matching the installed Chrome, resolved once and cached on disk (no network lookup)
+    service = Service(driver_path or cached_driver_path)
     driver = webdriver.Chrome(service=service, options=options)
-    return driver
\ No newline at end of file
+    apply_resource_policy(driver)
+    return driver
+
+
+def apply_resource_policy(driver):
+    """
+    Lean policy: blocks the non-essential asset types of the gateway UI (images, media) with
+    CDP request blocking and keeps the HTTP cache on, so the embedded web server of the gateway only
+    serves the app itself, once per profile.
+    """
+    if Config.RESOURCE_POLICY != "lean":
+        return
+    patterns = [p.strip() for p in Config.BLOCKED_RESOURCES.split(",") if p.strip()]
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+    Logger().get_logger().info(f"[DRIVER] Lean resource policy: blocking {len(patterns)} URL pattern(s).")
+
+
+class DriverPool:
+    """
+    Pool of pre-launched Chrome instances handed out to pipeline runs.
+
+    Between gateways a browser is reset (tabs, cookies, storage) instead of relaunched, and it is
+    recycled after max_uses hand-outs or once its process tree exceeds max_rss_mb.
+
+    Usage:
+        pool = DriverPool(size=2).start()
+        with pool.driver() as driver:
+            run_pipeline(driver)
+        pool.shutdown()
+    """
+
+    def __init__(self, size=None, max_uses=None, max_rss_mb=None, profile_prefix="pool"):
+        self.size = size or Config.DRIVER_POOL_SIZE
+        self.max_uses = max_uses or Config.DRIVER_MAX_USES
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else Config.DRIVER_MAX_RSS_MB
+        self.profile_prefix = profile_prefix
+        self.logger = Logger().get_logger()
+        self.driver_path = None
+        self.idle = queue.Queue()
+        self.uses = {}   # id(driver) -> number of hand-outs
+        self.slots = {}  # id(driver) -> profile slot index
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Resolves chromedriver once and launches all browsers in parallel."""
+        _, self.driver_path = resolve_chromedriver()
+        self.logger.info(f"[POOL] Pre-launching {self.size} browser(s)...")
+        threads = [threading.Thread(target=self._launch_into_pool, args=(slot,)) for slot in range(self.size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if self.idle.empty():
+            raise RuntimeError("DriverPool could not launch any browser.")
+        self.logger.info(f"[POOL] {self.idle.qsize()} browser(s) ready.")
+        return self
+
+    def acquire(self, timeout=None):
+        """
+        Returns a healthy, clean browser; blocks until one is free (queue.Empty after timeout).
+        Raises RuntimeError as soon as no live browser is left (every relaunch of a slot failed).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                if not self.slots:
+                    raise RuntimeError("DriverPool has no live browser left.")
+            # Short waits: a browser lost by another thread's release() must not leave us blocked
+            wait = 1.0 if deadline is None else max(0, min(1.0, deadline - time.monotonic()))
+            try:
+                driver = self.idle.get(timeout=wait)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+                continue
+            if not self._is_alive(driver):
+                self.logger.warning("[POOL] Pooled browser is dead. Relaunching...")
+                driver = self._replace(driver)
+                if driver is None:
+                    continue
+            with self.lock:
+                self.uses[id(driver)] += 1
+            return driver
+
+    def release(self, driver):
+        """Resets the browser for the next gateway, or recycles it if worn out."""
+        reason = self._recycle_reason(driver)
+        if reason:
+            self.logger.info(f"[POOL] Recycling browser ({reason}).")
+            driver = self._replace(driver)
+        else:
+            try:
+                self.reset(driver)
+            except Exception as e:
+                self.logger.warning(f"[POOL] Reset failed ({e}). Relaunching browser...")
+                driver = self._replace(driver)
+        if driver is not None:
+            self.idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def reset(self, driver):
+        """Closes extra tabs and clears cookies/storage of every visited origin (HTTP cache is kept)."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+        origins = set()
+        for entry in history.get("entries", []):
+            url = entry.get("url", "")
+            if url.startswith("http"):
+                origins.add("/".join(url.split("/", 3)[:3]))
+        for origin in origins:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": origin,
+                "storageTypes": "cookies,local_storage,session_storage,indexeddb,websql,service_workers,cache_storage",
+            })
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Page.resetNavigationHistory", {})
+
+    def shutdown(self):
+        """Quits every idle browser."""
+        while not self.idle.empty():
+            driver = self.idle.get_nowait()
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.logger.info("[POOL] All pooled browsers closed.")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _launch(self, slot):
+        profile_dir = os.path.join(Config.PROFILE_DIR, f"{self.profile_prefix}_{slot}")
+        driver = get_driver(driver_path=self.driver_path, user_data_dir=profile_dir)
+        driver.get("about:blank")
+        with self.lock:
+            self.uses[id(driver)] = 0
+            self.slots[id(driver)] = slot
+        return driver
+
+    def _launch_into_pool(self, slot):
+        try:
+            self.idle.put(self._launch(slot))
+        except Exception as e:
+            self.logger.error(f"[POOL] Failed to launch browser for slot {slot}: {e}")
+
+    def _relaunch(self, driver):
+        with self.lock:
+            slot = self.slots.pop(id(driver), 0)
+            self.uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        return self._launch(slot)
+
+    def _replace(self, driver):
+        """_relaunch(driver), or None when the new browser fails to start (the pool loses that slot)."""
+        try:
+            return self._relaunch(driver)
+        except Exception as e:
+            with self.lock:
+                left = len(self.slots)
+            self.logger.error(f"[POOL] Relaunch failed ({e}). {left} browser(s) left in the pool.")
+            return None
+
+    def _is_alive(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _recycle_reason(self, driver):
+        uses = self.uses.get(id(driver), 0)
+        if uses >= self.max_uses:
+            return f"{uses} uses"
+        rss_mb = self._rss_mb(driver)
+        if self.max_rss_mb and rss_mb > self.max_rss_mb:
+            return f"RSS {rss_mb:.0f}MB > {self.max_rss_mb}MB"
+        return None
+
+    def _rss_mb(self, driver):
+        """Total RSS of chromedriver + all Chrome processes it spawned (0 if psutil is missing)."""
+        if psutil is None:
+            return 0
+        try:
+            root = psutil.Process(driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except Exception:
+            return 0
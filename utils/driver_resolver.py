@@ -0,0 +1,166 @@
+"""
+Offline chromedriver resolution.
+
+Detects the installed Chrome binary and version once, then caches the matching chromedriver path
+together with a fingerprint of the browser binary. Later launches read the cache and start with zero
+network access; the cache is only invalidated when the browser binary changes (upgrade/reinstall).
+"""
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from utils.config import Config
+from utils.logger import Logger
+
+VERSION_PATTERN = re.compile(r"\d+\.\d+\.\d+\.\d+")
+
+# Resolved (chrome_binary, chromedriver_path) for this process, so the cache file is read only once
+_resolved = None
+
+
+def find_chrome_binary():
+    """Returns the Chrome binary path: Config.CHROME_BINARY if set, else the first standard install found."""
+    if Config.CHROME_BINARY:
+        return Config.CHROME_BINARY
+
+    if sys.platform.startswith("win"):
+        candidates = [
+            os.path.join(os.environ.get(var, ""), r"Google\Chrome\Application\chrome.exe")
+            for var in ("PROGRAMFILES", "PROGRAMFILES(X86)", "LOCALAPPDATA")
+            if os.environ.get(var)
+        ]
+    elif sys.platform == "darwin":
+        candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        candidates = [shutil.which(name) for name in
+                      ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")]
+
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    raise FileNotFoundError("Chrome binary not found. Set CHROME_BINARY in the environment/.env file.")
+
+
+def detect_chrome_version(binary):
+    """
+    Returns the full Chrome version (e.g. '124.0.6367.91') without launching a browser window.
+    On Windows 'chrome.exe --version' opens a window, so the versioned folder next to it is read instead.
+    """
+    if sys.platform.startswith("win"):
+        app_dir = os.path.dirname(binary)
+        versions = [d for d in os.listdir(app_dir) if VERSION_PATTERN.fullmatch(d)]
+        if versions:
+            return max(versions, key=_version_key)
+
+    output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=15).stdout
+    match = VERSION_PATTERN.search(output)
+    if not match:
+        raise RuntimeError(f"Could not parse Chrome version from: {output.strip()!r}")
+    return match.group(0)
+
+
+def binary_fingerprint(binary):
+    """Identity of the browser binary: changes whenever Chrome is upgraded or reinstalled."""
+    stat = os.stat(binary)
+    return {"binary": os.path.abspath(binary), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def resolve_chromedriver():
+    """
+    Returns (chrome_binary, chromedriver_path).
+    Cache hit: no subprocess, no network. Cache miss: detects the Chrome version, looks for a matching
+    chromedriver already on disk (CHROMEDRIVER_PATH, webdriver-manager cache) and only downloads as a
+    last resort.
+    """
+    global _resolved
+    if _resolved:
+        return _resolved
+
+    logger = Logger().get_logger()
+    binary = find_chrome_binary()
+    fingerprint = binary_fingerprint(binary)
+    cache = _load_cache()
+
+    if cache.get("fingerprint") == fingerprint and os.path.isfile(cache.get("driver_path", "")):
+        logger.info(f"[DRIVER] Using cached chromedriver {cache['driver_path']} (Chrome {cache['version']})")
+        _resolved = (binary, cache["driver_path"])
+        return _resolved
+
+    version = detect_chrome_version(binary)
+    logger.info(f"[DRIVER] Chrome {version} detected at {binary}. Resolving matching chromedriver...")
+    driver_path = _find_local_driver(version)
+    if not driver_path:
+        # Last resort (needs network once per Chrome version)
+        from webdriver_manager.chrome import ChromeDriverManager
+        logger.info("[DRIVER] No local chromedriver matches. Downloading via ChromeDriverManager...")
+        driver_path = ChromeDriverManager(driver_version=version).install()
+
+    _save_cache({"fingerprint": fingerprint, "version": version, "driver_path": os.path.abspath(driver_path)})
+    logger.info(f"[DRIVER] Cached chromedriver {driver_path} for Chrome {version}")
+    _resolved = (binary, os.path.abspath(driver_path))
+    return _resolved
+
+
+# ------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------
+
+def _version_key(version):
+    return tuple(int(part) for part in version.split("."))
+
+
+def _driver_version(driver_path):
+    try:
+        output = subprocess.run([driver_path, "--version"], capture_output=True, text=True, timeout=15).stdout
+    except Exception:
+        return None
+    match = VERSION_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+def _find_local_driver(chrome_version):
+    """Returns an on-disk chromedriver whose major version matches Chrome, or None."""
+    major = chrome_version.split(".")[0]
+
+    if Config.CHROMEDRIVER_PATH:
+        found = _driver_version(Config.CHROMEDRIVER_PATH)
+        if found and found.split(".")[0] == major:
+            return Config.CHROMEDRIVER_PATH
+        Logger().get_logger().warning(
+            f"[DRIVER] CHROMEDRIVER_PATH {Config.CHROMEDRIVER_PATH} is {found}, Chrome is {chrome_version}. Ignoring."
+        )
+
+    # Drivers previously downloaded by webdriver-manager (~/.wdm/drivers/chromedriver/<os>/<version>/...)
+    wdm_root = os.path.join(os.path.expanduser("~"), ".wdm", "drivers", "chromedriver")
+    candidates = []
+    for path in glob.glob(os.path.join(wdm_root, "**", "chromedriver*"), recursive=True):
+        if not os.path.isfile(path) or os.path.basename(path) not in ("chromedriver", "chromedriver.exe"):
+            continue
+        match = VERSION_PATTERN.search(path)
+        if match and match.group(0).split(".")[0] == major:
+            candidates.append((_version_key(match.group(0)), path))
+    if candidates:
+        return max(candidates)[1]
+    return None
+
+
+def _load_cache():
+    try:
+        with open(Config.DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(data):
+    """Atomic write: concurrent fleet workers may resolve at the same time."""
+    cache_dir = os.path.dirname(Config.DRIVER_CACHE_FILE)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{Config.DRIVER_CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, Config.DRIVER_CACHE_FILE)
@@ -0,0 +1,161 @@
+"""
+Asynchronous screenshot evidence writer.
+
+The automation thread only grabs the screenshot bytes from the browser; decoding and writing
+them to disk happen on a background thread fed by a bounded queue (a full queue makes the caller
+wait instead of growing memory). Every image gets a line in manifest.jsonl next to it, linking
+the file to the pipeline step that took it. Config.EVIDENCE_LEVEL decides which screenshots are
+taken at all (see evidence_kind). With Config.EVIDENCE_STORE the images go to the deduplicating
+ArtifactStore and the screenshot folder only holds hard links to the stored objects.
+"""
+import base64
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from utils.artifact_store import ArtifactStore
+from utils.config import Config
+from utils.logger import Logger
+from utils.metrics import Metrics
+from utils.step_graph import current_step
+
+MANIFEST_NAME = "manifest.jsonl"
+# Screenshot names are classified by these markers (anything else is a plain 'step' shot, e.g. *_loaded)
+FAILURE_MARKERS = ("failed", "error", "unexpected_popup", "not_found", "timeout")
+KEY_STEP_MARKERS = ("_applied", "_updated", "_saved", "_added", "_configured", "verify_")
+# Kinds kept per Config.EVIDENCE_LEVEL
+LEVEL_KINDS = {
+    "none": (),
+    "failures": ("failure",),
+    "key-steps": ("failure", "key"),
+    "all": ("failure", "key", "step"),
+}
+
+
+def evidence_kind(name: str) -> str:
+    """'failure', 'key' (a change was applied) or 'step' (page loaded, intermediate state)."""
+    if any(marker in name for marker in FAILURE_MARKERS):
+        return "failure"
+    if any(marker in name for marker in KEY_STEP_MARKERS):
+        return "key"
+    return "step"
+
+
+def should_capture(name: str) -> bool:
+    """True when Config.EVIDENCE_LEVEL keeps screenshots of this kind."""
+    return evidence_kind(name) in LEVEL_KINDS.get(Config.EVIDENCE_LEVEL, LEVEL_KINDS["all"])
+
+
+class EvidenceWriter:
+    """
+    Process-wide background writer for screenshot evidence. Singleton like Logger and Metrics.
+
+    Usage:
+        path = EvidenceWriter().submit(driver.get_screenshot_as_base64(), "screenshots/x.png", "x")
+        EvidenceWriter().flush()   # end of a gateway run: everything is on disk
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(EvidenceWriter, cls).__new__(cls)
+                cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        self.logger = Logger().get_logger()
+        self.queue = queue.Queue(maxsize=Config.EVIDENCE_QUEUE_SIZE)
+        self.worker = None
+        self.store = None
+
+    def submit(self, image_base64: str, path: str, name: str) -> str:
+        """Queues one screenshot (base64 image from WebDriver/CDP) for writing to path. Returns path."""
+        entry = {
+            "file": os.path.basename(path),
+            "name": name,
+            "kind": evidence_kind(name),
+            "step": current_step(),
+            "url": Config.BASE_URL,
+            "taken": datetime.now().isoformat(timespec="milliseconds"),
+        }
+        if not Config.EVIDENCE_ASYNC:
+            self._write(image_base64, path, entry)
+            return path
+        self._ensure_worker()
+        start = time.time()
+        self.queue.put((image_base64, path, entry))
+        Metrics().increment("evidence_queued")
+        waited = time.time() - start
+        if waited > 0.1:
+            self.logger.debug(f"[EVIDENCE] Queue full, waited {waited:.2f}s for the writer.")
+        return path
+
+    def flush(self, timeout=60):
+        """Blocks until every queued screenshot is written (or timeout)."""
+        if not self.worker or not self.worker.is_alive():
+            return
+        end_time = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < end_time:
+            time.sleep(0.05)
+        if self.queue.unfinished_tasks:
+            self.logger.warning(f"[EVIDENCE] {self.queue.unfinished_tasks} screenshot(s) still pending after {timeout}s.")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, name="evidence-writer", daemon=True)
+                self.worker.start()
+
+    def _run(self):
+        while True:
+            image_base64, path, entry = self.queue.get()
+            try:
+                self._write(image_base64, path, entry)
+            except Exception as e:
+                self.logger.error(f"[EVIDENCE] Failed to write {path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, image_base64, path, entry):
+        """Decodes and writes one image, then appends its manifest line."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        data = base64.b64decode(image_base64)
+        if Config.EVIDENCE_STORE:
+            self._store(data, path, entry)
+        else:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            Metrics().increment("evidence_bytes", len(data))
+        entry["bytes"] = len(data)
+        with open(os.path.join(directory, MANIFEST_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _store(self, data, path, entry):
+        """
+        Puts the image in the ArtifactStore and hard-links the stored object at path, so the
+        screenshot folder keeps its layout without extra bytes. Only plain 'step' shots are
+        deduplicated perceptually: a key or failure shot may differ from an earlier one by a single
+        field value (e.g. the new SSID), so it is only merged with byte-identical images.
+        """
+        if self.store is None:
+            self.store = ArtifactStore()
+        ref = self.store.put(data, os.path.splitext(path)[1].lstrip("."), perceptual=entry["kind"] == "step")
+        entry.update(ref, store=self.store.root)
+        Metrics().increment(f"evidence_{ref['dedup']}")
+        if ref["dedup"] == "new":
+            Metrics().increment("evidence_bytes", len(data))
+        try:
+            os.link(self.store.path(ref), path)
+        except OSError as e:
+            self.logger.debug(f"[EVIDENCE] No link for {path} ({e}). The manifest references {ref['object']}.")
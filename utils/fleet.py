@@ -0,0 +1,176 @@
+"""
+Fleet runner — executes the configuration pipeline against many gateways concurrently.
+Each gateway runs in its own worker process with its own WebDriver, log file and screenshot folder.
+"""
+import csv
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from utils.config import Config
+from utils.logger import Logger
+from utils.metrics import Metrics
+from utils.evidence import EvidenceWriter
+
+
+def load_inventory(path):
+    """
+    Loads the gateway inventory from a JSON or CSV file.
+
+    JSON: a list of objects, e.g. [{"name": "gw01", "base_url": "http://192.168.1.1"}, ...]
+    CSV:  a header row with at least 'name' and 'base_url' columns.
+    Any extra keys (e.g. 'lan_ip') are passed through to the pipeline untouched.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            gateways = [dict(row) for row in csv.DictReader(f)]
+    else:
+        with open(path, encoding="utf-8") as f:
+            gateways = json.load(f)
+
+    names = set()
+    for index, gateway in enumerate(gateways):
+        if not gateway.get("base_url"):
+            raise ValueError(f"Inventory entry {index} has no 'base_url': {gateway}")
+        gateway.setdefault("name", f"gw{index + 1:02d}")
+        if gateway["name"] in names:
+            raise ValueError(f"Duplicate gateway name in inventory: {gateway['name']}")
+        names.add(gateway["name"])
+    return gateways
+
+
+# Per-worker-process browser pool, created by _init_worker and reused across gateways
+_worker_pool = None
+
+
+def _init_worker(worker_ids, browser=True):
+    """
+    Worker initializer: pre-launches this worker's browser(s) while the parent is still dispatching.
+    Each worker takes a stable id so its Chrome profile directory (and HTTP cache) survives between runs.
+    browser=False (HTTP API only runs): no browser is launched at all.
+    """
+    from utils.driver_factory import DriverPool
+
+    global _worker_pool
+    worker_id = worker_ids.get()
+    if not browser:
+        return
+    _worker_pool = DriverPool(profile_prefix=f"worker{worker_id}").start()
+    # Quit the pooled browsers when the worker process exits
+    multiprocessing.util.Finalize(None, _worker_pool.shutdown, exitpriority=10)
+
+
+def _run_gateway(pipeline, gateway, run_id):
+    """
+    Worker entry point: isolates Config, logging and screenshots for one gateway,
+    then runs the pipeline with a browser from the worker's warm pool.
+    """
+    name = gateway["name"]
+    log_path = os.path.join("logs", run_id, f"{name}.log")
+    logger = Logger().get_logger()
+    Logger().use_log_file(log_path, tag=name)
+
+    Config.BASE_URL = gateway["base_url"].rstrip("/")
+    Config.SCREENSHOT_DIR = os.path.join("screenshots", run_id, name)
+
+    result = {
+        "name": name,
+        "base_url": gateway["base_url"],
+        "status": "passed",
+        "duration": 0.0,
+        "error": "",
+        "log": log_path,
+        "screenshots": Config.SCREENSHOT_DIR,
+    }
+
+    Metrics().reset()
+    start = time.time()
+    driver = None
+    try:
+        logger.info(f"[FLEET] Worker {os.getpid()} starting gateway {name} ({Config.BASE_URL})")
+        driver = _worker_pool.acquire(timeout=300) if _worker_pool else None
+        pipeline(driver, gateway)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        logger.error(f"[FLEET] Gateway {name} failed: {e}\n{traceback.format_exc()}")
+    finally:
+        if driver:
+            # Reset (or recycle) instead of quitting so the next gateway skips the cold start
+            _worker_pool.release(driver)
+        EvidenceWriter().flush()
+        result["duration"] = round(time.time() - start, 1)
+        Metrics().log_summary()
+        logger.info(f"[FLEET] Gateway {name} finished: {result['status']} in {result['duration']}s")
+    return result
+
+
+def run_fleet(pipeline, gateways, workers=None, browser=True):
+    """
+    Runs pipeline(driver, gateway) for every gateway in a bounded process pool.
+    browser=False skips the per-worker browser pool (driver is None, e.g. HTTP API apply mode).
+    Returns the list of per-gateway result dicts (inventory order) and writes a CSV summary.
+    """
+    logger = Logger().get_logger()
+    workers = workers or Config.FLEET_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(gateways)))
+    run_id = datetime.now().strftime("fleet_%Y-%m-%d_%H-%M-%S")
+
+    logger.info(f"[FLEET] Running {len(gateways)} gateway(s) with {workers} worker(s). Run id: {run_id}")
+
+    results = {}
+    # 'spawn' gives every worker a clean Config/Logger state (and matches Windows behaviour)
+    context = multiprocessing.get_context("spawn")
+    worker_ids = context.Queue()
+    for worker_id in range(workers):
+        worker_ids.put(worker_id)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(worker_ids, browser)) as pool:
+        futures = {pool.submit(_run_gateway, pipeline, gw, run_id): gw for gw in gateways}
+        for future in as_completed(futures):
+            gateway = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker process died (e.g. OOM) before it could report
+                result = {
+                    "name": gateway["name"], "base_url": gateway["base_url"], "status": "crashed",
+                    "duration": 0.0, "error": str(e), "log": "", "screenshots": "",
+                }
+            results[gateway["name"]] = result
+            logger.info(f"[FLEET] {result['name']}: {result['status']} ({result['duration']}s)")
+
+    ordered = [results[gw["name"]] for gw in gateways]
+    write_summary(ordered, os.path.join("logs", run_id, "summary.csv"))
+    log_result_table(ordered)
+    return ordered
+
+
+def write_summary(results, path):
+    """Writes the consolidated result table as CSV."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fields = ["name", "base_url", "status", "duration", "error", "log", "screenshots"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+    Logger().get_logger().info(f"[FLEET] Summary written to {path}")
+
+
+def log_result_table(results):
+    """Logs the consolidated result table."""
+    logger = Logger().get_logger()
+    header = f"{'GATEWAY':<16} {'URL':<26} {'STATUS':<8} {'TIME(s)':>8}  ERROR"
+    logger.info("=" * 60)
+    logger.info(header)
+    logger.info("-" * len(header))
+    for r in results:
+        logger.info(f"{r['name']:<16} {r['base_url']:<26} {r['status']:<8} {r['duration']:>8}  {r['error'][:80]}")
+    passed = sum(1 for r in results if r["status"] == "passed")
+    logger.info("-" * len(header))
+    logger.info(f"{passed}/{len(results)} gateway(s) passed.")
+    logger.info("=" * 60)
@@ -24,17 +24,39 @@ class Logger:
 
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
-        # File Handler
-        file_handler = logging.FileHandler(log_path)
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        # File Handler (delay=True so a worker that switches files never leaves an empty log behind)
+        self.file_handler = logging.FileHandler(log_path, delay=True)
+        self.file_handler.setFormatter(formatter)
+        self.logger.addHandler(self.file_handler)
 
         # Console Handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        self.console_handler = logging.StreamHandler()
+        self.console_handler.setFormatter(formatter)
+        self.logger.addHandler(self.console_handler)
 
     def get_logger(self):
         return self.logger
 
+    def use_log_file(self, log_path, tag=None):
+        """
+        Redirects file logging to log_path (used by fleet workers for per-gateway logs).
+        If tag is given, it is prefixed to every record so interleaved console output stays readable.
+        """
+        log_dir = os.path.dirname(log_path)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+        fmt = '%(asctime)s - %(levelname)s - %(message)s'
+        if tag:
+            fmt = f'%(asctime)s - [{tag}] - %(levelname)s - %(message)s'
+        formatter = logging.Formatter(fmt)
+
+        self.logger.removeHandler(self.file_handler)
+        self.file_handler.close()
+        self.file_handler = logging.FileHandler(log_path, delay=True)
+        self.file_handler.setFormatter(formatter)
+        self.logger.addHandler(self.file_handler)
+        self.console_handler.setFormatter(formatter)
+        return log_path
+
 # Usage: logger = Logger().get_logger()
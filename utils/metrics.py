@@ -0,0 +1,36 @@
+from utils.logger import Logger
+
+
+class Metrics:
+    """
+    Process-wide run counters (e.g. WebDriver commands saved by in-browser probes).
+    Singleton like Logger, so every page object increments the same counters.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+            cls._instance.counters = {}
+        return cls._instance
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def get(self, name):
+        return self.counters.get(name, 0)
+
+    def reset(self):
+        """Clears all counters (called at the start of each gateway run)."""
+        self.counters = {}
+
+    def log_summary(self):
+        """Logs every counter collected during the run."""
+        logger = Logger().get_logger()
+        if not self.counters:
+            return
+        logger.info("Run metrics:")
+        for name in sorted(self.counters):
+            logger.info(f"  {name}: {self.counters[name]}")
+
+# Usage: Metrics().increment("webdriver_commands_saved", 8)
@@ -0,0 +1,110 @@
+"""
+Gateway readiness prober.
+
+After the LAN IP migration the gateway restarts its services on the new address. Instead of a fixed
+sleep, TCP 80, HTTP 200 on the login page and (optionally) the SSH banner on port 22 are polled in
+parallel, each with its own jittered exponential backoff. The wait ends as soon as the required
+probes answer, or at a hard deadline.
+"""
+import http.client
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+from utils.config import Config
+from utils.logger import Logger
+
+# Backoff between attempts of one probe: 0.5s, 1s, 2s (capped), each scaled by a random 50-100%.
+# Probes are cheap, so a low cap keeps the detection delay short once the gateway is back.
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 2.0
+
+
+def probe_tcp(host, port, timeout=2):
+    """True once a TCP connection to host:port is accepted."""
+    with socket.create_connection((host, port), timeout=timeout):
+        return True
+
+
+def probe_http(url, timeout=3):
+    """True once url answers HTTP 200 (the web UI is served, not just the port opened)."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200
+    except urllib.error.HTTPError:
+        return False
+
+
+def probe_ssh(host, port=22, timeout=3):
+    """True once the SSH daemon sends its banner (port open is not enough: dropbear may still be starting)."""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        return sock.recv(64).startswith(b"SSH-")
+
+
+def wait_until_reachable(url, timeout=None, check_ssh=None):
+    """
+    Polls the gateway at url until the web UI (and SSH if check_ssh) answers.
+    Returns True as soon as every required probe succeeded, False at the deadline.
+    """
+    logger = Logger().get_logger()
+    timeout = timeout or Config.REACHABILITY_TIMEOUT
+    check_ssh = Config.REACHABILITY_CHECK_SSH if check_ssh is None else check_ssh
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    probes = {
+        "tcp": lambda: probe_tcp(host, port),
+        "http": lambda: probe_http(url),
+    }
+    if check_ssh:
+        probes["ssh"] = lambda: probe_ssh(host)
+    required = {"http", "ssh"} & set(probes)
+
+    start = time.time()
+    deadline = start + timeout
+    ready = {}
+    lock = threading.Lock()
+    all_ready = threading.Event()
+    # A probe that succeeds wakes the others (e.g. port 80 just opened: try HTTP now, not after backoff)
+    wake = {name: threading.Event() for name in probes}
+
+    def run_probe(name, probe):
+        attempt = 0
+        while not all_ready.is_set() and time.time() < deadline:
+            attempt += 1
+            try:
+                if probe():
+                    with lock:
+                        ready[name] = round(time.time() - start, 1)
+                        if required <= set(ready):
+                            all_ready.set()
+                    for other in wake.values():
+                        other.set()
+                    logger.info(f"[REACH] {name} ready on {host} after {ready[name]}s ({attempt} attempt(s))")
+                    return
+            except (OSError, http.client.HTTPException) as e:
+                # HTTPException: a restarting web server may cut a response short (e.g. IncompleteRead)
+                logger.debug(f"[REACH] {name} attempt {attempt} on {host}: {e}")
+            delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            wake[name].wait(min(delay, max(deadline - time.time(), 0)))
+            wake[name].clear()
+
+    logger.info(f"[REACH] Probing {url} ({', '.join(probes)}) for up to {timeout}s...")
+    threads = [threading.Thread(target=run_probe, args=item, daemon=True) for item in probes.items()]
+    for t in threads:
+        t.start()
+    all_ready.wait(timeout)
+    all_ready.set()  # stops the remaining probes
+    for event in wake.values():
+        event.set()
+
+    if required <= set(ready):
+        logger.info(f"[REACH] {host} ready after {round(time.time() - start, 1)}s.")
+        return True
+    missing = sorted(required - set(ready))
+    logger.warning(f"[REACH] {host} not ready after {timeout}s (missing: {', '.join(missing)}).")
+    return False
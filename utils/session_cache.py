@@ -0,0 +1,149 @@
+"""
+Authenticated web-session cache.
+
+After a form login the session cookies and the Web Storage of the gateway origin (where the web UI
+keeps its context token) are saved per gateway address. A new driver gets them back before the first
+page load (CDP cookies + a storage seed script that runs before the app boots), so the app starts
+already authenticated. Validation and the fallback to the login form are done by LoginPage.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from utils.config import Config
+from utils.logger import Logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SessionCache:
+    """Per-address session snapshots stored in Config.SESSION_CACHE_FILE (owner-readable only)."""
+
+    # Returns {local: {...}, session: {...}} for the current origin
+    READ_STORAGE_SCRIPT = """
+        function dump(storage) {
+            var items = {};
+            for (var i = 0; i < storage.length; i++) { items[storage.key(i)] = storage.getItem(storage.key(i)); }
+            return items;
+        }
+        return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+    """
+
+    # Injected with Page.addScriptToEvaluateOnNewDocument: seeds Web Storage on the gateway origin
+    # before any app script runs (placeholders are filled with JSON literals)
+    SEED_STORAGE_SCRIPT = """
+        (function () {
+            if (window.location.origin !== __ORIGIN__) { return; }
+            var seed = __STORAGE__;
+            Object.keys(seed.local).forEach(function (k) { window.localStorage.setItem(k, seed.local[k]); });
+            Object.keys(seed.session).forEach(function (k) { window.sessionStorage.setItem(k, seed.session[k]); });
+        })();
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.SESSION_CACHE_FILE
+        self.logger = Logger().get_logger()
+
+    def capture(self, driver, url):
+        """Saves the cookies and Web Storage of the logged-in session at url."""
+        storage = driver.execute_script(self.READ_STORAGE_SCRIPT)
+        cookies = [{k: c[k] for k in ("name", "value", "path", "secure", "httpOnly") if k in c}
+                   for c in driver.get_cookies()]
+        self._save(_origin(url), {"saved": time.time(), "cookies": cookies, "storage": storage})
+        self.logger.info(f"[SESSION] Saved session for {_origin(url)} ({len(cookies)} cookie(s), "
+                         f"{len(storage['local']) + len(storage['session'])} storage item(s))")
+
+    def inject(self, driver, url, source_url=None):
+        """
+        Prepares driver so that its next load of url starts with the session saved for source_url
+        (default: url itself; another address of the same gateway, e.g. before the LAN change).
+        Returns False when there is no fresh snapshot. Call remove_seed() once the page is loaded.
+        """
+        entry = self._load().get(_origin(source_url or url))
+        if not entry or time.time() - entry["saved"] > Config.SESSION_MAX_AGE:
+            return False
+
+        origin = _origin(url)
+        for cookie in entry["cookies"]:
+            driver.execute_cdp_cmd("Network.setCookie", {**cookie, "url": origin})
+        script = (self.SEED_STORAGE_SCRIPT
+                  .replace("__ORIGIN__", json.dumps(origin))
+                  .replace("__STORAGE__", json.dumps(entry["storage"])))
+        self._seed_id = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})["identifier"]
+        self.logger.info(f"[SESSION] Injected cached session of {_origin(source_url or url)} for {origin}")
+        return True
+
+    def remove_seed(self, driver):
+        """Stops seeding Web Storage on later loads (the app owns it from now on, e.g. after logout)."""
+        seed_id = getattr(self, "_seed_id", None)
+        if seed_id:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": seed_id})
+            self._seed_id = None
+
+    def invalidate(self, url):
+        """Drops the snapshot of url (rejected by the gateway)."""
+        if self._save(_origin(url), None):
+            self.logger.info(f"[SESSION] Dropped rejected session for {_origin(url)}")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, origin, entry):
+        """
+        Stores entry for origin (None drops it) and returns whether the file changed. Fleet workers
+        share the file, so the snapshots are re-read under an exclusive lock and only this origin is
+        replaced; the write itself is atomic and owner-only (the file holds live session tokens).
+        """
+        with self._locked():
+            entries = self._load()
+            if entry is None:
+                if entries.pop(origin, None) is None:
+                    return False
+            else:
+                entries[origin] = entry
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+            return True
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on <path>.lock for a read-modify-write of the cache file."""
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(f"{self.path}.lock", "a+b") as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme or 'http'}://{parts.netloc or parts.path}"
@@ -0,0 +1,162 @@
+"""
+Step-graph runner for the configuration pipeline.
+
+Each step declares the steps it depends on, the page object it drives and the resource it needs
+('browser', 'ssh', ...). The runner starts every step whose dependencies are finished, never runs two
+steps on the same resource at once, keeps the declaration order among ready steps, and logs a
+per-step timing table at the end. A step that raises only blocks the steps depending on it;
+independent steps still run.
+"""
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.logger import Logger
+
+# Step outcomes that let dependent steps run (a soft failure keeps the historical "log and go on")
+DONE_STATUSES = ("passed", "soft_failed", "skipped")
+
+# Name of the step running in the current thread (e.g. to tag its screenshot evidence)
+_running = threading.local()
+
+
+def current_step():
+    """Name of the step executing in this thread, or None outside of a StepGraph run."""
+    return getattr(_running, "step", None)
+
+
+class Step:
+    """One pipeline phase. func(ctx) returns False for a soft failure; raising marks it failed."""
+
+    def __init__(self, name, func, deps=(), page=None, section=None, resource="browser"):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.page = page          # page object class the step drives (None for non-UI steps)
+        self.section = section    # desired-state section the step applies (None = always runs)
+        self.resource = resource  # steps sharing a resource never run concurrently
+
+    def __repr__(self):
+        return f"Step({self.name!r}, deps={self.deps})"
+
+
+class StepGraph:
+    """Validated dependency graph of Steps."""
+
+    def __init__(self, steps):
+        self.steps = {}
+        self.errors = []  # (step name, exception) of the last run
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step name: {step.name}")
+            self.steps[step.name] = step
+        for step in steps:
+            unknown = [dep for dep in step.deps if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown step(s): {unknown}")
+        self.order()  # fails fast on cycles
+
+    def order(self):
+        """Topological order, stable with respect to declaration order."""
+        ordered, placed = [], set()
+        remaining = list(self.steps.values())
+        while remaining:
+            ready = [s for s in remaining if all(dep in placed for dep in s.deps)]
+            if not ready:
+                raise ValueError(f"Dependency cycle between steps: {[s.name for s in remaining]}")
+            ordered.append(ready[0])
+            placed.add(ready[0].name)
+            remaining.remove(ready[0])
+        return ordered
+
+    def run(self, ctx, skip=None, on_complete=None, max_workers=1, runner=None):
+        """
+        Runs the graph. skip(step) may return a reason to skip a step (counts as done for its dependents);
+        on_complete(step, status) is called from the scheduling thread after every step;
+        runner(step, ctx) replaces step.func(ctx), e.g. to execute a step through another backend.
+        Returns the per-step results [{'name', 'status', 'duration', 'error'}] in execution order.
+        """
+        logger = Logger().get_logger()
+        pending = self.order()
+        status, results, running, busy = {}, [], {}, set()
+
+        def finish(step, step_status, duration=0.0, error=""):
+            status[step.name] = step_status
+            results.append({"name": step.name, "status": step_status, "duration": round(duration, 1), "error": error})
+            if on_complete:
+                on_complete(step, step_status)
+
+        def timed(step):
+            start = time.time()
+            _running.step = step.name
+            try:
+                outcome = runner(step, ctx) if runner else step.func(ctx)
+            except Exception as e:
+                logger.error(f"[STEPS] Step '{step.name}' failed: {e}\n{traceback.format_exc()}")
+                return "failed", time.time() - start, e
+            finally:
+                _running.step = None
+            return ("soft_failed" if outcome is False else "passed"), time.time() - start, None
+
+        self.errors = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                # 1. Start (or resolve) every step that is ready, in declaration order
+                progress = True
+                while progress:
+                    progress = False
+                    for step in list(pending):
+                        if any(dep not in status for dep in step.deps):
+                            continue
+                        blocked_by = [dep for dep in step.deps if status[dep] not in DONE_STATUSES]
+                        if blocked_by:
+                            pending.remove(step)
+                            logger.warning(f"[STEPS] Step '{step.name}' blocked by failed step(s) {blocked_by}.")
+                            finish(step, "blocked", error=f"blocked by {', '.join(blocked_by)}")
+                            progress = True
+                            continue
+                        reason = skip(step) if skip else None
+                        if reason:
+                            pending.remove(step)
+                            logger.info(f"\n--- {step.name.upper()}: {reason}. Skipped. ---")
+                            finish(step, "skipped", error=reason)
+                            progress = True
+                            continue
+                        if step.resource in busy or len(running) >= max_workers:
+                            continue
+                        pending.remove(step)
+                        if step.resource:
+                            busy.add(step.resource)
+                        running[pool.submit(timed, step)] = step
+                        progress = True
+
+                if not running:
+                    break
+
+                # 2. Wait for the next step to finish
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    busy.discard(step.resource)
+                    step_status, duration, error = future.result()
+                    if error is not None:
+                        self.errors.append((step.name, error))
+                    finish(step, step_status, duration,
+                           (str(error).splitlines() or [type(error).__name__])[0] if error else "")
+
+        log_step_timings(results)
+        return results
+
+
+def log_step_timings(results):
+    """Logs the per-step timing table."""
+    logger = Logger().get_logger()
+    header = f"{'STEP':<16} {'STATUS':<12} {'TIME(s)':>8}  DETAIL"
+    logger.info("=" * 60)
+    logger.info(header)
+    logger.info("-" * len(header))
+    for r in results:
+        logger.info(f"{r['name']:<16} {r['status']:<12} {r['duration']:>8}  {r['error'][:80]}")
+    logger.info("-" * len(header))
+    logger.info(f"Total step time: {round(sum(r['duration'] for r in results), 1)}s")
+    logger.info("=" * 60)
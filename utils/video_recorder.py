@@ -1,73 +1,264 @@
+import base64
+import collections
 import cv2
 import numpy as np
-import pyautogui
 import os
+import queue
 import threading
 import time
 from datetime import datetime
+from utils.config import Config
+from utils.devtools import DevToolsConnection
 from utils.logger import Logger
 
 class VideoRecorder:
-    """Utility to record the screen during automation execution."""
-    
-    def __init__(self, output_dir="recordings", fps=8.0):
-        self.output_dir = output_dir
-        self.fps = fps
+    """
+    Utility to record the automation as a video.
+
+    With a driver, frames come from that browser's CDP screencast (works headless, one video per
+    browser even when many run at once). Without one, the desktop is captured with pyautogui.
+    Capture and encoding are decoupled by a bounded queue: a slow encoder drops frames instead of
+    stalling the capture, and the video keeps a constant frame rate by repeating the last frame.
+    Frames that barely differ from the previous one are skipped before encoding.
+
+    Flight-recorder mode (flight_seconds): the compressed frames of the last flight_seconds stay in
+    a ring buffer and are only encoded by save(reason), e.g. when a step fails; stop() discards them.
+    """
+
+    def __init__(self, driver=None, output_dir=None, fps=None, flight_seconds=None):
+        self.driver = driver
+        self.output_dir = output_dir or Config.VIDEO_DIR
+        self.fps = fps or Config.VIDEO_FPS
+        self.flight_seconds = flight_seconds
+        self.ring = None
+        self.ring_lock = threading.Lock()  # the DevTools reader appends while save() snapshots
+        self.name_prefix = "automation"
+        self.saved = []
         self.recording = False
         self.thread = None
+        self.encoder = None
+        self.connection = None
+        self.frames = None
+        self.dropped = 0
+        self.filepath = None
         self.logger = Logger().get_logger()
-        
+
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
-    def _record(self, filename):
-        """Internal recording loop."""
-        screen_size = tuple(pyautogui.size())
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        filepath = os.path.join(self.output_dir, filename)
-        out = cv2.VideoWriter(filepath, fourcc, self.fps, screen_size)
-        
-        self.logger.info(f"Started video recording: {filepath}")
-        
+    # ------------------------------------------------------------------
+    # Capture
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def attached(cls, driver):
+        """Flight recorder running on driver (so page objects can save on recovery), or None."""
+        return getattr(driver, "_hgw_flight_recorder", None)
+
+    def _start_screencast(self):
+        self.connection.send("Page.startScreencast", {
+            "format": "jpeg",
+            "quality": Config.VIDEO_QUALITY,
+            "maxWidth": Config.VIDEO_MAX_WIDTH,
+            "maxHeight": Config.VIDEO_MAX_WIDTH,
+            # Chrome paints at up to 60 fps: only ship about as many frames as the video keeps
+            "everyNthFrame": max(1, round(60 / self.fps)),
+        })
+
+    def _on_cdp_event(self, method, params):
+        """DevTools reader thread: acks and queues screencast frames (never blocks on the encoder)."""
+        if method == "Page.screencastFrame":
+            self.connection.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+            timestamp = params.get("metadata", {}).get("timestamp") or time.time()
+            self._enqueue(timestamp, base64.b64decode(params["data"]))
+        elif method == "Page.frameNavigated" and not params["frame"].get("parentId"):
+            # A cross-origin navigation (e.g. the LAN IP change) swaps the renderer and ends the screencast
+            self._start_screencast()
+
+    def _record_desktop(self):
+        """Desktop capture loop (no driver): grabs frames at the target FPS, the encoder converts them."""
+        import pyautogui  # needs a display: only imported for desktop recording
+
         last_time = time.time()
         while self.recording:
-            # Capture screen
-            img = pyautogui.screenshot()
-            # Convert to numpy array
-            frame = np.array(img)
-            # Convert from RGB to BGR (OpenCV uses BGR)
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-            # Write frame
-            out.write(frame)
-            
+            # Capture screen (RGB, converted to BGR by the encoder thread; JPEG-compressed in flight mode)
+            self._enqueue(time.time(), np.array(pyautogui.screenshot()))
+
             # Control FPS
             elapsed = time.time() - last_time
             sleep_time = (1.0 / self.fps) - elapsed
             if sleep_time > 0:
                 time.sleep(sleep_time)
             last_time = time.time()
-            
-        out.release()
-        self.logger.info(f"Stopped video recording. Video saved to: {filepath}")
+
+    def _enqueue(self, timestamp, frame):
+        if self.ring is not None:
+            # Flight mode: keep the compressed frame, forget the ones older than flight_seconds.
+            # Desktop frames arrive raw (a 1080p RGB array is ~6 MB): JPEG them like screencast frames.
+            if not isinstance(frame, bytes):
+                frame = _jpeg(frame)
+            with self.ring_lock:
+                self.ring.append((timestamp, frame))
+                while self.ring[0][0] < timestamp - self.flight_seconds:
+                    self.ring.popleft()
+            return
+        try:
+            self.frames.put_nowait((timestamp, frame))
+        except queue.Full:
+            self.dropped += 1
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _encode(self):
+        """Encoder thread of a continuous recording: consumes the queue until stop()."""
+        frames, skipped = self._write_video(self.filepath, iter(self.frames.get, None))
+        if not frames:
+            self.logger.info("Stopped video recording. No frame was captured.")
+            return
+        self.logger.info(f"Stopped video recording. Video saved to: {self.filepath} "
+                         f"({frames} frame(s), {skipped} unchanged skipped, {self.dropped} dropped)")
+
+    def _write_video(self, filepath, items):
+        """
+        Decodes (timestamp, frame) items and writes them at a constant frame rate.
+        The last frame is always kept: it is the state at a flight-recorder save (the failure).
+        Returns (frames written, unchanged frames skipped).
+        """
+        writer, size, first_timestamp, last_frame, last_small, written, skipped = None, None, None, None, None, 0, 0
+        held = None  # latest skipped frame, written at the end if nothing follows it
+        for timestamp, data in items:
+            if isinstance(data, bytes):
+                frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)  # JPEG -> BGR
+            else:
+                frame = cv2.cvtColor(data, cv2.COLOR_RGB2BGR)
+            if frame is None:
+                continue
+            if writer is None:
+                size = (frame.shape[1], frame.shape[0])
+                writer = cv2.VideoWriter(filepath, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, size)
+                first_timestamp = timestamp
+            elif (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size)
+
+            small = _thumbnail(frame)
+            if last_small is not None and _changed_ratio(small, last_small) <= Config.VIDEO_DIFF_THRESHOLD:
+                skipped += 1  # same picture: the previous frame keeps being repeated
+                held = (timestamp, frame)
+                continue
+            last_small, held = small, None
+            written = self._fill_until(writer, last_frame, written, int((timestamp - first_timestamp) * self.fps))
+            last_frame = frame
+
+        if held is not None:
+            skipped -= 1
+            written = self._fill_until(writer, last_frame, written, int((held[0] - first_timestamp) * self.fps))
+            last_frame = held[1]
+        if writer is not None:
+            writer.write(last_frame)
+            written += 1
+            writer.release()
+        return written, skipped
+
+    @staticmethod
+    def _fill_until(writer, frame, written, slot):
+        """Screencast frames only arrive on change: repeats frame up to the next frame's slot."""
+        while frame is not None and written < slot:
+            writer.write(frame)
+            written += 1
+        return written
+
+    def save(self, reason="failure"):
+        """
+        Flight mode: encodes the buffered last flight_seconds to <prefix>_<reason>_<timestamp>.mp4
+        on a background thread and empties the buffer. Returns the video path (None without frames).
+        """
+        if not self.ring:
+            return None
+        with self.ring_lock:
+            frames = list(self.ring)
+            self.ring.clear()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(self.output_dir, f"{self.name_prefix}_{reason}_{timestamp}.mp4")
+
+        def encode():
+            written, skipped = self._write_video(filepath, frames)
+            self.logger.info(f"[VIDEO] Flight recording saved to {filepath} "
+                             f"({written} frame(s), {skipped} unchanged skipped)")
+
+        thread = threading.Thread(target=encode, name="flight-encoder", daemon=True)
+        thread.start()
+        self.saved.append(thread)
+        self.logger.info(f"[VIDEO] Saving the last {self.flight_seconds}s ({len(frames)} frame(s)): {reason}")
+        return filepath
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
 
     def start(self, name_prefix="automation"):
-        """Starts the recording in a separate thread."""
+        """Starts the recording (capture + encoder threads)."""
         if self.recording:
             return
-            
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{name_prefix}_{timestamp}.mp4"
+        self.name_prefix = name_prefix
+        self.filepath = os.path.join(self.output_dir, f"{name_prefix}_{timestamp}.mp4")
+        self.frames = queue.Queue(maxsize=Config.VIDEO_QUEUE_SIZE)
+        self.dropped = 0
         self.recording = True
-        self.thread = threading.Thread(target=self._record, args=(filename,))
-        self.thread.daemon = True
-        self.thread.start()
+        if self.flight_seconds:
+            # Fixed-size ring: at most ~2x the frames flight_seconds should hold at the target FPS
+            self.ring = collections.deque(maxlen=int(self.flight_seconds * self.fps * 2))
+            if self.driver is not None:
+                self.driver._hgw_flight_recorder = self
+        else:
+            self.encoder = threading.Thread(target=self._encode, name="video-encoder", daemon=True)
+            self.encoder.start()
+
+        try:
+            if self.driver is not None:
+                self.connection = DevToolsConnection(self.driver, on_event=self._on_cdp_event)
+                self.connection.send("Page.enable")
+                self._start_screencast()
+            else:
+                self.thread = threading.Thread(target=self._record_desktop, daemon=True)
+                self.thread.start()
+        except Exception:
+            self.stop()  # no capture or encoder thread left behind
+            raise
+        self.logger.info(f"Started video recording: {self.filepath}" if self.ring is None else
+                         f"[VIDEO] Flight recorder armed (last {self.flight_seconds}s kept in memory)")
 
     def stop(self):
-        """Stops the recording."""
+        """Stops the recording and waits until the video file is complete."""
+        if not self.recording:
+            return
         self.recording = False
+        if self.connection:
+            try:
+                self.connection.send("Page.stopScreencast", wait=True)
+            except Exception:
+                pass  # browser already gone
+            self.connection.close()
+            self.connection = None
         if self.thread:
             self.thread.join()
             self.thread = None
+        if self.ring is not None:
+            # Nothing failed since the last save(): the buffered frames are simply dropped
+            self.logger.info(f"[VIDEO] Flight recorder stopped, {len(self.ring)} buffered frame(s) discarded.")
+            self.ring = None
+            if getattr(self.driver, "_hgw_flight_recorder", None) is self:
+                del self.driver._hgw_flight_recorder
+            for thread in self.saved:
+                thread.join()
+            self.saved = []
+            return
+        self.frames.put(None)
+        self.encoder.join()
+        self.encoder = None
 
     def __enter__(self):
         self.start()
@@ -75,3 +266,20 @@ class VideoRecorder:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.stop()
+
+
+def _jpeg(rgb_frame):
+    """JPEG bytes (Config.VIDEO_QUALITY) of an RGB desktop frame; _write_video decodes them."""
+    _, data = cv2.imencode(".jpg", cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR),
+                           [cv2.IMWRITE_JPEG_QUALITY, Config.VIDEO_QUALITY])
+    return data.tobytes()
+
+
+def _thumbnail(frame):
+    """Small grayscale copy used for the frame-difference check."""
+    return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (160, 90), interpolation=cv2.INTER_AREA)
+
+
+def _changed_ratio(small, previous):
+    """Share of pixels that changed noticeably between two thumbnails (one vectorized pass)."""
+    return np.count_nonzero(np.abs(small.astype(np.int16) - previous.astype(np.int16)) > 8) / small.size